@@ -4,7 +4,7 @@ Document management endpoints
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, status
 from typing import List
-from app.services.ingestion import IngestionService
+from app.services.ingestion import IngestionService, DuplicateDocumentError
 from app.core.config import settings
 
 router = APIRouter()
@@ -56,6 +56,8 @@ async def upload_document(file: UploadFile = File(...)):
             "document_id": result["document_id"],
             "chunks_created": result["chunks_created"]
         }
+    except DuplicateDocumentError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -97,13 +99,45 @@ async def delete_document(document_id: str):
         dict: Deletion status
     """
     try:
-        await ingestion_service.delete_document(document_id)
-        return {
-            "status": "success",
-            "message": f"Document {document_id} deleted successfully"
-        }
+        result = await ingestion_service.delete_document(document_id)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting document: {str(e)}"
         )
+    if result["status"] == "not_found":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document {document_id} not found"
+        )
+    return {
+        "status": "success",
+        "message": f"Document {document_id} deleted successfully",
+        "chunks_deleted": result["chunks_deleted"]
+    }
+
+
+@router.post("/{document_id}/reingest")
+async def reingest_document(document_id: str):
+    """
+    Re-embed a document from the chunk text stored in the document registry
+    
+    Args:
+        document_id: The ID of the document to re-ingest
+    
+    Returns:
+        dict: Re-ingest status
+    """
+    try:
+        result = await ingestion_service.reingest_document(document_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error re-ingesting document: {str(e)}"
+        )
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document {document_id} not found"
+        )
+    return {"status": "success", **result}
@@ -5,12 +5,11 @@ RAG (Retrieval Augmented Generation) endpoints
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel, Field
 from typing import Optional, List
-from app.services.vector_store import VectorService
+from app.services.vector_store import get_vector_service
 from app.services.rag_engine import RAGEngine
 
 router = APIRouter()
-vector_store_service = VectorService()
-rag_engine = RAGEngine(vector_store_service)
+rag_engine = RAGEngine()
 
 
 class QueryRequest(BaseModel):
@@ -60,21 +59,23 @@ async def query_rag(request: QueryRequest):
 
 
 @router.post("/search")
-async def semantic_search(query: str, top_k: int = 5):
+async def semantic_search(query: str, top_k: int = 5, mode: Optional[str] = None):
     """
     Perform semantic search without generation
     
     Args:
         query: The search query
         top_k: Number of results to return
+        mode: dense, lexical (BM25) or hybrid
     
     Returns:
         dict: Search results with relevant document chunks
     """
     try:
-        results = vector_store_service.search(
+        results = await get_vector_service().asearch(
             query=query,
-            k=top_k
+            k=top_k,
+            mode=mode
         )
         
         return {
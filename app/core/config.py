@@ -21,16 +21,134 @@ class Settings(BaseSettings):
     # Vector Store Settings
     CHROMA_PERSIST_DIRECTORY: str = "./data/chroma_db"
     CHROMA_COLLECTION_NAME: str = "rag_documents"
+    # "pinecone" (default), "numpy" (exact in-process index), "hnsw" (approximate graph index)
+    # or "memory" (in-process Pinecone stand-in: Pinecone code path, no account)
+    # or "sharded" (exact, vectors split across worker processes through shared memory)
+    VECTOR_BACKEND: str = "pinecone"
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 100
+    HNSW_EF_SEARCH: int = 50
+    # Sharded backend: shards and worker processes (0 = one per CPU / one per shard);
+    # smaller indexes are scanned in-process, where IPC would cost more than the scan
+    SHARD_COUNT: int = 0
+    SHARD_WORKERS: int = 0
+    SHARD_PARALLEL_MIN_ROWS: int = 20000
+    
+    # Local vector storage precision: float32, float16 or int8 (scalar quantized)
+    VECTOR_STORAGE: str = "float32"
+    VECTOR_RESCORE: bool = True
+    VECTOR_RESCORE_FACTOR: int = 4
+    VECTOR_FULL_PRECISION_PATH: str = "./data/vector_index/full_precision.f32"
+    # Two-stage local search: scan a truncated prefix, re-rank with full vectors (0 = off)
+    VECTOR_COARSE_DIMENSION: int = 0
+    VECTOR_COARSE_FACTOR: int = 10
+    
+    # Embedding cache (keyed by model + dimension + normalized text hash)
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_DIR: str = "./data/embedding_cache"  # empty = memory tier only
+    EMBEDDING_CACHE_MEMORY_ITEMS: int = 10000
+    EMBEDDING_CACHE_MAX_BYTES: int = 536870912  # 512MB
+    
+    # Search result cache (invalidated on every add_documents)
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_MAX_SIZE: int = 1024
+    SEARCH_CACHE_TTL_SECONDS: float = 300.0
+    # Concurrent index queries per batch search request
+    SEARCH_BATCH_CONCURRENCY: int = 8
+    
+    # Lexical (BM25) index and hybrid search (dense | lexical | hybrid)
+    LEXICAL_INDEX_ENABLED: bool = True
+    SEARCH_DEFAULT_MODE: str = "dense"
+    HYBRID_CANDIDATE_FACTOR: int = 4
+    RRF_K: int = 60
+    BM25_K1: float = 1.5
+    BM25_B: float = 0.75
+    # Maximal marginal relevance for retrieved context (consult, RAG query); opt-in
+    CONTEXT_MMR_ENABLED: bool = False
+    MMR_FETCH_FACTOR: int = 4
+    MMR_LAMBDA: float = 0.5
+    # Grouped (per-document) search: chunks fetched per group, score aggregation (max | sum)
+    GROUP_FETCH_FACTOR: int = 5
+    GROUP_AGGREGATE: str = "max"
+    GROUP_TOP_N: int = 3
+    GROUP_SNIPPETS: int = 2
+    # Two-level candidate search: one mean-pooled vector per document, then chunks of the top documents
+    DOCUMENT_VECTORS_ENABLED: bool = True
+    DOCUMENT_VECTOR_NAMESPACE: str = "documents"
+    DOCUMENT_CANDIDATE_FACTOR: int = 3
+    
+    # Ingest pipeline (token-aware batches, embedding overlapped with upserts)
+    INGEST_BATCH_MAX_TOKENS: int = 20000
+    INGEST_BATCH_MAX_CHUNKS: int = 96
+    INGEST_MAX_CONCURRENCY: int = 4
+    INGEST_MAX_RETRIES: int = 3
     
     # Model Settings
     EMBEDDING_MODEL_NAME: str = "sentence-transformers/all-MiniLM-L6-v2"
     LLM_MODEL_NAME: str = "gpt-3.5-turbo"
     
+    # Client-side embedding model and vector dimension (text-embedding-3 models can be shortened)
+    EMBEDDING_MODEL: str = "text-embedding-3-small"
+    EMBEDDING_DIMENSION: int = 1536
+    # Online migration to another model (POST /embedding_migration/start): new chunks are
+    # written to both indexes, old ones backfilled at a throttled rate, live queries
+    # shadowed on the new index; cutover is manual unless MIGRATION_AUTO_CUTOVER is set
+    MIGRATION_EMBEDDING_MODEL: Optional[str] = None
+    MIGRATION_EMBEDDING_DIMENSION: Optional[int] = None
+    MIGRATION_INDEX_NAME: Optional[str] = None
+    MIGRATION_BACKFILL_CHUNKS_PER_SECOND: float = 50.0
+    MIGRATION_SHADOW_SAMPLE_RATE: float = 0.1
+    MIGRATION_AUTO_CUTOVER: bool = False
+    MIGRATION_CUTOVER_MIN_SHADOW_QUERIES: int = 50
+    MIGRATION_CUTOVER_MIN_OVERLAP: float = 0.6
+    
+    # Providers: embeddings "openai" | "hashing", chat "openai" | "scripted" (offline stand-ins)
+    EMBEDDING_PROVIDER: str = "openai"
+    CHAT_PROVIDER: str = "openai"
+    # Latency / error injection for the offline stand-ins (hashing, scripted, memory)
+    FAKE_EMBEDDING_LATENCY_MS: float = 0.0
+    FAKE_CHAT_LATENCY_MS: float = 0.0
+    FAKE_INDEX_LATENCY_MS: float = 0.0
+    FAKE_LATENCY_JITTER_MS: float = 0.0
+    FAKE_ERROR_RATE: float = 0.0
+    FAKE_SEED: Optional[int] = None
+    
     # API Keys
     OPENAI_API_KEY: Optional[str] = None
     HUGGINGFACE_API_KEY: Optional[str] = None
     PINECONE_API_KEY: Optional[str] = None
     PINECONE_INDEX_NAME: str = "resume-index"
+    # Optional data-plane host; when set, startup skips the index host lookup
+    PINECONE_INDEX_HOST: Optional[str] = None
+    
+    # Connection pooling and startup
+    PINECONE_POOL_THREADS: int = 8
+    PINECONE_READY_TIMEOUT_SECONDS: float = 60.0
+    HTTP_MAX_CONNECTIONS: int = 20
+    # Document registry (file -> chunk IDs manifest)
+    DOCUMENT_REGISTRY_PATH: str = "./data/document_registry.sqlite3"
+    
+    # Extracted PDF text sidecars (<sha256>.json, written at upload) + in-memory LRU; empty dir = memory only
+    PDF_TEXT_CACHE_DIR: str = "./data/pdf_text"
+    PDF_TEXT_CACHE_MEMORY_ITEMS: int = 256
+    
+    # Snapshots (vectors.npy + chunks.json + manifest.json) for fast node bootstrap
+    SNAPSHOT_DIR: str = "./data/snapshots"
+    SNAPSHOT_UPSERT_BATCH: int = 100
+    # Local backends: load this snapshot directory at startup (zero-copy for numpy/float32)
+    SNAPSHOT_RESTORE_PATH: Optional[str] = None
+    
+    # Hot local mirror in front of Pinecone (write-through, LRU by document, outage fallback).
+    # Off by default: writes from other processes only reach it through the stats refresh check
+    MIRROR_ENABLED: bool = False
+    MIRROR_MAX_VECTORS: int = 20000
+    # Remote hits on an unmirrored document before it is copied into the mirror
+    MIRROR_PROMOTE_HITS: int = 2
+    # Pinecone queries slower than this are answered from the mirror (0 = no timeout)
+    MIRROR_REMOTE_TIMEOUT_SECONDS: float = 2.0
+    
+    # Background refresh period for cached index statistics
+    INDEX_STATS_REFRESH_SECONDS: float = 60.0
     
     # File Upload Settings
     MAX_UPLOAD_SIZE: int = 10485760  # 10MB
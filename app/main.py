@@ -2,22 +2,26 @@
 Main FastAPI application entry point with MCP integration
 """
 
+import asyncio
 import os
 import tempfile
 import logging
+import time
 from contextlib import asynccontextmanager
 from typing import List, Dict, Any
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from app.services.vector_store import VectorService
-from app.services.ingestor import process_pdf
+from app.services.vector_store import get_vector_service, close_vector_service
+from app.services.embedding_migration import close_migration, get_migration, start_migration
+from app.services.ingestor import load_pdf_pages, split_pages, CHUNKER_CONFIG
+from app.services.ingestion import IngestionService, DuplicateDocumentError
 from app.services.pdf_generator import PDFService
 from app.services.resume_tailor import tailor_resume_with_ai
-from app.services.pdf_extractor import extract_text_from_pdf
+from app.services.pdf_extractor import extract_text_from_pdf, get_pdf_text_cache
 from app.services.mcp_client import (
     call_mcp_tool,
     call_tool_result_to_text,
@@ -26,6 +30,7 @@ from app.services.mcp_client import (
 )
 from app.services.agent_chat import run_agent_chat
 from app.core.config import settings
+from app.services.providers import get_chat_model
 from app.mcp_server import build_mcp, mcp_lifespan
 
 # Configure logging
@@ -40,12 +45,12 @@ except ImportError as e:
     logger.warning(f"⚠️  ChatOpenAI import failed: {e}. AI features will run in demo mode.")
     ChatOpenAI = None
 
-# Initialize VectorService (singleton)
-vector_service = VectorService()
-
 # Initialize PDFService
 pdf_service = PDFService()
 
+# Registry-backed ingestion (list / delete / re-ingest by document)
+ingestion_service = IngestionService()
+
 # Define uploads directory
 UPLOADS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "uploads")
 os.makedirs(UPLOADS_DIR, exist_ok=True)
@@ -63,6 +68,12 @@ class GeneratePDFRequest(BaseModel):
     content: str
 
 
+class BatchSearchRequest(BaseModel):
+    """Request model for searching several queries (e.g. job descriptions) at once"""
+    queries: List[str] = Field(..., min_length=1, max_length=100)
+    k: int = Field(default=10, ge=1, le=50)
+
+
 class McpToolCallRequest(BaseModel):
     """Call an MCP tool by name (via in-process Streamable HTTP client)."""
     name: str
@@ -82,13 +93,23 @@ class ChatRequest(BaseModel):
     messages: List[ChatTurn]
 
 
-mcp, mcp_http_app = build_mcp(vector_service)
+mcp, mcp_http_app = build_mcp(get_vector_service)
+
+
+def _log_warmup_failure(task: "asyncio.Task") -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"⚠️  VectorService warm-up failed: {task.exception()}")
 
 
 @asynccontextmanager
 async def app_lifespan(_app: FastAPI):
+    # The shared VectorService is built lazily; warm it up without delaying startup
+    warmup = asyncio.create_task(asyncio.to_thread(get_vector_service))
+    warmup.add_done_callback(_log_warmup_failure)
     async with mcp_lifespan(mcp):
         yield
+    await close_migration()
+    await close_vector_service()
 
 
 app = FastAPI(
@@ -145,8 +166,9 @@ async def upload_pdf(file: UploadFile = File(...)):
         temp_path = temp_file.name
     
     try:
-        # Process PDF using ingestor
-        chunks = process_pdf(temp_path)
+        # Process PDF using ingestor (pages are kept for the extracted-text sidecar)
+        pages = load_pdf_pages(temp_path)
+        chunks = split_pages(pages)
         
         # Prepare data for vector store
         texts: List[str] = []
@@ -158,30 +180,45 @@ async def upload_pdf(file: UploadFile = File(...)):
         for chunk in chunks:
             texts.append(chunk.page_content)
             # Store clean filename in metadata, not temp paths
+            # Loader metadata first: its "source" is the temp path and must not win
             metadatas.append({
+                **chunk.metadata,
                 "source": original_filename,  # Clean filename only
                 "filename": original_filename,  # Redundant but explicit
-                "page": chunk.metadata.get("page", 0),
-                **chunk.metadata
+                "page": chunk.metadata.get("page", 0)
             })
         
-        # Add to vector store
-        vector_service.add_documents(texts=texts, metadatas=metadatas)
+        # Add to vector store (async embed + upsert, does not block other requests) and
+        # record the chunk IDs in the document registry. IDs are content-addressed, so
+        # re-uploading the same file skips embedding and never duplicates chunks
+        document = await ingestion_service.ingest_chunks(
+            original_filename, content, texts, metadatas, chunker_config=CHUNKER_CONFIG
+        )
         
         # Save a copy to uploads directory for reuse
         saved_path = os.path.join(UPLOADS_DIR, original_filename)
         with open(saved_path, 'wb') as f:
             f.write(content)
         logger.info(f"✓ Saved resume to library: {original_filename}")
+        try:
+            # Screening and tailoring read this sidecar instead of parsing the PDF again
+            get_pdf_text_cache().store(content, [page.page_content for page in pages])
+        except Exception as e:
+            logger.warning(f"⚠️  Could not save extracted text for {original_filename}: {e}")
         
         return {
             "status": "success",
             "filename": file.filename,
+            "document_id": document["document_id"],
             "chunks_processed": len(chunks),
+            "chunks_embedded": document["chunks_embedded"],
+            "chunks_skipped": document["chunks_skipped"],
             "saved_to_library": True,
             "message": f"Successfully processed and stored {len(chunks)} chunks. Resume saved to library."
         }
     
+    except DuplicateDocumentError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -194,6 +231,81 @@ async def upload_pdf(file: UploadFile = File(...)):
             os.remove(temp_path)
 
 
+@app.get("/documents")
+async def list_documents():
+    """
+    List ingested documents from the document registry
+    
+    Returns:
+        dict: Document IDs, filenames, content hashes, chunk counts and ingest times
+    """
+    try:
+        documents = await ingestion_service.list_documents()
+        return {
+            "status": "success",
+            "count": len(documents),
+            "documents": documents
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error listing documents: {str(e)}")
+
+
+@app.delete("/documents/{document_id}")
+async def delete_document(document_id: str):
+    """
+    Delete one document's chunks from the vector store
+    
+    Args:
+        document_id: Document ID (see GET /documents)
+    
+    Returns:
+        dict: Number of chunks deleted
+    """
+    try:
+        result = await ingestion_service.delete_document(document_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting document: {str(e)}")
+    if result["status"] == "not_found":
+        raise HTTPException(status_code=404, detail=f"Document '{document_id}' not found")
+    return result
+
+
+@app.post("/documents/{document_id}/reingest")
+async def reingest_document(document_id: str):
+    """
+    Re-embed a document from the chunk text stored in the registry
+    
+    Args:
+        document_id: Document ID (see GET /documents)
+    
+    Returns:
+        dict: Number of chunks re-ingested
+    """
+    try:
+        result = await ingestion_service.reingest_document(document_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error re-ingesting document: {str(e)}")
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Document '{document_id}' not found")
+    return {"status": "success", **result}
+
+
+@app.post("/document_vectors/rebuild")
+async def rebuild_document_vectors():
+    """
+    Backfill the per-document vectors used by two-level candidate search
+    
+    Returns:
+        dict: Documents processed and document vectors written
+    """
+    try:
+        result = await ingestion_service.rebuild_document_vectors()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error rebuilding document vectors: {str(e)}")
+    logger.info(f"✓ Rebuilt {result['document_vectors_written']} document vectors")
+    return {"status": "success", **result}
+
+
 @app.get("/resumes")
 async def list_resumes():
     """
@@ -286,19 +398,24 @@ async def download_resume(filename: str):
 
 
 @app.post("/consult")
-async def consult_policy_endpoint(query: str):
+async def consult_policy_endpoint(query: str, source: str | None = None, mode: str | None = None):
     """
     HTTP endpoint to consult the policy database
     
     Args:
         query: The search query
+        source: Optional filename to restrict the search to one document
+        mode: Search mode: dense, lexical or hybrid (defaults to SEARCH_DEFAULT_MODE)
     
     Returns:
         Search results from the policy database
     """
     try:
-        # Search vector store
-        results = vector_service.search(query=query, k=3)
+        # Search vector store (metadata filter is applied inside the index)
+        search_filter = {"source": source} if source else None
+        results = await get_vector_service().asearch(
+            query=query, k=3, filter=search_filter, mode=mode, mmr=settings.CONTEXT_MMR_ENABLED
+        )
         
         # Format output
         if not results:
@@ -326,6 +443,8 @@ async def consult_policy_endpoint(query: str):
             "results": formatted_results
         }
     
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -333,6 +452,83 @@ async def consult_policy_endpoint(query: str):
         )
 
 
+@app.post("/search_batch")
+async def search_batch_endpoint(request: BatchSearchRequest):
+    """
+    Run many queries against the vector store in one call
+    
+    All uncached queries share one embeddings request and the index lookups
+    run concurrently.
+    
+    Args:
+        request: BatchSearchRequest with the queries and k
+    
+    Returns:
+        Per-query results and timing
+    """
+    try:
+        started = time.perf_counter()
+        results = await get_vector_service().asearch_batch(request.queries, k=request.k)
+        total_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"✓ Batch search: {len(results)} queries in {total_ms:.1f}ms")
+        
+        return {
+            "status": "success",
+            "count": len(results),
+            "total_ms": round(total_ms, 2),
+            "results": results
+        }
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error running batch search: {str(e)}"
+        )
+
+
+@app.post("/search_grouped")
+async def search_grouped_endpoint(
+    query: str,
+    n: int = 10,
+    group_by: str = "source",
+    aggregate: str | None = None,
+    mode: str | None = None,
+    two_level: bool | None = None
+):
+    """
+    Search returning one entry per document instead of per chunk
+    
+    Args:
+        query: The search query
+        n: Number of distinct documents to return
+        group_by: Metadata key identifying a document (default: source file)
+        aggregate: "max" (best chunk) or "sum" (top chunks summed); defaults to GROUP_AGGREGATE
+        mode: Search mode: dense, lexical or hybrid
+        two_level: Pick documents by their pooled vectors first (defaults to DOCUMENT_VECTORS_ENABLED)
+    
+    Returns:
+        Grouped results with aggregated score and best snippets
+    """
+    try:
+        results = await get_vector_service().asearch_grouped(
+            query=query, n=n, group_by=group_by, aggregate=aggregate, mode=mode, two_level=two_level
+        )
+        return {
+            "status": "success",
+            "query": query,
+            "count": len(results),
+            "results": results
+        }
+    
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error running grouped search: {str(e)}"
+        )
+
+
 @app.post("/screen_candidate")
 async def screen_candidate_endpoint(
     job_description: str = Form(...),
@@ -365,10 +561,10 @@ async def screen_candidate_endpoint(
         resume_text = extract_text_from_pdf(resume_path)
         logger.info(f"✓ Screening resume: {resume_filename}")
         
-        # Check if OpenAI API key is available
-        api_key = os.getenv("OPENAI_API_KEY")
+        # Chat model for the configured provider (None = no OpenAI key)
+        llm = get_chat_model(temperature=0.3)
         
-        if not api_key or api_key == "your_openai_api_key_here":
+        if llm is None:
             # Return demo response if no API key
             return {
                 "status": "success",
@@ -379,17 +575,10 @@ async def screen_candidate_endpoint(
                 "resume_filename": resume_filename
             }
         
-        # Use ChatOpenAI to analyze
-        from langchain_openai import ChatOpenAI
+        # Use the chat model to analyze
         from langchain_core.messages import HumanMessage, SystemMessage
         import json
         
-        llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
-            temperature=0.3,
-            api_key=api_key
-        )
-        
         # Create structured prompt for ATS analysis
         system_prompt = """You are an expert ATS (Applicant Tracking System) and recruitment specialist. 
 Your task is to analyze a candidate's resume against a job description and provide a structured assessment.
@@ -434,7 +623,7 @@ Remember: Respond with ONLY the JSON object, no other text."""
             HumanMessage(content=user_prompt)
         ]
         
-        response = llm.invoke(messages)
+        response = await llm.ainvoke(messages)
         
         # Parse JSON response
         try:
@@ -535,7 +724,8 @@ async def tailor_resume(
                 temp_file.write(content)
                 temp_path = temp_file.name
             
-            resume_text = extract_text_from_pdf(temp_path)
+            # One-off upload: parse directly instead of caching a temp path
+            resume_text = extract_text_from_pdf(temp_path, cached=False)
             filename = resume_file.filename
             logger.info(f"✓ Using uploaded resume: {resume_file.filename}")
         
@@ -625,12 +815,15 @@ async def generate_pdf(request: GeneratePDFRequest):
 
 
 @app.post("/search_candidates")
-async def search_candidates(job_description: str = Form(...)):
+async def search_candidates(job_description: str = Form(...), mode: str | None = Form(None)):
     """
     Search and rank candidates using RAG + AI reranking
     
     Args:
         job_description: The job description to search for matching candidates
+        mode: Retrieval mode (dense, lexical or hybrid); defaults to hybrid when the
+            BM25 index is enabled, so exact keywords such as framework names and
+            certifications count
     
     Returns:
         JSON list of top 7 ranked candidates with scores and reasoning
@@ -640,8 +833,9 @@ async def search_candidates(job_description: str = Form(...)):
         from dotenv import load_dotenv
         load_dotenv()
         
-        # Step 1: Search vector store for top 10 matches
-        results = vector_service.search(query=job_description, k=10)
+        # Step 1: Search vector store for the top 10 distinct resumes (chunk hits grouped per file)
+        mode = mode or ("hybrid" if settings.LEXICAL_INDEX_ENABLED else "dense")
+        results = await get_vector_service().asearch_grouped(query=job_description, n=10, mode=mode)
         
         if not results:
             return {
@@ -651,7 +845,7 @@ async def search_candidates(job_description: str = Form(...)):
                 "message": "No candidates found in the database. Please upload resumes first."
             }
         
-        logger.info(f"✓ Found {len(results)} initial candidates from vector search")
+        logger.info(f"✓ Found {len(results)} distinct candidates from grouped vector search")
         
         # Step 2: Prepare candidate data for AI reranking
         candidates_text = []
@@ -679,10 +873,10 @@ Resume Content:
         
         combined_candidates = "\n".join(candidates_text)
         
-        # Step 3: Check OpenAI API key
-        api_key = os.getenv("OPENAI_API_KEY")
+        # Step 3: Chat model for the configured provider (None = no OpenAI key)
+        llm = get_chat_model(temperature=0.3)
         
-        if not api_key or api_key == "your_openai_api_key_here":
+        if llm is None:
             # Return demo response if no API key
             demo_candidates = []
             for i, result in enumerate(results[:7], 1):
@@ -712,16 +906,9 @@ Resume Content:
             }
         
         # Step 4: Use AI to rerank candidates
-        from langchain_openai import ChatOpenAI
         from langchain_core.messages import HumanMessage, SystemMessage
         import json
         
-        llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
-            temperature=0.3,
-            api_key=api_key
-        )
-        
         # Create reranking prompt
         system_prompt = """You are a Senior Technical Recruiter and ATS expert. 
 Your task is to evaluate candidates and select the top 7 best matches for the job.
@@ -785,7 +972,7 @@ Return ONLY the JSON array with no additional text."""
             HumanMessage(content=user_prompt)
         ]
         
-        response = llm.invoke(messages)
+        response = await llm.ainvoke(messages)
         
         # Parse JSON response
         try:
@@ -895,7 +1082,7 @@ async def api_agent_chat(body: ChatRequest):
     """
     if mcp is None:
         raise HTTPException(status_code=503, detail="MCP not configured")
-    if not settings.OPENAI_API_KEY:
+    if not settings.OPENAI_API_KEY and settings.CHAT_PROVIDER.lower() == "openai":
         raise HTTPException(
             status_code=503,
             detail="OPENAI_API_KEY not configured — required for /api/chat",
@@ -940,9 +1127,15 @@ async def root():
         "endpoints": {
             "upload": "POST /upload - Upload PDF files and save to library",
             "resumes": "GET /resumes - List all saved resumes in library",
+            "documents": "GET /documents - List ingested documents (registry)",
+            "delete_document": "DELETE /documents/{document_id} - Delete one document's chunks",
+            "reingest_document": "POST /documents/{document_id}/reingest - Re-embed a document from the registry",
+            "rebuild_document_vectors": "POST /document_vectors/rebuild - Backfill per-resume vectors for two-level search",
             "download_resume": "GET /resumes/{filename} - Download a specific resume PDF",
             "search_candidates": "POST /search_candidates - Search and rank top candidates for a job",
             "consult": "POST /consult?query=your_question - Query the policy database",
+            "search_batch": "POST /search_batch - Run many queries in one call (per-query results + timing)",
+            "search_grouped": "POST /search_grouped?query=... - Top distinct documents with aggregated chunk scores",
             "screen_candidate": "POST /screen_candidate?job_description=... - Screen candidate against job description",
             "tailor_resume": "POST /tailor_resume - Tailor resume (use saved or upload new, returns preview text)",
             "generate_pdf": "POST /generate_pdf - Generate PDF from tailored text",
@@ -950,6 +1143,13 @@ async def root():
             "mcp_call": "POST /api/mcp/call - Call an MCP tool via client",
             "chat": "POST /api/chat - Web agent (OpenAI + MCP tools)",
             "docs": "GET /docs - Interactive API documentation",
+            "snapshot_export": "POST /snapshot/export?name=latest - Export vectors + chunks to a snapshot",
+            "snapshot_import": "POST /snapshot/import?name=latest - Restore a snapshot (no re-embedding)",
+            "embedding_migration_start": "POST /embedding_migration/start?model=...&dimension=... - Dual-write + backfill a new embedding model",
+            "embedding_migration": "GET /embedding_migration - Backfill progress and shadow-read overlap/latency",
+            "embedding_migration_cutover": "POST /embedding_migration/cutover - Switch reads to the new index",
+            "embedding_migration_abort": "POST /embedding_migration/abort - Stop dual-writing and backfilling",
+            "stats": "GET /stats - Vector store statistics (cached, with staleness)",
             "health": "GET /health - Health check"
         },
         "mcp_tools": "consult_policy_db, screen_candidate, get_screener_instructions" if mcp else "MCP not configured",
@@ -957,6 +1157,127 @@ async def root():
     }
 
 
+def _snapshot_directory(name: str) -> str:
+    """Snapshot directory for ``name`` inside SNAPSHOT_DIR (no path components allowed)"""
+    if not name or name in (".", "..") or os.path.basename(name) != name:
+        raise HTTPException(status_code=400, detail=f"Invalid snapshot name '{name}'")
+    return os.path.join(settings.SNAPSHOT_DIR, name)
+
+
+@app.post("/snapshot/export")
+async def export_snapshot(name: str = "latest"):
+    """
+    Export the vector index, chunk text and document registry to a snapshot
+    
+    Args:
+        name: Snapshot name (directory under SNAPSHOT_DIR)
+    
+    Returns:
+        dict: Snapshot manifest and export time
+    """
+    directory = _snapshot_directory(name)
+    try:
+        manifest = await asyncio.to_thread(get_vector_service().export_snapshot, directory)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error exporting snapshot: {str(e)}")
+    return {"status": "success", "path": directory, **manifest}
+
+
+@app.post("/snapshot/import")
+async def import_snapshot(name: str = "latest"):
+    """
+    Load a snapshot into the vector store without re-embedding anything
+    
+    Args:
+        name: Snapshot name (directory under SNAPSHOT_DIR)
+    
+    Returns:
+        dict: Chunks and documents restored, zero-copy flag and import time
+    """
+    directory = _snapshot_directory(name)
+    try:
+        result = await asyncio.to_thread(get_vector_service().import_snapshot, directory)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error importing snapshot: {str(e)}")
+    logger.info(f"✓ Imported snapshot '{name}': {result['chunks']} chunks in {result['seconds']:.2f}s")
+    return {"status": "success", "path": directory, **result}
+
+
+@app.post("/embedding_migration/start")
+async def embedding_migration_start(model: str = None, dimension: int = None, index_name: str = None):
+    """
+    Start migrating to another embedding model without downtime
+    
+    Args:
+        model: New embedding model (default MIGRATION_EMBEDDING_MODEL)
+        dimension: New vector dimension (default MIGRATION_EMBEDDING_DIMENSION)
+        index_name: Pinecone index for the new vectors (default MIGRATION_INDEX_NAME / derived)
+    
+    Returns:
+        dict: Migration status
+    """
+    try:
+        migration = await start_migration(embedding_model=model, dimension=dimension, index_name=index_name)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting embedding migration: {str(e)}")
+    return migration.status()
+
+
+@app.get("/embedding_migration")
+async def embedding_migration_status():
+    """Backfill progress, dual-write errors and shadow-read overlap/latency"""
+    migration = get_migration()
+    if migration is None:
+        raise HTTPException(status_code=404, detail="No embedding migration has been started")
+    return migration.status()
+
+
+@app.post("/embedding_migration/cutover")
+async def embedding_migration_cutover(force: bool = False):
+    """
+    Switch reads and writes to the new index
+    
+    Args:
+        force: Cut over before the backfill has finished
+    
+    Returns:
+        dict: Migration status (``restart_settings`` must be persisted before the next restart)
+    """
+    migration = get_migration()
+    if migration is None:
+        raise HTTPException(status_code=404, detail="No embedding migration has been started")
+    try:
+        return migration.cutover(force=force)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.post("/embedding_migration/abort")
+async def embedding_migration_abort():
+    """Stop dual-writing and backfilling (the live index is unaffected)"""
+    migration = get_migration()
+    if migration is None:
+        raise HTTPException(status_code=404, detail="No embedding migration has been started")
+    return migration.abort()
+
+
+@app.get("/stats")
+async def stats(refresh: bool = False):
+    """Vector store statistics (served from memory; refresh=true forces a backend fetch)"""
+    try:
+        if refresh:
+            return await asyncio.to_thread(get_vector_service().get_stats, True)
+        return get_vector_service().get_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading stats: {str(e)}")
+
+
 @app.get("/health")
 async def health():
     """Health check endpoint"""
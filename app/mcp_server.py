@@ -1,24 +1,31 @@
 """
 FastMCP setup: tool registration and Streamable HTTP ASGI app.
 
-``main`` calls ``build_mcp(vector_service)`` and mounts the returned app at ``/mcp``.
+``main`` calls ``build_mcp(get_vector_service)`` and mounts the returned app at ``/mcp``.
 """
 
 from __future__ import annotations
 
 import logging
 from contextlib import asynccontextmanager
-from typing import Any, AsyncIterator
+from typing import Any, AsyncIterator, Callable
 
+from app.core.config import settings
 from app.services.vector_store import VectorService
 
 logger = logging.getLogger(__name__)
 
 
-def _screen_candidate_logic(job_description: str, vector_service: VectorService) -> str:
+async def _screen_candidate_logic(
+    job_description: str,
+    vector_service: VectorService,
+    resume_filename: str | None = None,
+) -> str:
     """Build resume context + task text for screening (shared MCP tool implementation)."""
     try:
-        results = vector_service.search(query=job_description, k=10)
+        # Scope retrieval to one resume inside the index instead of over-fetching
+        search_filter = {"source": resume_filename} if resume_filename else None
+        results = await vector_service.asearch(query=job_description, k=10, filter=search_filter)
         if not results:
             return "No resume information found in the database. Please upload a resume first."
 
@@ -39,9 +46,12 @@ TASK: Compare the resume parts above against this Job Description:
         return f"Error screening candidate: {str(e)}"
 
 
-def build_mcp(vector_service: VectorService) -> tuple[Any | None, Any | None]:
+def build_mcp(vector_service: Callable[[], VectorService]) -> tuple[Any | None, Any | None]:
     """
-    Create FastMCP with tools bound to ``vector_service``.
+    Create FastMCP with tools bound to the service returned by ``vector_service``.
+
+    The provider is called per tool invocation, so building the MCP app does
+    not construct the (lazily initialized) VectorService.
 
     Returns:
         ``(mcp, mcp_http_app)`` where either may be ``None`` if MCP is not installed.
@@ -52,10 +62,13 @@ def build_mcp(vector_service: VectorService) -> tuple[Any | None, Any | None]:
         mcp = FastMCP("AgentPolicy", streamable_http_path="/")
 
         @mcp.tool()
-        def consult_policy_db(query: str) -> str:
-            """Consult the policy database using semantic search."""
+        async def consult_policy_db(query: str, source: str | None = None) -> str:
+            """Consult the policy database using semantic search (optionally within one source file)."""
             try:
-                results = vector_service.search(query=query, k=3)
+                search_filter = {"source": source} if source else None
+                results = await vector_service().asearch(
+                    query=query, k=3, filter=search_filter, mmr=settings.CONTEXT_MMR_ENABLED
+                )
                 if not results:
                     return "No relevant policy information found."
                 formatted_output = f"Found {len(results)} relevant policy documents:\n\n"
@@ -70,9 +83,9 @@ def build_mcp(vector_service: VectorService) -> tuple[Any | None, Any | None]:
                 return f"Error querying policy database: {str(e)}"
 
         @mcp.tool()
-        def screen_candidate(job_description: str) -> str:
+        async def screen_candidate(job_description: str, resume_filename: str | None = None) -> str:
             """Screen a candidate by comparing their resume against a job description."""
-            return _screen_candidate_logic(job_description, vector_service)
+            return await _screen_candidate_logic(job_description, vector_service(), resume_filename)
 
         @mcp.tool()
         def get_screener_instructions() -> str:
@@ -12,6 +12,7 @@ from typing import Any
 
 from app.core.config import settings
 from app.services.mcp_client import call_mcp_tool, call_tool_result_to_text
+from app.services.providers import get_tool_chat_client
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +31,11 @@ TOOL_DEFINITIONS_OPENAI: list[dict[str, Any]] = [
                     "query": {
                         "type": "string",
                         "description": "Natural-language search query for relevant policy or document chunks.",
-                    }
+                    },
+                    "source": {
+                        "type": "string",
+                        "description": "Optional filename to restrict the search to one uploaded document.",
+                    },
                 },
                 "required": ["query"],
             },
@@ -51,7 +56,11 @@ TOOL_DEFINITIONS_OPENAI: list[dict[str, Any]] = [
                     "job_description": {
                         "type": "string",
                         "description": "Full job description text to compare against the stored resume.",
-                    }
+                    },
+                    "resume_filename": {
+                        "type": "string",
+                        "description": "Optional resume filename (e.g. 'Jane_Doe.pdf') to screen only that candidate.",
+                    },
                 },
                 "required": ["job_description"],
             },
@@ -93,13 +102,12 @@ async def run_agent_chat(
     """
     Run one user-visible turn: ``conversation`` is prior chat (user/assistant only, string content).
     Returns the assistant's final reply text.
+    The chat client follows CHAT_PROVIDER (``scripted`` runs offline).
     """
-    from openai import AsyncOpenAI
-
-    if not settings.OPENAI_API_KEY:
+    client = get_tool_chat_client()
+    if client is None:
         raise RuntimeError("OPENAI_API_KEY is not configured")
 
-    client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
     model = _chat_model()
 
     messages: list[dict[str, Any]] = [
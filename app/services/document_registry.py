@@ -0,0 +1,249 @@
+"""
+SQLite document registry: uploaded file -> chunk IDs, content hash and ingest time
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterator
+
+from app.core.config import settings
+
+
+def content_hash(content: bytes) -> str:
+    """SHA-256 hex digest of a file's bytes"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def document_id_for(file_hash: str, chunker_config: Dict[str, Any]) -> str:
+    """
+    Deterministic document ID from the file content hash and the chunker settings
+
+    The same bytes chunked the same way always get the same ID, so re-ingesting
+    a file overwrites its vectors instead of duplicating them.
+    """
+    config = json.dumps(chunker_config, sort_keys=True)
+    return hashlib.sha256(f"{file_hash}\0{config}".encode("utf-8")).hexdigest()[:32]
+
+
+def chunk_ids_for(document_id: str, count: int) -> List[str]:
+    """Chunk IDs ``<document_id>-<chunk index>`` for a document with ``count`` chunks"""
+    return [f"{document_id}-{index}" for index in range(count)]
+
+
+class DocumentRegistry:
+    """
+    Manifest of every ingested document and the vector IDs of its chunks
+
+    Listing, deleting and re-ingesting a document touch only that document's
+    rows, never the vector index. Chunk text and metadata are kept too, so a
+    document can be re-embedded without the original file.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the registry
+
+        Args:
+            db_path: Path of the SQLite database file
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " document_id TEXT PRIMARY KEY,"
+            " filename TEXT NOT NULL,"
+            " content_hash TEXT NOT NULL,"
+            " chunk_count INTEGER NOT NULL,"
+            " ingested_at TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            " chunk_id TEXT PRIMARY KEY,"
+            " document_id TEXT NOT NULL REFERENCES documents(document_id) ON DELETE CASCADE,"
+            " chunk_index INTEGER NOT NULL,"
+            " text TEXT NOT NULL,"
+            " metadata TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS documents_filename ON documents(filename)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS documents_hash ON documents(content_hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS chunks_document ON chunks(document_id, chunk_index)")
+        self._conn.commit()
+
+    def register(
+        self,
+        document_id: str,
+        filename: str,
+        content_hash: str,
+        chunk_ids: List[str],
+        texts: List[str],
+        metadatas: List[dict],
+        ingested_at: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Record a document and its chunks (replaces any previous entry for ``document_id``)
+
+        Args:
+            document_id: Document ID
+            filename: Original file name
+            content_hash: SHA-256 of the file bytes
+            chunk_ids: Vector IDs of the chunks, in chunk order
+            texts: Chunk texts
+            metadatas: Chunk metadata dictionaries
+
+        Returns:
+            The stored document row
+        """
+        ingested_at = ingested_at or datetime.utcnow().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM documents WHERE document_id = ?", (document_id,))
+            self._conn.execute(
+                "INSERT INTO documents (document_id, filename, content_hash, chunk_count, ingested_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (document_id, filename, content_hash, len(chunk_ids), ingested_at)
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunks (chunk_id, document_id, chunk_index, text, metadata)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (chunk_id, document_id, i, text, json.dumps(metadata, default=str))
+                    for i, (chunk_id, text, metadata) in enumerate(zip(chunk_ids, texts, metadatas))
+                ]
+            )
+        return {
+            "document_id": document_id,
+            "filename": filename,
+            "content_hash": content_hash,
+            "chunk_count": len(chunk_ids),
+            "ingested_at": ingested_at,
+        }
+
+    @staticmethod
+    def _document(row) -> Dict[str, Any]:
+        document_id, filename, digest, chunk_count, ingested_at = row
+        return {
+            "document_id": document_id,
+            "filename": filename,
+            "content_hash": digest,
+            "chunk_count": chunk_count,
+            "ingested_at": ingested_at,
+        }
+
+    def get(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Document row for ``document_id`` or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT document_id, filename, content_hash, chunk_count, ingested_at"
+                " FROM documents WHERE document_id = ?",
+                (document_id,)
+            ).fetchone()
+        return self._document(row) if row else None
+
+    def find(self, filename: Optional[str] = None, content_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Documents matching a file name and/or content hash"""
+        clauses, params = [], []
+        if filename is not None:
+            clauses.append("filename = ?")
+            params.append(filename)
+        if content_hash is not None:
+            clauses.append("content_hash = ?")
+            params.append(content_hash)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT document_id, filename, content_hash, chunk_count, ingested_at"
+                f" FROM documents{where} ORDER BY ingested_at",
+                params
+            ).fetchall()
+        return [self._document(row) for row in rows]
+
+    def list_documents(self) -> List[Dict[str, Any]]:
+        """Every registered document, oldest first"""
+        return self.find()
+
+    def chunk_ids(self, document_id: str) -> List[str]:
+        """Vector IDs of a document's chunks, in chunk order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id FROM chunks WHERE document_id = ? ORDER BY chunk_index",
+                (document_id,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def chunks(self, document_id: str) -> List[Dict[str, Any]]:
+        """A document's chunks as ``{"id", "text", "metadata"}``, in chunk order"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id, text, metadata FROM chunks WHERE document_id = ? ORDER BY chunk_index",
+                (document_id,)
+            ).fetchall()
+        return [{"id": cid, "text": text, "metadata": json.loads(meta)} for cid, text, meta in rows]
+
+    def stored_chunks(self, chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Registered ``{"text", "metadata"}`` for whichever of ``chunk_ids`` are known"""
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for start in range(0, len(chunk_ids), 500):
+                batch = chunk_ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT chunk_id, text, metadata FROM chunks WHERE chunk_id IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for cid, text, meta in rows:
+                    found[cid] = {"text": text, "metadata": json.loads(meta)}
+        return found
+
+    def iter_chunks(self, batch_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        """Every registered chunk in batches (used to rebuild indexes from the registry)"""
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT chunk_id, text, metadata FROM chunks WHERE chunk_id > ? ORDER BY chunk_id LIMIT ?",
+                    (last, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [{"id": cid, "text": text, "metadata": json.loads(meta)} for cid, text, meta in rows]
+
+    def remove(self, document_id: str) -> List[str]:
+        """
+        Drop a document and its chunk rows
+
+        Returns:
+            The chunk IDs that belonged to the document (to delete from the index)
+        """
+        chunk_ids = self.chunk_ids(document_id)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM documents WHERE document_id = ?", (document_id,))
+        return chunk_ids
+
+    def stats(self) -> Dict[str, Any]:
+        """Document and chunk counts"""
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            chunks = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        return {"path": self.db_path, "documents": documents, "chunks": chunks}
+
+
+_shared_registry: Optional[DocumentRegistry] = None
+_shared_lock = threading.Lock()
+
+
+def get_document_registry() -> DocumentRegistry:
+    """Return the process-wide DocumentRegistry, opening it on first use"""
+    global _shared_registry
+    if _shared_registry is None:
+        with _shared_lock:
+            if _shared_registry is None:
+                _shared_registry = DocumentRegistry(settings.DOCUMENT_REGISTRY_PATH)
+    return _shared_registry
@@ -0,0 +1,302 @@
+"""
+Content-hash embedding cache (in-memory LRU + size-bounded SQLite disk tier)
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different copies share a cache entry"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def cache_key(text: str, model_name: str) -> str:
+    """Cache key: SHA-256 of the model name plus the normalized text"""
+    digest = hashlib.sha256()
+    digest.update(model_name.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class _DiskTier:
+    """SQLite-backed vector store evicting least recently used rows past ``max_bytes``"""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, "embeddings.sqlite3"),
+            check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings(last_access)"
+        )
+        self._conn.commit()
+        row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings").fetchone()
+        self.items, self.total_bytes = int(row[0]), int(row[1])
+        self.evictions = 0
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Fetch cached vectors for ``keys`` and refresh their access time"""
+        if not keys:
+            return {}
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, entries: Dict[str, List[float]]) -> None:
+        """Store vectors, then evict the oldest rows if the tier is over budget"""
+        if not entries:
+            return
+        now = time.time()
+        with self._lock:
+            for key, vector in entries.items():
+                blob = np.asarray(vector, dtype=np.float32).tobytes()
+                previous = self._conn.execute(
+                    "SELECT size FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, blob, len(blob), now)
+                )
+                if previous:
+                    self.total_bytes -= previous[0]
+                else:
+                    self.items += 1
+                self.total_bytes += len(blob)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop least recently used rows until usage is at 90% of ``max_bytes``"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute(
+            "SELECT key, size FROM embeddings ORDER BY last_access ASC"
+        )
+        doomed = []
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            doomed.append((key,))
+            self.total_bytes -= size
+            self.items -= 1
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+        self.evictions += len(doomed)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps a LangChain ``Embeddings`` so each distinct (model, normalized text)
+    pair is embedded once; repeats are served from memory or disk
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_name: str,
+        cache_dir: Optional[str] = None,
+        memory_items: int = 10000,
+        disk_max_bytes: int = 512 * 1024 * 1024
+    ):
+        """
+        Initialize the cache
+
+        Args:
+            embeddings: Underlying embedder (e.g. ``OpenAIEmbeddings``)
+            model_name: Embedding model name (part of every cache key)
+            cache_dir: Directory for the disk tier (``None`` disables it)
+            memory_items: Maximum vectors kept in the in-memory LRU
+            disk_max_bytes: Size budget of the disk tier
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.memory_items = memory_items
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = _DiskTier(cache_dir, disk_max_bytes) if cache_dir else None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, vector: List[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Resolve as many keys as possible from the memory and disk tiers"""
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory and key not in found:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing and self._disk is not None:
+            from_disk = self._disk.get_many(missing)
+            with self._lock:
+                for key, vector in from_disk.items():
+                    self._remember(key, vector)
+            found.update(from_disk)
+        return found
+
+    def _store(self, entries: Dict[str, List[float]]) -> None:
+        with self._lock:
+            for key, vector in entries.items():
+                self._remember(key, vector)
+        if self._disk is not None:
+            self._disk.put_many(entries)
+
+    def _count(self, memory_hits: int, disk_hits: int, misses: int) -> None:
+        with self._lock:
+            self.memory_hits += memory_hits
+            self.disk_hits += disk_hits
+            self.misses += misses
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed ``texts``, calling the underlying model only for cache misses"""
+        keys = [cache_key(text, self.model_name) for text in texts]
+        with self._lock:
+            in_memory = sum(1 for key in keys if key in self._memory)
+        found = self._lookup(keys)
+        on_disk = sum(1 for key in keys if key in found) - in_memory
+
+        pending: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in pending:
+                pending[key] = text
+        if pending:
+            vectors = self.embeddings.embed_documents(list(pending.values()))
+            fresh = dict(zip(pending.keys(), vectors))
+            self._store(fresh)
+            found.update(fresh)
+
+        self._count(in_memory, on_disk, len(pending))
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query, served from cache when possible"""
+        key = cache_key(text, self.model_name)
+        with self._lock:
+            in_memory = int(key in self._memory)
+        found = self._lookup([key])
+        if key in found:
+            self._count(in_memory, 1 - in_memory, 0)
+            return found[key]
+
+        vector = self.embeddings.embed_query(text)
+        self._store({key: vector})
+        self._count(0, 0, 1)
+        return vector
+
+    async def _alookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """``_lookup`` without blocking the event loop on disk reads"""
+        if self._disk is None:
+            return self._lookup(keys)
+        return await asyncio.to_thread(self._lookup, keys)
+
+    async def _astore(self, entries: Dict[str, List[float]]) -> None:
+        """``_store`` without blocking the event loop on disk writes"""
+        if self._disk is None:
+            self._store(entries)
+        else:
+            await asyncio.to_thread(self._store, entries)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Async ``embed_documents`` using the underlying model's async client"""
+        keys = [cache_key(text, self.model_name) for text in texts]
+        with self._lock:
+            in_memory = sum(1 for key in keys if key in self._memory)
+        found = await self._alookup(keys)
+        on_disk = sum(1 for key in keys if key in found) - in_memory
+
+        pending: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in pending:
+                pending[key] = text
+        if pending:
+            vectors = await self.embeddings.aembed_documents(list(pending.values()))
+            fresh = dict(zip(pending.keys(), vectors))
+            await self._astore(fresh)
+            found.update(fresh)
+
+        self._count(in_memory, on_disk, len(pending))
+        return [found[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async ``embed_query`` served from cache when possible"""
+        key = cache_key(text, self.model_name)
+        with self._lock:
+            in_memory = int(key in self._memory)
+        found = await self._alookup([key])
+        if key in found:
+            self._count(in_memory, 1 - in_memory, 0)
+            return found[key]
+
+        vector = await self.embeddings.aembed_query(text)
+        await self._astore({key: vector})
+        self._count(0, 0, 1)
+        return vector
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier sizes"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        stats = {
+            "model": self.model_name,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_items": len(self._memory),
+        }
+        if self._disk is not None:
+            stats.update({
+                "disk_items": self._disk.items,
+                "disk_bytes": self._disk.total_bytes,
+                "disk_max_bytes": self._disk.max_bytes,
+                "disk_evictions": self._disk.evictions,
+            })
+        return stats
@@ -0,0 +1,424 @@
+"""
+Online embedding-model migration: dual-write, throttled backfill, shadow reads, cutover
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.document_registry import get_document_registry
+from app.services.vector_store import VectorService, get_vector_service, swap_vector_service
+
+# Shadow comparisons kept for latency percentiles
+SHADOW_WINDOW = 500
+# Seconds between repair passes (and auto-cutover checks) once the backfill is done
+REPAIR_INTERVAL_SECONDS = 5.0
+
+
+def target_index_name(base: str, model: str, dimension: int) -> str:
+    """Pinecone index name for the migration target (lowercase letters, digits and dashes)"""
+    slug = re.sub(r"[^a-z0-9]+", "-", model.lower()).strip("-")
+    return f"{base}-{slug}-{dimension}"[:45].rstrip("-")
+
+
+class EmbeddingMigration:
+    """
+    Move the library to a new embedding model without downtime
+
+    While the migration runs, the live (source) service forwards every write
+    and delete to a second (target) service built for the new model, so new
+    uploads land in both indexes. A background task re-embeds the documents
+    that already exist from the chunk text in the document registry, limited
+    to ``chunks_per_second``. Once the backfill has finished, a sample of
+    live queries is replayed against the target (earlier the target is
+    missing documents, which would skew the comparison), and their top-k
+    overlap and latency are recorded. ``cutover`` then makes the target the
+    shared service; the old index is left untouched.
+    """
+
+    def __init__(
+        self,
+        source: VectorService,
+        target: VectorService,
+        chunks_per_second: float = 50.0,
+        shadow_sample_rate: float = 0.1
+    ):
+        """
+        Initialize a migration (call ``start`` to begin)
+
+        Args:
+            source: Service currently answering requests (old model)
+            target: Service for the new model
+            chunks_per_second: Backfill throttle (0 = unthrottled)
+            shadow_sample_rate: Fraction of uncached live searches replayed on the target
+        """
+        self.source = source
+        self.target = target
+        self.chunks_per_second = chunks_per_second
+        self.shadow_sample_rate = shadow_sample_rate
+        self.phase = "backfilling"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self.documents_total = 0
+        self.documents_done = 0
+        self.documents_skipped = 0
+        self.chunks_backfilled = 0
+        self.write_errors = 0
+        # Forwarded writes that failed are repaired in the background before cutover:
+        # documents are backfilled again, chunk / document vectors deleted again
+        self._dirty: set = set()
+        self._orphan_chunks: set = set()
+        self._orphan_documents: set = set()
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._shadow_tasks: set = set()
+        self._lock = threading.Lock()
+        self.shadow_queries = 0
+        self.shadow_errors = 0
+        self._overlap_sum = 0.0
+        self._source_ms: Deque[float] = deque(maxlen=SHADOW_WINDOW)
+        self._target_ms: Deque[float] = deque(maxlen=SHADOW_WINDOW)
+
+    def start(self) -> None:
+        """Start dual-writing and launch the backfill task (call from the event loop)"""
+        self.started_at = time.time()
+        self.source.migration = self
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(self._backfill())
+        print(f"🔁 Embedding migration started: {self.source.embedding_model} -> {self.target.embedding_model}")
+
+    # Dual-write
+
+    def _note_failure(self, method: str, args: tuple, error: Exception) -> None:
+        with self._lock:
+            self.write_errors += 1
+            if method in ("delete", "adelete"):
+                self._orphan_chunks.update(args[0])
+            elif method == "adelete_document_vectors":
+                self._orphan_documents.update(args[0])
+            elif method == "aupsert_document_vector":
+                self._dirty.add(args[0])
+            else:
+                # add_documents / aadd_documents: (texts, metadatas, ids)
+                self._dirty.update(metadata["document_id"] for metadata in args[1] if metadata.get("document_id"))
+        print(f"⚠️  Migration: forwarding {method} to the new index failed: {error}")
+
+    def pending_repairs(self) -> int:
+        return len(self._dirty) + len(self._orphan_chunks) + len(self._orphan_documents)
+
+    def forward(self, method: str, *args: Any) -> None:
+        """Apply a source write to the target (sync callers); failures never fail the live write"""
+        if self.phase not in ("backfilling", "ready"):
+            return
+        try:
+            getattr(self.target, method)(*args)
+        except Exception as e:
+            self._note_failure(method, args, e)
+
+    async def aforward(self, method: str, *args: Any) -> None:
+        """Async variant of ``forward``"""
+        if self.phase not in ("backfilling", "ready"):
+            return
+        try:
+            await getattr(self.target, method)(*args)
+        except Exception as e:
+            self._note_failure(method, args, e)
+
+    # Backfill
+
+    async def _throttle(self, chunks: int, started: float) -> None:
+        """Sleep so the backfill stays at or below ``chunks_per_second``"""
+        if self.chunks_per_second > 0:
+            remaining = chunks / self.chunks_per_second - (time.perf_counter() - started)
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+
+    async def _backfill_document(self, document: Dict[str, Any], force: bool = False) -> None:
+        """Re-embed one document into the target (``force`` rewrites it even if present)"""
+        registry = get_document_registry()
+        document_id = document["document_id"]
+        chunks = registry.chunks(document_id)
+        if not chunks:
+            return
+        ids = [chunk["id"] for chunk in chunks]
+        started = time.perf_counter()
+        if not force and len(await self.target.aexisting_ids(ids)) == len(ids):
+            # Already written by dual-write (or an earlier run)
+            self.documents_skipped += 1
+        else:
+            texts = [chunk["text"] for chunk in chunks]
+            await self.target.aadd_documents(texts=texts, metadatas=[chunk["metadata"] for chunk in chunks], ids=ids)
+            await self.target.aupsert_document_vector(
+                document_id, ids, texts, {"source": document["filename"], "chunk_count": len(ids)}
+            )
+            self.chunks_backfilled += len(ids)
+            if registry.get(document_id) is None:
+                # Deleted while we were copying it: the forwarded delete ran first, so undo our write
+                await self.target.adelete(ids)
+                await self.target.adelete_document_vectors([document_id])
+            await self._throttle(len(ids), started)
+
+    async def _backfill(self) -> None:
+        """Re-embed every registered document into the target, then any that failed to dual-write"""
+        registry = get_document_registry()
+        try:
+            documents = registry.list_documents()
+            self.documents_total = len(documents)
+            for document in documents:
+                if self.phase != "backfilling":
+                    return
+                await self._backfill_document(document)
+                self.documents_done += 1
+            await self._repair()
+            if self.phase != "backfilling":
+                return
+            self.phase = "ready"
+            self.finished_at = time.time()
+            print(
+                f"✓ Embedding migration backfill done: {self.documents_done} documents, "
+                f"{self.chunks_backfilled} chunks re-embedded"
+            )
+            # Keep repairing late dual-write failures until cutover (or abort)
+            while self.phase == "ready":
+                await self._repair()
+                if settings.MIGRATION_AUTO_CUTOVER and self._cutover_due():
+                    self.cutover()
+                    return
+                await asyncio.sleep(REPAIR_INTERVAL_SECONDS)
+        except Exception as e:
+            self.error = str(e)
+            print(f"❌ Embedding migration backfill failed: {e}")
+
+    async def _repair(self) -> None:
+        """Retry forwarded writes that failed (a failure re-queues the item on the next pass)"""
+        registry = get_document_registry()
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            orphan_chunks, self._orphan_chunks = self._orphan_chunks, set()
+            orphan_documents, self._orphan_documents = self._orphan_documents, set()
+        try:
+            if orphan_chunks:
+                await self.target.adelete(list(orphan_chunks))
+            if orphan_documents:
+                await self.target.adelete_document_vectors(list(orphan_documents))
+            for document_id in dirty:
+                document = registry.get(document_id)
+                if document is not None:
+                    await self._backfill_document(document, force=True)
+        except Exception as e:
+            with self._lock:
+                self._dirty |= dirty
+                self._orphan_chunks |= orphan_chunks
+                self._orphan_documents |= orphan_documents
+            print(f"⚠️  Migration repair pass failed (will retry): {e}")
+
+    def _cutover_due(self) -> bool:
+        """Auto-cutover rule: enough shadow reads, agreeing well enough, nothing left to repair"""
+        return (
+            self.shadow_queries >= settings.MIGRATION_CUTOVER_MIN_SHADOW_QUERIES
+            and self.mean_overlap() >= settings.MIGRATION_CUTOVER_MIN_OVERLAP
+            and self.pending_repairs() == 0
+        )
+
+    # Shadow reads
+
+    def shadow(
+        self,
+        query: str,
+        k: int,
+        filter: Optional[Dict[str, Any]],
+        mode: str,
+        mmr: bool,
+        fetch_k: Optional[int],
+        lambda_mult: Optional[float],
+        results: List[Dict[str, Any]],
+        source_ms: float
+    ) -> None:
+        """
+        Replay a sample of live searches on the target in the background (after the backfill)
+
+        Called from the event loop (async searches) or from any thread (sync
+        ``search`` / ``search_batch``, MCP tools); sync callers' replays are
+        scheduled on the loop the migration was started from.
+        """
+        if self.phase != "ready" or random.random() >= self.shadow_sample_rate:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None and (self._loop is None or not self._loop.is_running()):
+            return
+        coroutine = self._shadow(query, k, filter, mode, mmr, fetch_k, lambda_mult, results, source_ms)
+        if loop is not None:
+            task = loop.create_task(coroutine)
+        else:
+            task = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        self._shadow_tasks.add(task)
+        task.add_done_callback(self._shadow_tasks.discard)
+
+    async def _shadow(self, query, k, filter, mode, mmr, fetch_k, lambda_mult, results, source_ms) -> None:
+        started = time.perf_counter()
+        try:
+            shadow_results = await self.target.asearch(
+                query, k=k, filter=filter, mode=mode, mmr=mmr, fetch_k=fetch_k, lambda_mult=lambda_mult
+            )
+        except Exception as e:
+            self.shadow_errors += 1
+            print(f"⚠️  Migration shadow query failed: {e}")
+            return
+        target_ms = (time.perf_counter() - started) * 1000
+        live_ids = {result["id"] for result in results}
+        shadow_ids = {result["id"] for result in shadow_results}
+        overlap = len(live_ids & shadow_ids) / len(live_ids) if live_ids else float(not shadow_ids)
+        with self._lock:
+            self.shadow_queries += 1
+            self._overlap_sum += overlap
+            self._source_ms.append(source_ms)
+            self._target_ms.append(target_ms)
+
+    def mean_overlap(self) -> float:
+        """Mean top-k overlap of shadowed queries (1.0 = identical result sets)"""
+        return self._overlap_sum / self.shadow_queries if self.shadow_queries else 0.0
+
+    # Cutover
+
+    def cutover(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Make the target the shared service (new requests use the new index immediately)
+
+        Args:
+            force: Cut over even if the backfill has not finished
+
+        Returns:
+            Migration status
+        """
+        if self.phase == "cutover":
+            return self.status()
+        if self.phase != "ready" and not force:
+            raise ValueError(f"Migration is '{self.phase}'; the backfill must finish before cutover")
+        if self.pending_repairs() and not force:
+            raise ValueError(f"{self.pending_repairs()} failed dual-writes are still being repaired")
+        self.phase = "cutover"
+        self.source.migration = None
+        swap_vector_service(self.target)
+        print(
+            f"✓ Embedding migration cut over to {self.target.embedding_model}. "
+            f"Set EMBEDDING_MODEL={self.target.model} and EMBEDDING_DIMENSION={self.target.dimension}"
+            + (f" and PINECONE_INDEX_NAME={self.target.index_name}" if self.target.backend == "pinecone" else "")
+            + " before the next restart"
+        )
+        return self.status()
+
+    def abort(self) -> Dict[str, Any]:
+        """Stop dual-writing and the backfill (the target index is left as is)"""
+        if self.phase != "cutover":
+            self.phase = "aborted"
+            self.source.migration = None
+            if self._task is not None:
+                self._task.cancel()
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        """Progress, dual-write health and shadow-read comparison"""
+        def percentile(values: Deque[float], q: float) -> Optional[float]:
+            return float(sorted(values)[int(q * (len(values) - 1))]) if values else None
+
+        restart_settings = {"EMBEDDING_MODEL": self.target.model, "EMBEDDING_DIMENSION": self.target.dimension}
+        if self.target.backend == "pinecone":
+            restart_settings["PINECONE_INDEX_NAME"] = self.target.index_name
+        return {
+            "phase": self.phase,
+            "source_model": self.source.embedding_model,
+            "target_model": self.target.embedding_model,
+            "target_dimension": self.target.dimension,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "backfill": {
+                "documents_total": self.documents_total,
+                "documents_done": self.documents_done,
+                "documents_already_present": self.documents_skipped,
+                "chunks_reembedded": self.chunks_backfilled,
+                "chunks_per_second_limit": self.chunks_per_second,
+            },
+            "dual_write_errors": self.write_errors,
+            "pending_repairs": self.pending_repairs(),
+            "shadow": {
+                "queries": self.shadow_queries,
+                "errors": self.shadow_errors,
+                "mean_overlap": self.mean_overlap(),
+                "source_p50_ms": percentile(self._source_ms, 0.5),
+                "source_p95_ms": percentile(self._source_ms, 0.95),
+                "target_p50_ms": percentile(self._target_ms, 0.5),
+                "target_p95_ms": percentile(self._target_ms, 0.95),
+            },
+            # Persist these (e.g. in .env) so a restart after cutover keeps using the new index
+            "restart_settings": restart_settings,
+        }
+
+
+_migration: Optional[EmbeddingMigration] = None
+
+
+def get_migration() -> Optional[EmbeddingMigration]:
+    """The current (or last) migration in this process"""
+    return _migration
+
+
+async def start_migration(
+    embedding_model: Optional[str] = None,
+    dimension: Optional[int] = None,
+    index_name: Optional[str] = None
+) -> EmbeddingMigration:
+    """
+    Build a service for the new model and start migrating to it
+
+    Args:
+        embedding_model: New model (default MIGRATION_EMBEDDING_MODEL)
+        dimension: New dimension (default MIGRATION_EMBEDDING_DIMENSION)
+        index_name: Pinecone index for the new vectors (default
+            MIGRATION_INDEX_NAME, else derived from the model and dimension)
+
+    Returns:
+        The running migration
+    """
+    global _migration
+    if _migration is not None and _migration.phase in ("backfilling", "ready"):
+        raise ValueError("An embedding migration is already running")
+    source = get_vector_service()
+    model = embedding_model or settings.MIGRATION_EMBEDDING_MODEL or source.model
+    dimension = dimension or settings.MIGRATION_EMBEDDING_DIMENSION or source.dimension
+    if model == source.model and dimension == source.dimension:
+        raise ValueError(f"The service already uses {model} ({dimension}d)")
+    if source.backend == "pinecone":
+        index_name = index_name or settings.MIGRATION_INDEX_NAME or target_index_name(
+            source.index_name, model, dimension
+        )
+        if index_name == source.index_name:
+            raise ValueError("The new model needs its own Pinecone index")
+    # Building the service (client, index check) blocks, so keep it off the event loop
+    target = await asyncio.to_thread(
+        VectorService, embedding_model=model, dimension=dimension, index_name=index_name, restore_snapshot=False
+    )
+    _migration = EmbeddingMigration(
+        source,
+        target,
+        chunks_per_second=settings.MIGRATION_BACKFILL_CHUNKS_PER_SECOND,
+        shadow_sample_rate=settings.MIGRATION_SHADOW_SAMPLE_RATE
+    )
+    _migration.start()
+    return _migration
+
+
+async def close_migration() -> None:
+    """Stop an unfinished migration and close its target service (application shutdown)"""
+    if _migration is not None and _migration.phase != "cutover":
+        _migration.abort()
+        await _migration.target.aclose()
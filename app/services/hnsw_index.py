@@ -0,0 +1,319 @@
+"""
+Approximate nearest neighbour index (HNSW-style navigable small-world graph) in pure Python/NumPy
+"""
+
+import heapq
+import math
+import random
+import time
+from typing import List, Dict, Any, Tuple, Optional
+
+import numpy as np
+
+from app.services.local_index import NumpyVectorIndex
+
+
+class HNSWIndex(NumpyVectorIndex):
+    """
+    Hierarchical navigable small-world graph over the NumPy vector matrix
+
+    Vectors and payloads are stored by ``NumpyVectorIndex``; this class adds a
+    layered proximity graph that is extended incrementally on every ``add``, so
+    search cost grows roughly logarithmically with the number of chunks.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        M: int = 16,
+        ef_construction: int = 100,
+        ef_search: int = 50,
+        seed: int = 42,
+        initial_capacity: int = 1024,
+        storage: str = "float32",
+        rescore: bool = True,
+        rescore_factor: int = 4,
+        full_precision_path: Optional[str] = None,
+        coarse_dimension: Optional[int] = None,
+        coarse_factor: int = 10
+    ):
+        """
+        Initialize an empty graph index
+
+        Args:
+            dimension: Dimension of the stored vectors
+            M: Maximum neighbours per node on upper layers (2*M on layer 0)
+            ef_construction: Candidate list size used while inserting
+            ef_search: Default candidate list size used while searching
+            seed: Seed for the level generator (keeps builds reproducible)
+            initial_capacity: Number of rows to preallocate
+            storage: Vector precision ("float32", "float16" or "int8"); the
+                graph is built and walked on the stored precision
+            rescore: Re-score the ``ef_search`` candidates with float32 vectors
+            rescore_factor: Shortlist multiplier for filtered (exact) searches
+            full_precision_path: Memory-mapped file for the float32 copies
+            coarse_dimension: Prefix dimension for two-stage exact scans
+                (filtered searches); the graph always uses full vectors
+            coarse_factor: Shortlist multiplier for the coarse stage
+        """
+        super().__init__(
+            dimension,
+            initial_capacity,
+            storage=storage,
+            rescore=rescore,
+            rescore_factor=rescore_factor,
+            full_precision_path=full_precision_path,
+            coarse_dimension=coarse_dimension,
+            coarse_factor=coarse_factor
+        )
+        self.M = M
+        self.max_m0 = 2 * M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._level_mult = 1 / math.log(max(M, 2))
+        self._rng = random.Random(seed)
+        # _graph[row][level] -> neighbour rows of ``row`` on ``level``
+        self._graph: List[List[List[int]]] = []
+        self._entry_point: Optional[int] = None
+        self._max_level = -1
+
+    def add(
+        self,
+        ids: List[str],
+        vectors: List[List[float]],
+        texts: List[str],
+        metadatas: List[dict]
+    ) -> List[int]:
+        """Append vectors and link each new row into the graph (no rebuild)"""
+        with self._lock:
+            rows = super().add(ids, vectors, texts, metadatas)
+            for row in rows:
+                self._insert(row)
+            return rows
+
+    def search(
+        self,
+        query_vector: List[float],
+        k: int,
+        mask: Optional[np.ndarray] = None,
+        ef_search: Optional[int] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Approximate top-``k`` search by greedy descent plus a layer-0 beam search
+
+        Filtered searches (``mask`` given) score only the selected rows exactly:
+        metadata filters such as a single resume select few rows, and a graph
+        walk would mostly visit rows the filter rejects.
+
+        Args:
+            query_vector: Query embedding
+            k: Number of neighbours to return
+            mask: Optional boolean row bitmap (see ``filter_mask``)
+            ef_search: Beam width override (defaults to ``self.ef_search``)
+
+        Returns:
+            List of ``(row, cosine_similarity)`` ordered best first
+        """
+        if mask is not None:
+            return super().search(query_vector, k, mask=mask)
+        if self._entry_point is None or k <= 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+        query = self._normalize(query)[0]
+        ef = max(ef_search or self.ef_search, k)
+
+        entry = [self._entry_point]
+        for level in range(self._max_level, 0, -1):
+            entry = [self._search_layer(query, entry, 1, level)[0][1]]
+        found = self._search_layer(query, entry, ef, 0)
+        if self._deleted_count:
+            # Deleted nodes still route the walk but are never returned
+            found = [(score, row) for score, row in found if not self._deleted[row]]
+        if self._full is not None:
+            return self._rescore(query, [row for _, row in found], k)
+        return [(row, score) for score, row in found[:k]]
+
+    def search_many(
+        self,
+        query_vectors: List[List[float]],
+        k: int,
+        mask: Optional[np.ndarray] = None,
+        ef_search: Optional[int] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """Graph search for each query (traversals are independent per query)"""
+        if mask is not None:
+            return super().search_many(query_vectors, k, mask=mask)
+        return [self.search(query, k, ef_search=ef_search) for query in query_vectors]
+
+    def exact_search(self, query_vector: List[float], k: int) -> List[Tuple[int, float]]:
+        """Brute-force search over the full matrix (ground truth for recall)"""
+        return super().search(query_vector, k)
+
+    def evaluate_recall(
+        self,
+        queries: Optional[List[List[float]]] = None,
+        k: int = 10,
+        sample: int = 100,
+        ef_search: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Measure recall@k and latency of graph search against exact search
+
+        Args:
+            queries: Query vectors (defaults to a random sample of stored vectors)
+            k: Number of neighbours compared per query
+            sample: Number of stored vectors to use when ``queries`` is omitted
+            ef_search: Beam width to evaluate (defaults to ``self.ef_search``)
+
+        Returns:
+            Dictionary with recall, per-query latency percentiles and speedup
+        """
+        if queries is None:
+            live = np.flatnonzero(~self._deleted[:self._size]).tolist()
+            if not live:
+                return {"queries": 0, "size": 0}
+            rows = self._rng.sample(live, min(sample, len(live)))
+            queries = self.get_vectors(rows)
+
+        hits = 0
+        expected = 0
+        graph_ms: List[float] = []
+        exact_ms: List[float] = []
+        for query in queries:
+            start = time.perf_counter()
+            approx = self.search(query, k, ef_search=ef_search)
+            graph_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            exact = self.exact_search(query, k)
+            exact_ms.append((time.perf_counter() - start) * 1000)
+
+            truth = {row for row, _ in exact}
+            hits += len(truth.intersection(row for row, _ in approx))
+            expected += len(truth)
+
+        graph_mean = float(np.mean(graph_ms))
+        exact_mean = float(np.mean(exact_ms))
+        return {
+            "queries": len(graph_ms),
+            "size": len(self),
+            "k": k,
+            "ef_search": ef_search or self.ef_search,
+            "M": self.M,
+            "recall": hits / expected if expected else 1.0,
+            "hnsw_latency_ms": {
+                "mean": graph_mean,
+                "p50": float(np.percentile(graph_ms, 50)),
+                "p95": float(np.percentile(graph_ms, 95)),
+            },
+            "exact_latency_ms": {
+                "mean": exact_mean,
+                "p50": float(np.percentile(exact_ms, 50)),
+                "p95": float(np.percentile(exact_ms, 95)),
+            },
+            "speedup": exact_mean / graph_mean if graph_mean else None,
+        }
+
+    def _similarities(self, query: np.ndarray, rows: List[int]) -> np.ndarray:
+        """Cosine similarity between ``query`` and the given rows (stored precision)"""
+        return self._scan_scores(query[None, :], np.asarray(rows, dtype=np.int64))[0]
+
+    def _random_level(self) -> int:
+        return int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+
+    def _search_layer(
+        self,
+        query: np.ndarray,
+        entry_points: List[int],
+        ef: int,
+        level: int
+    ) -> List[Tuple[float, int]]:
+        """Beam search on one layer; returns ``(similarity, row)`` best first"""
+        visited = set(entry_points)
+        scores = self._similarities(query, entry_points)
+        candidates = [(-float(s), row) for s, row in zip(scores, entry_points)]
+        heapq.heapify(candidates)
+        results = [(float(s), row) for s, row in zip(scores, entry_points)]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            neg_score, current = heapq.heappop(candidates)
+            if len(results) >= ef and -neg_score < results[0][0]:
+                break
+            neighbours = [n for n in self._graph[current][level] if n not in visited]
+            if not neighbours:
+                continue
+            visited.update(neighbours)
+            for score, row in zip(self._similarities(query, neighbours).tolist(), neighbours):
+                if len(results) < ef or score > results[0][0]:
+                    heapq.heappush(candidates, (-score, row))
+                    heapq.heappush(results, (score, row))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted(results, reverse=True)
+
+    def _select_neighbours(
+        self,
+        candidates: List[Tuple[float, int]],
+        m: int
+    ) -> List[Tuple[float, int]]:
+        """
+        Neighbour selection heuristic: prefer candidates that are closer to the
+        base node than to any neighbour already chosen, then top up by score
+        """
+        selected: List[Tuple[float, int]] = []
+        pruned: List[Tuple[float, int]] = []
+        for score, row in candidates:
+            if len(selected) >= m:
+                break
+            if selected:
+                chosen = [r for _, r in selected]
+                if float(np.max(self._similarities(self._row(row), chosen))) >= score:
+                    pruned.append((score, row))
+                    continue
+            selected.append((score, row))
+        for item in pruned:
+            if len(selected) >= m:
+                break
+            selected.append(item)
+        return selected
+
+    def _insert(self, row: int) -> None:
+        """Link ``row`` into the graph"""
+        level = self._random_level()
+        self._graph.append([[] for _ in range(level + 1)])
+
+        if self._entry_point is None:
+            self._entry_point = row
+            self._max_level = level
+            return
+
+        query = self._row(row)
+        entry = [self._entry_point]
+        for lvl in range(self._max_level, level, -1):
+            entry = [self._search_layer(query, entry, 1, lvl)[0][1]]
+
+        for lvl in range(min(level, self._max_level), -1, -1):
+            candidates = self._search_layer(query, entry, self.ef_construction, lvl)
+            neighbours = self._select_neighbours(candidates, self.M)
+            self._graph[row][lvl] = [r for _, r in neighbours]
+
+            m_max = self.max_m0 if lvl == 0 else self.M
+            for _, neighbour in neighbours:
+                links = self._graph[neighbour][lvl]
+                links.append(row)
+                if len(links) > m_max:
+                    scores = self._similarities(self._row(neighbour), links).tolist()
+                    ranked = sorted(zip(scores, links), reverse=True)
+                    self._graph[neighbour][lvl] = [
+                        r for _, r in self._select_neighbours(ranked, m_max)
+                    ]
+            entry = [r for _, r in candidates]
+
+        if level > self._max_level:
+            self._entry_point = row
+            self._max_level = level
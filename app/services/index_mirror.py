@@ -0,0 +1,212 @@
+"""
+Hot local mirror of Pinecone vectors: write-through, LRU by document, scope-aware
+"""
+
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
+from app.services.local_index import NumpyVectorIndex
+from app.services.metadata_filter import field_conditions
+
+# Metadata fields whose values identify whole documents
+SCOPE_FIELDS = ("document_id", "source")
+
+
+class IndexMirror:
+    """
+    In-process copy of part (or all) of a remote index
+
+    Every write to Pinecone is also applied here, and documents that keep
+    getting hit remotely can be promoted in. Documents are evicted least
+    recently used first once ``max_vectors`` is exceeded. A query can be
+    answered locally when the mirror is ``complete`` (holds every vector) or
+    when its filter restricts it to documents the mirror holds in full, e.g.
+    ``{"source": "resume.pdf"}`` or ``{"document_id": {"$in": [...]}}``.
+
+    "In full" means every chunk ID the document registry lists for the
+    document is mirrored, so a document still being written (or promoted)
+    batch by batch is not served partially. A ``source`` is resolved to its
+    registered documents, and only while ``sources_registered`` is set, i.e.
+    the registry accounts for every remote vector (no legacy vectors
+    without a ``document_id``).
+    """
+
+    def __init__(self, dimension: int, max_vectors: int = 20000, registry=None):
+        """
+        Initialize an empty mirror
+
+        Args:
+            dimension: Vector dimension
+            max_vectors: Live vectors kept before least recently used documents are evicted
+            registry: DocumentRegistry giving each document's chunk IDs (None = only
+                a ``complete`` mirror answers queries)
+        """
+        self.dimension = dimension
+        self.max_vectors = max_vectors
+        self.registry = registry
+        self.complete = False
+        self.sources_registered = False
+        self.index = NumpyVectorIndex(dimension)
+        self._documents: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.local_queries = 0
+        self.remote_queries = 0
+        self.fallbacks = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def add(self, ids: List[str], vectors, texts: List[str], metadatas: List[dict]) -> None:
+        """Write-through of an upsert (evicts cold documents when over capacity)"""
+        with self._lock:
+            self.index.add(ids=ids, vectors=vectors, texts=texts, metadatas=metadatas)
+            for chunk_id, metadata in zip(ids, metadatas):
+                document_id = metadata.get("document_id")
+                if not document_id:
+                    continue
+                document = self._documents.get(document_id)
+                if document is None:
+                    document = self._documents[document_id] = {"chunk_ids": set(), "expected": None}
+                document["chunk_ids"].add(chunk_id)
+                self._documents.move_to_end(document_id)
+            self._evict()
+
+    def delete(self, ids: List[str]) -> None:
+        """Write-through of a delete"""
+        with self._lock:
+            self.index.delete(ids)
+            removed = set(ids)
+            for document_id in [d for d, doc in self._documents.items() if doc["chunk_ids"] & removed]:
+                document = self._documents[document_id]
+                document["chunk_ids"] -= removed
+                if not document["chunk_ids"]:
+                    del self._documents[document_id]
+            self._compact()
+
+    def clear(self) -> None:
+        """Drop everything (e.g. after the remote namespace was wiped)"""
+        with self._lock:
+            self.index = NumpyVectorIndex(self.dimension)
+            self._documents.clear()
+
+    def holds_document(self, document_id: str) -> bool:
+        """True if every registered chunk of the document is mirrored"""
+        with self._lock:
+            document = self._documents.get(document_id)
+            if document is None:
+                return False
+            if document["expected"] is None:
+                # Documents are registered after all their chunks are written: no IDs yet = not complete
+                chunk_ids = self.registry.chunk_ids(document_id) if self.registry is not None else []
+                if not chunk_ids:
+                    return False
+                document["expected"] = set(chunk_ids)
+            return document["expected"] <= document["chunk_ids"]
+
+    def touch(self, document_ids: List[str]) -> None:
+        """Mark documents as recently used"""
+        with self._lock:
+            for document_id in document_ids:
+                if document_id in self._documents:
+                    self._documents.move_to_end(document_id)
+
+    def _evict(self) -> None:
+        """Drop least recently used documents until the mirror fits (caller holds the lock)"""
+        while len(self.index) > self.max_vectors and len(self._documents) > 1:
+            document_id, document = next(iter(self._documents.items()))
+            self.index.delete(list(document["chunk_ids"]))
+            del self._documents[document_id]
+            self.complete = False
+            self.evictions += 1
+        self._compact()
+
+    def _compact(self) -> None:
+        """Rebuild the matrix once tombstones outnumber live rows (caller holds the lock)"""
+        if self.index.deleted_count() <= max(len(self.index), 1024):
+            return
+        rows = self.index.live_rows()
+        compacted = NumpyVectorIndex(self.dimension, initial_capacity=max(len(rows), 1))
+        if len(rows):
+            records = [self.index.get(int(row)) for row in rows]
+            compacted.add(
+                ids=[record["id"] for record in records],
+                vectors=self.index.get_vectors(rows),
+                texts=[record["text"] for record in records],
+                metadatas=[record["metadata"] for record in records]
+            )
+        self.index = compacted
+
+    def covers(self, filter: Optional[Dict[str, Any]]) -> bool:
+        """True if every vector a query with ``filter`` could match is mirrored"""
+        if self.complete:
+            return True
+        if not filter or self.registry is None:
+            return False
+        with self._lock:
+            return self._scope_covered(filter)
+
+    def _scope_covered(self, filter: Dict[str, Any]) -> bool:
+        for field, condition in filter.items():
+            if field == "$and":
+                # A conjunction is covered as soon as one clause narrows it to mirrored documents
+                if any(self._scope_covered(clause) for clause in condition):
+                    return True
+            elif field in SCOPE_FIELDS:
+                conditions = field_conditions(condition)
+                values = [conditions["$eq"]] if "$eq" in conditions else conditions.get("$in")
+                if values is not None and all(self._holds(field, value) for value in values):
+                    return True
+        return False
+
+    def _holds(self, field: str, value: Any) -> bool:
+        if field == "document_id":
+            return self.holds_document(value)
+        if not self.sources_registered:
+            return False
+        documents = self.registry.find(filename=value)
+        return bool(documents) and all(self.holds_document(document["document_id"]) for document in documents)
+
+    def search(
+        self,
+        query_vector: List[float],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        include_values: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Top-k results formatted like ``VectorService`` search results"""
+        with self._lock:
+            index = self.index
+            hits = index.search(query_vector, k, mask=index.filter_mask(filter))
+            records = [index.get(row) for row, _ in hits]
+            values = index.get_vectors([row for row, _ in hits]) if include_values and hits else None
+            self.touch([record["metadata"].get("document_id") for record in records])
+        results = []
+        for i, ((_, score), record) in enumerate(zip(hits, records)):
+            result = {
+                "id": record["id"],
+                "text": record["text"],
+                "metadata": record["metadata"],
+                "distance": 1 - score,
+                "score": score
+            }
+            if values is not None:
+                result["values"] = values[i]
+            results.append(result)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Size, coverage and routing counters"""
+        return {
+            "vectors": len(self.index),
+            "documents": len(self._documents),
+            "max_vectors": self.max_vectors,
+            "complete": self.complete,
+            "sources_registered": self.sources_registered,
+            "local_queries": self.local_queries,
+            "remote_queries": self.remote_queries,
+            "fallbacks": self.fallbacks,
+            "evictions": self.evictions,
+            "memory_bytes": self.index.memory_bytes(),
+        }
@@ -0,0 +1,138 @@
+"""
+Index statistics kept in memory: incremental counts plus periodic backend refreshes
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Returns {"total_vectors": int, "namespaces": {name: count}, ...} from the backend
+RefreshFn = Callable[[], Dict[str, Any]]
+
+
+class IndexStatsTracker:
+    """
+    Serve vector counts without a backend round trip per request
+
+    Writes and deletes adjust the counts as they happen; a daemon thread
+    replaces them with authoritative backend figures every
+    ``refresh_interval`` seconds. Snapshots report when the last refresh
+    happened so callers can judge staleness.
+
+    The incremental deltas are estimates: an upsert is counted as new
+    vectors and a delete as removed ones, so overwriting existing IDs or
+    deleting missing ones skews the counts until the next refresh
+    (``counts_estimated`` is set meanwhile).
+    """
+
+    def __init__(self, refresh_fn: Optional[RefreshFn] = None, refresh_interval: float = 60.0):
+        """
+        Initialize the tracker
+
+        Args:
+            refresh_fn: Fetches authoritative stats from the backend (None = counts
+                are maintained incrementally only)
+            refresh_interval: Seconds between background refreshes
+        """
+        self.refresh_fn = refresh_fn
+        self.refresh_interval = refresh_interval
+        self.total_vectors = 0
+        self.namespaces: Dict[str, int] = {}
+        # Key the backend reports the default namespace under ("" or "__default__")
+        self.default_namespace = ""
+        self.extra: Dict[str, Any] = {}
+        self.refreshed_at: Optional[float] = None
+        self.updated_at: Optional[float] = None
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.last_error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record_add(self, count: int, namespace: Optional[str] = None) -> None:
+        """Account for ``count`` vectors written (``None`` = default namespace)"""
+        self._adjust(count, namespace)
+
+    def record_delete(self, count: int, namespace: Optional[str] = None) -> None:
+        """Account for ``count`` vectors deleted (``None`` = default namespace)"""
+        self._adjust(-count, namespace)
+
+    def _adjust(self, delta: int, namespace: Optional[str]) -> None:
+        with self._lock:
+            if namespace is None:
+                namespace = self.default_namespace
+            self.total_vectors = max(0, self.total_vectors + delta)
+            self.namespaces[namespace] = max(0, self.namespaces.get(namespace, 0) + delta)
+            self.updated_at = time.time()
+
+    def refresh(self) -> bool:
+        """
+        Replace the counts with backend figures
+
+        Returns:
+            True if the refresh succeeded
+        """
+        if self.refresh_fn is None:
+            return False
+        try:
+            stats = self.refresh_fn()
+        except Exception as e:
+            with self._lock:
+                self.refresh_errors += 1
+                self.last_error = str(e)
+            logger.warning(f"⚠️  Index stats refresh failed: {e}")
+            return False
+
+        now = time.time()
+        with self._lock:
+            self.total_vectors = int(stats.get("total_vectors", 0))
+            self.namespaces = dict(stats.get("namespaces", {}))
+            if "" not in self.namespaces and "__default__" in self.namespaces:
+                self.default_namespace = "__default__"
+            self.extra = {
+                key: value for key, value in stats.items()
+                if key not in ("total_vectors", "namespaces")
+            }
+            self.refreshed_at = now
+            self.updated_at = now
+            self.refreshes += 1
+            self.last_error = None
+        return True
+
+    def start(self) -> None:
+        """Refresh now, then keep refreshing in a daemon thread"""
+        if self.refresh_fn is None or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="index-stats-refresh", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        self.refresh()
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def stop(self) -> None:
+        """Stop the background refresh thread"""
+        self._stop.set()
+        self._thread = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current counts with their age (``None`` ages mean never refreshed)"""
+        now = time.time()
+        with self._lock:
+            return {
+                "total_vectors": self.total_vectors,
+                "namespaces": dict(self.namespaces),
+                **self.extra,
+                "stats_refreshed_at": self.refreshed_at,
+                "stats_age_seconds": now - self.refreshed_at if self.refreshed_at else None,
+                "stats_updated_at": self.updated_at,
+                "counts_estimated": self.updated_at != self.refreshed_at,
+                "stats_refresh_interval": self.refresh_interval,
+                "stats_refresh_errors": self.refresh_errors,
+                "stats_last_error": self.last_error,
+            }
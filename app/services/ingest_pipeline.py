@@ -0,0 +1,221 @@
+"""
+Pipelined batch embedding + upsert for document ingestion
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Awaitable, Callable, List, Dict, Any, Deque, Optional, Tuple
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EmbedFn = Callable[[List[str]], List[List[float]]]
+UpsertFn = Callable[[List[str], List[List[float]], List[str], List[dict]], Any]
+AsyncEmbedFn = Callable[[List[str]], Awaitable[List[List[float]]]]
+AsyncUpsertFn = Callable[[List[str], List[List[float]], List[str], List[dict]], Awaitable[Any]]
+
+
+class EmbeddingUpsertPipeline:
+    """
+    Split chunks into token-aware batches and overlap embedding with upserting
+
+    Batch N+1 is embedded while batch N is being upserted. At most
+    ``max_concurrency`` embedding requests and ``max_concurrency`` upserts are
+    in flight; when upserts fall behind, no further batches are embedded
+    (backpressure). Each embed/upsert call is retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        embed_fn: EmbedFn,
+        upsert_fn: UpsertFn,
+        max_batch_tokens: int = 20000,
+        max_batch_size: int = 96,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        aembed_fn: Optional[AsyncEmbedFn] = None,
+        aupsert_fn: Optional[AsyncUpsertFn] = None
+    ):
+        """
+        Initialize the pipeline
+
+        Args:
+            embed_fn: Embeds a list of texts (e.g. ``Embeddings.embed_documents``)
+            upsert_fn: Writes ``(ids, vectors, texts, metadatas)`` to the index
+            max_batch_tokens: Token budget per embedding request
+            max_batch_size: Maximum chunks per batch
+            max_concurrency: Maximum in-flight embedding (and upsert) calls
+            max_retries: Retries per batch before the ingest fails
+            retry_backoff: Base delay in seconds (doubles each retry)
+            aembed_fn: Async embedder used by ``arun``
+            aupsert_fn: Async index writer used by ``arun``
+        """
+        self.embed_fn = embed_fn
+        self.upsert_fn = upsert_fn
+        self.aembed_fn = aembed_fn
+        self.aupsert_fn = aupsert_fn
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._encoding = tiktoken.get_encoding("cl100k_base") if TIKTOKEN_AVAILABLE else None
+
+    def count_tokens(self, text: str) -> int:
+        """Token count (tiktoken when installed, ~4 characters per token otherwise)"""
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return len(text) // 4 + 1
+
+    def make_batches(self, texts: List[str]) -> List[Tuple[int, int]]:
+        """
+        Group consecutive texts into batches under the token and size budgets
+
+        Returns:
+            List of ``(start, end)`` slices into ``texts``
+        """
+        batches: List[Tuple[int, int]] = []
+        start = 0
+        tokens = 0
+        for i, text in enumerate(texts):
+            cost = self.count_tokens(text)
+            full = i - start >= self.max_batch_size or tokens + cost > self.max_batch_tokens
+            if full and i > start:
+                batches.append((start, i))
+                start, tokens = i, 0
+            tokens += cost
+        if start < len(texts):
+            batches.append((start, len(texts)))
+        return batches
+
+    def _with_retry(self, description: str, fn: Callable, *args: Any) -> Any:
+        """Call ``fn`` retrying failures with exponential backoff and jitter"""
+        attempt = 0
+        while True:
+            try:
+                return fn(*args)
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.retry_backoff * (2 ** attempt) * (0.5 + random.random())
+                attempt += 1
+                logger.warning(
+                    f"⚠️  {description} failed ({e}); retry {attempt}/{self.max_retries} in {delay:.1f}s"
+                )
+                time.sleep(delay)
+
+    async def _awith_retry(self, description: str, fn: Callable, *args: Any) -> Any:
+        """Async variant of ``_with_retry`` (sleeps without blocking the event loop)"""
+        attempt = 0
+        while True:
+            try:
+                return await fn(*args)
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.retry_backoff * (2 ** attempt) * (0.5 + random.random())
+                attempt += 1
+                logger.warning(
+                    f"⚠️  {description} failed ({e}); retry {attempt}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+    def run(self, ids: List[str], texts: List[str], metadatas: List[dict]) -> Dict[str, Any]:
+        """
+        Embed and upsert all chunks
+
+        Returns:
+            Dictionary with chunk/batch counts and elapsed seconds
+        """
+        started = time.perf_counter()
+        batches = self.make_batches(texts)
+        pending_batches = iter(batches)
+        embedding: Deque[Tuple[Tuple[int, int], Future]] = deque()
+        upserting: Deque[Future] = deque()
+
+        embed_pool = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix="embed")
+        upsert_pool = ThreadPoolExecutor(self.max_concurrency, thread_name_prefix="upsert")
+
+        def submit_next_embedding() -> None:
+            batch = next(pending_batches, None)
+            if batch is not None:
+                start, end = batch
+                embedding.append((batch, embed_pool.submit(
+                    self._with_retry, f"Embedding batch {start}:{end}", self.embed_fn, texts[start:end]
+                )))
+
+        try:
+            for _ in range(self.max_concurrency):
+                submit_next_embedding()
+
+            while embedding:
+                (start, end), future = embedding.popleft()
+                vectors = future.result()
+                # Backpressure: wait for an upsert slot before taking on more work
+                while len(upserting) >= self.max_concurrency:
+                    upserting.popleft().result()
+                upserting.append(upsert_pool.submit(
+                    self._with_retry, f"Upsert batch {start}:{end}", self.upsert_fn,
+                    ids[start:end], vectors, texts[start:end], metadatas[start:end]
+                ))
+                submit_next_embedding()
+
+            while upserting:
+                upserting.popleft().result()
+        finally:
+            embed_pool.shutdown(wait=True, cancel_futures=True)
+            upsert_pool.shutdown(wait=True, cancel_futures=True)
+
+        return {
+            "chunks": len(texts),
+            "batches": len(batches),
+            "seconds": time.perf_counter() - started,
+        }
+
+    async def arun(self, ids: List[str], texts: List[str], metadatas: List[dict]) -> Dict[str, Any]:
+        """
+        Async variant of ``run`` using ``aembed_fn``/``aupsert_fn``
+
+        The same limits apply: ``max_concurrency`` embeds and upserts in flight,
+        and no more than ``2 * max_concurrency`` batches held in memory.
+        """
+        if self.aembed_fn is None or self.aupsert_fn is None:
+            raise ValueError("arun requires aembed_fn and aupsert_fn")
+
+        started = time.perf_counter()
+        batches = self.make_batches(texts)
+        in_flight = asyncio.Semaphore(2 * self.max_concurrency)
+        embed_slots = asyncio.Semaphore(self.max_concurrency)
+        upsert_slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def process(start: int, end: int) -> None:
+            async with in_flight:
+                async with embed_slots:
+                    vectors = await self._awith_retry(
+                        f"Embedding batch {start}:{end}", self.aembed_fn, texts[start:end]
+                    )
+                async with upsert_slots:
+                    await self._awith_retry(
+                        f"Upsert batch {start}:{end}", self.aupsert_fn,
+                        ids[start:end], vectors, texts[start:end], metadatas[start:end]
+                    )
+
+        async with asyncio.TaskGroup() as group:
+            for start, end in batches:
+                group.create_task(process(start, end))
+
+        return {
+            "chunks": len(texts),
+            "batches": len(batches),
+            "seconds": time.perf_counter() - started,
+        }
@@ -2,24 +2,52 @@
 Document ingestion service
 """
 
-import uuid
-from typing import List, Dict, Any
-from datetime import datetime
+import json
+from typing import List, Dict, Any, Optional
 from io import BytesIO
 from pypdf import PdfReader
-from app.services.vector_store import VectorService
+from app.services.vector_store import VectorService, get_vector_service
+from app.services.document_registry import (
+    DocumentRegistry,
+    chunk_ids_for,
+    content_hash,
+    document_id_for,
+    get_document_registry,
+)
 from app.core.config import settings
 
 
+class DuplicateDocumentError(ValueError):
+    """Raised when a file's content is already stored under another filename"""
+
+
 class IngestionService:
     """Service for ingesting and processing documents"""
     
     def __init__(self):
-        """Initialize ingestion service with vector store"""
-        self.vector_store = VectorService()
+        """Initialize ingestion service (the shared vector store is resolved on first use)"""
         self.chunk_size = 1000
         self.chunk_overlap = 200
     
+    @property
+    def chunker_config(self) -> Dict[str, Any]:
+        """Settings of ``_split_text`` (part of every chunk ID)"""
+        return {
+            "splitter": "IngestionService._split_text",
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap
+        }
+    
+    @property
+    def vector_store(self) -> VectorService:
+        """Shared vector store service"""
+        return get_vector_service()
+    
+    @property
+    def registry(self) -> DocumentRegistry:
+        """Shared document registry"""
+        return get_document_registry()
+    
     async def ingest_document(
         self,
         file_name: str,
@@ -46,9 +74,6 @@ class IngestionService:
             else:
                 raise ValueError(f"Unsupported file type: {file_type}")
             
-            # Generate document ID
-            document_id = str(uuid.uuid4())
-            
             # Split text into chunks
             chunks = self._split_text(text)
             
@@ -56,25 +81,25 @@ class IngestionService:
             metadatas = []
             for i, chunk in enumerate(chunks):
                 metadatas.append({
-                    "document_id": document_id,
                     "file_name": file_name,
                     "file_type": file_type,
                     "chunk_index": i,
-                    "total_chunks": len(chunks),
-                    "ingested_at": datetime.utcnow().isoformat()
+                    "total_chunks": len(chunks)
                 })
             
-            # Add to vector store
-            self.vector_store.add_documents(
-                texts=chunks,
-                metadatas=metadatas
+            # Add to vector store and record the chunk IDs in the registry
+            # (the ingest time lives in the registry so unchanged chunks keep identical metadata)
+            document = await self.ingest_chunks(
+                file_name, file_content, chunks, metadatas, chunker_config=self.chunker_config
             )
             
             return {
-                "document_id": document_id,
+                "document_id": document["document_id"],
                 "file_name": file_name,
                 "chunks_created": len(chunks)
             }
+        except DuplicateDocumentError:
+            raise
         except Exception as e:
             raise Exception(f"Error ingesting document: {str(e)}")
     
@@ -133,20 +158,105 @@ class IngestionService:
         
         return [c for c in chunks if c]  # Filter empty chunks
     
+    async def ingest_chunks(
+        self,
+        file_name: str,
+        file_content: bytes,
+        texts: List[str],
+        metadatas: List[dict],
+        chunker_config: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Store one file's chunks and record them in the document registry
+        
+        Chunk IDs are derived from (file content hash, chunker settings, chunk
+        index), so ingesting the same bytes again is an upsert. Chunks already
+        stored with the same text and metadata are not embedded again. A file
+        uploaded again under the same name replaces its previous version; the
+        same bytes under a different name are rejected rather than renaming
+        the stored document.
+        
+        Args:
+            file_name: Original file name
+            file_content: File bytes (hashed for the chunk IDs and registry)
+            texts: Chunk texts
+            metadatas: Chunk metadata dictionaries
+            chunker_config: Settings the chunks were produced with
+        
+        Returns:
+            dict: Registry entry of the document plus ``chunks_embedded`` /
+            ``chunks_skipped`` counts
+        
+        Raises:
+            DuplicateDocumentError: The same content is already stored under another name
+        """
+        file_hash = content_hash(file_content)
+        document_id = document_id_for(file_hash, chunker_config)
+        existing = self.registry.get(document_id)
+        if existing is not None and existing["filename"] != file_name:
+            raise DuplicateDocumentError(
+                f"'{file_name}' has the same content as '{existing['filename']}' (document {document_id})"
+            )
+        chunk_ids = chunk_ids_for(document_id, len(texts))
+        metadatas = [{**metadata, "document_id": document_id} for metadata in metadatas]
+        
+        # Unchanged = registered with identical text/metadata and still present in the index
+        stored = self.registry.stored_chunks(chunk_ids)
+        candidates = [
+            chunk_id for chunk_id, text, metadata in zip(chunk_ids, texts, metadatas)
+            if chunk_id in stored
+            and stored[chunk_id]["text"] == text
+            and stored[chunk_id]["metadata"] == json.loads(json.dumps(metadata, default=str))
+        ]
+        unchanged = await self.vector_store.aexisting_ids(candidates) if candidates else set()
+        pending = [i for i, chunk_id in enumerate(chunk_ids) if chunk_id not in unchanged]
+        
+        if pending:
+            await self.vector_store.aadd_documents(
+                texts=[texts[i] for i in pending],
+                metadatas=[metadatas[i] for i in pending],
+                ids=[chunk_ids[i] for i in pending]
+            )
+        previous = [
+            old for old in self.registry.find(filename=file_name)
+            if old["document_id"] != document_id
+        ]
+        document = self.registry.register(
+            document_id=document_id,
+            filename=file_name,
+            content_hash=file_hash,
+            chunk_ids=chunk_ids,
+            texts=texts,
+            metadatas=metadatas
+        )
+        await self._store_document_vector(document, chunk_ids, texts)
+        # Old versions go once the new one is stored (their chunk IDs embed another document ID)
+        for old in previous:
+            await self._remove(old["document_id"])
+        return {
+            **document,
+            "chunks_embedded": len(pending),
+            "chunks_skipped": len(texts) - len(pending)
+        }
+    
+    async def _remove(self, document_id: str) -> int:
+        """Delete a document's chunks from the index, then its registry entry"""
+        chunk_ids = self.registry.chunk_ids(document_id)
+        deleted = await self.vector_store.adelete(chunk_ids)
+        await self.vector_store.adelete_document_vectors([document_id])
+        self.registry.remove(document_id)
+        return deleted
+    
     async def list_documents(self) -> List[Dict[str, Any]]:
         """
         List all documents in the vector store
         
         Returns:
-            list: List of document metadata
+            list: Registry entries (document ID, filename, content hash,
+            chunk count, ingest time)
         """
         try:
-            # Simplified implementation - requires document registry for full functionality
-            total_count = self.vector_store.collection.count()
-            return [{
-                "message": "Document listing requires document registry implementation",
-                "total_chunks": total_count
-            }]
+            return self.registry.list_documents()
         except Exception as e:
             raise Exception(f"Error listing documents: {str(e)}")
     
@@ -154,6 +264,8 @@ class IngestionService:
         """
         Delete a document from the vector store
         
+        Only the document's own chunk IDs (from the registry) are deleted.
+        
         Args:
             document_id: The document ID to delete
         
@@ -161,22 +273,86 @@ class IngestionService:
             dict: Deletion result
         """
         try:
-            # Query for all chunks with this document_id
-            results = self.vector_store.collection.get(
-                where={"document_id": document_id}
-            )
-            
-            if results and results['ids']:
-                self.vector_store.collection.delete(ids=results['ids'])
+            if self.registry.get(document_id) is None:
                 return {
-                    "status": "success",
-                    "chunks_deleted": len(results['ids'])
-                }
-            else:
-                return {
-                    "status": "success",
+                    "status": "not_found",
                     "chunks_deleted": 0,
                     "message": "No documents found with that ID"
                 }
+            return {
+                "status": "success",
+                "chunks_deleted": await self._remove(document_id)
+            }
         except Exception as e:
             raise Exception(f"Error deleting document: {str(e)}")
+    
+    async def reingest_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Re-embed a document from the chunk text stored in the registry
+        
+        Useful after the index was wiped or rebuilt; the original file is not needed.
+        
+        Args:
+            document_id: The document ID to re-ingest
+        
+        Returns:
+            dict: Re-ingest result (None if the document is unknown)
+        """
+        document = self.registry.get(document_id)
+        if document is None:
+            return None
+        try:
+            chunks = self.registry.chunks(document_id)
+            texts = [chunk["text"] for chunk in chunks]
+            metadatas = [chunk["metadata"] for chunk in chunks]
+            # Same IDs, so this overwrites whatever is left of the document in the index
+            chunk_ids = await self.vector_store.aadd_documents(
+                texts=texts,
+                metadatas=metadatas,
+                ids=[chunk["id"] for chunk in chunks]
+            )
+            await self._store_document_vector(document, chunk_ids, texts)
+            return {
+                "document_id": document_id,
+                "file_name": document["filename"],
+                "chunks_reingested": len(chunk_ids)
+            }
+        except Exception as e:
+            raise Exception(f"Error re-ingesting document: {str(e)}")
+    
+    async def _store_document_vector(
+        self,
+        document: Dict[str, Any],
+        chunk_ids: List[str],
+        texts: List[str]
+    ) -> bool:
+        """Write the mean-pooled vector of a registered document"""
+        return await self.vector_store.aupsert_document_vector(
+            document["document_id"],
+            chunk_ids,
+            texts,
+            {"source": document["filename"], "chunk_count": len(chunk_ids)}
+        )
+    
+    async def rebuild_document_vectors(self) -> Dict[str, Any]:
+        """
+        Backfill the document-vector index for every registered document
+        
+        Needed once for documents ingested before document vectors existed.
+        Chunks are not re-embedded on the local backends; on Pinecone the
+        vectors come from the embedding cache where possible.
+        
+        Returns:
+            dict: Number of documents processed and vectors written
+        """
+        documents = self.registry.list_documents()
+        written = 0
+        for document in documents:
+            chunks = self.registry.chunks(document["document_id"])
+            if await self._store_document_vector(
+                document,
+                [chunk["id"] for chunk in chunks],
+                [chunk["text"] for chunk in chunks]
+            ):
+                written += 1
+        return {"documents": len(documents), "document_vectors_written": written}
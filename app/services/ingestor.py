@@ -7,28 +7,59 @@ from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
+# Chunker settings; they are part of every chunk ID, so changing them re-embeds documents
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 100
+CHUNKER_CONFIG = {
+    "splitter": "RecursiveCharacterTextSplitter",
+    "chunk_size": CHUNK_SIZE,
+    "chunk_overlap": CHUNK_OVERLAP,
+}
 
-def process_pdf(file_path: str) -> List[Document]:
+
+def load_pdf_pages(file_path: str) -> List[Document]:
     """
-    Process a PDF file and return document chunks ready for vector store
+    Load a PDF file as one Document per page
     
     Args:
-        file_path: Path to the PDF file to process
+        file_path: Path to the PDF file
     
     Returns:
-        List of Document chunks with text and metadata
+        List of page Documents (text and page metadata)
     """
     # Load the PDF file using PyPDFLoader
     loader = PyPDFLoader(file_path)
-    documents = loader.load()
+    return loader.load()
+
+
+def split_pages(documents: List[Document]) -> List[Document]:
+    """
+    Split page Documents into chunks ready for vector store
+    
+    Args:
+        documents: Page Documents from ``load_pdf_pages``
     
+    Returns:
+        List of Document chunks with text and metadata
+    """
     # Initialize RecursiveCharacterTextSplitter
     text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=100
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
     )
     
     # Split documents into chunks
-    chunks = text_splitter.split_documents(documents)
+    return text_splitter.split_documents(documents)
+
+
+def process_pdf(file_path: str) -> List[Document]:
+    """
+    Process a PDF file and return document chunks ready for vector store
     
-    return chunks
+    Args:
+        file_path: Path to the PDF file to process
+    
+    Returns:
+        List of Document chunks with text and metadata
+    """
+    return split_pages(load_pdf_pages(file_path))
@@ -0,0 +1,158 @@
+"""
+In-process BM25 inverted index over chunk text (exact keyword matching)
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+from app.services.metadata_filter import matches
+
+# Keeps tech tokens intact: "c++", "c#", "node.js", "ci/cd", "aws-sdk"
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[./\-][a-z0-9+#]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase keyword tokens (framework and certification names survive intact)"""
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 over chunk text with incremental add/delete
+
+    Postings map each term to ``{slot: term frequency}``; a query only touches
+    the postings of its own terms, so keyword lookups cost microseconds to
+    milliseconds regardless of how many vectors the dense index holds.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize an empty index
+
+        Args:
+            k1: Term-frequency saturation
+            b: Document length normalization (0 = none, 1 = full)
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._slots: Dict[str, int] = {}
+        self._docs: Dict[int, Tuple[str, str, Dict[str, Any], int, List[str]]] = {}
+        self._next_slot = 0
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, ids: List[str], texts: List[str], metadatas: List[dict]) -> None:
+        """Index chunks (an existing ID is replaced)"""
+        with self._lock:
+            self._remove(ids)
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                terms = tokenize(text)
+                slot = self._next_slot
+                self._next_slot += 1
+                self._slots[chunk_id] = slot
+                counts = Counter(terms)
+                self._docs[slot] = (chunk_id, text, dict(metadata), len(terms), list(counts))
+                self._total_length += len(terms)
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, {})[slot] = tf
+
+    def delete(self, ids: List[str]) -> int:
+        """Remove chunks by ID; returns how many were indexed"""
+        with self._lock:
+            return self._remove(ids)
+
+    def _remove(self, ids: List[str]) -> int:
+        removed = 0
+        for chunk_id in ids:
+            slot = self._slots.pop(chunk_id, None)
+            if slot is None:
+                continue
+            _, _, _, length, terms = self._docs.pop(slot)
+            self._total_length -= length
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(slot, None)
+                    if not postings:
+                        del self._postings[term]
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        """Drop every chunk"""
+        with self._lock:
+            self._postings.clear()
+            self._slots.clear()
+            self._docs.clear()
+            self._total_length = 0
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Top-``k`` chunks by BM25 score
+
+        Args:
+            query: Keyword query
+            k: Number of chunks to return
+            filter: Optional Pinecone-style metadata filter
+
+        Returns:
+            List of ``(chunk_id, bm25_score)`` ordered best first
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._docs)
+            if not terms or count == 0 or k <= 0:
+                return []
+            average_length = self._total_length / count
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                for slot, tf in postings.items():
+                    length = self._docs[slot][3]
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / average_length)
+                    scores[slot] = scores.get(slot, 0.0) + idf * tf * (self.k1 + 1) / norm
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            hits: List[Tuple[str, float]] = []
+            for slot, score in ranked:
+                chunk_id, _, metadata, _, _ = self._docs[slot]
+                if filter and not matches(metadata, filter):
+                    continue
+                hits.append((chunk_id, score))
+                if len(hits) >= k:
+                    break
+            return hits
+
+    def get(self, chunk_id: str) -> Optional[Dict[str, Any]]:
+        """Stored payload for ``chunk_id`` (None if not indexed)"""
+        slot = self._slots.get(chunk_id)
+        if slot is None:
+            return None
+        _, text, metadata, _, _ = self._docs[slot]
+        return {"id": chunk_id, "text": text, "metadata": metadata}
+
+    def stats(self) -> Dict[str, Any]:
+        """Chunk and vocabulary counts"""
+        return {
+            "chunks": len(self._docs),
+            "terms": len(self._postings),
+            "average_length": self._total_length / len(self._docs) if self._docs else 0.0,
+            "k1": self.k1,
+            "b": self.b,
+        }
@@ -0,0 +1,664 @@
+"""
+In-process vector index backed by a contiguous NumPy matrix (float32, float16 or int8)
+"""
+
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import List, Dict, Any, Tuple, Optional
+
+import numpy as np
+
+from app.services.metadata_filter import field_conditions, matches
+
+# Metadata fields with posting lists, so filters on them never scan every row
+INDEXED_FIELDS = ("source", "filename", "page", "document_id")
+
+STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+
+# Rows converted to float32 at a time when scanning a quantized matrix
+SCAN_BLOCK_ROWS = 65536
+
+
+class FullPrecisionStore:
+    """
+    Float32 copies of quantized vectors, used to re-score candidates exactly
+
+    With a ``path`` the vectors are appended to a file and read back through a
+    read-only memory map, so only the rows being re-scored are paged in.
+    Without one they are kept in a growable in-memory array.
+    """
+
+    def __init__(self, dimension: int, path: Optional[str] = None):
+        self.dimension = dimension
+        self.path = path
+        self._size = 0
+        self._map: Optional[np.memmap] = None
+        self._memory: Optional[np.ndarray] = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            # The index itself lives in memory, so the file starts empty every run
+            open(path, "wb").close()
+        else:
+            self._memory = np.empty((1024, dimension), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, matrix: np.ndarray) -> None:
+        """Append float32 rows"""
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        if self.path:
+            with open(self.path, "ab") as f:
+                f.write(matrix.tobytes())
+            self._map = None
+        else:
+            needed = self._size + matrix.shape[0]
+            capacity = self._memory.shape[0]
+            if needed > capacity:
+                while capacity < needed:
+                    capacity *= 2
+                grown = np.empty((capacity, self.dimension), dtype=np.float32)
+                grown[:self._size] = self._memory[:self._size]
+                self._memory = grown
+            self._memory[self._size:needed] = matrix
+        self._size += matrix.shape[0]
+
+    def take(self, rows) -> np.ndarray:
+        """Float32 vectors for ``rows``"""
+        if self._memory is not None:
+            return self._memory[:self._size][rows]
+        if self._map is None:
+            self._map = np.memmap(self.path, dtype=np.float32, mode="r", shape=(self._size, self.dimension))
+        return np.asarray(self._map[rows])
+
+    def resident_bytes(self) -> int:
+        """Bytes held in RAM (memory-mapped rows are paged in on demand)"""
+        return 0 if self.path else int(self._size * self.dimension * 4)
+
+
+class NumpyVectorIndex:
+    """Exact cosine-similarity index kept entirely in memory"""
+
+    def __init__(
+        self,
+        dimension: int,
+        initial_capacity: int = 1024,
+        indexed_fields: Tuple[str, ...] = INDEXED_FIELDS,
+        storage: str = "float32",
+        rescore: bool = True,
+        rescore_factor: int = 4,
+        full_precision_path: Optional[str] = None,
+        coarse_dimension: Optional[int] = None,
+        coarse_factor: int = 10
+    ):
+        """
+        Initialize an empty index
+
+        Args:
+            dimension: Dimension of the stored vectors
+            initial_capacity: Number of rows to preallocate (grows by doubling)
+            indexed_fields: Metadata fields that get value -> rows posting lists
+            storage: Precision of the scanned matrix: "float32", "float16" or
+                "int8" (int8 keeps one float32 scale per vector)
+            rescore: With quantized storage, re-score the top
+                ``k * rescore_factor`` candidates with float32 vectors
+            rescore_factor: Shortlist multiplier used when re-scoring
+            full_precision_path: File holding the float32 copies for re-scoring
+                (memory-mapped); None keeps them in memory
+            coarse_dimension: Enables two-stage search: scan a renormalized
+                prefix of this many dimensions, then re-rank the top
+                ``k * coarse_factor`` with the full vectors (None = single stage)
+            coarse_factor: Shortlist multiplier for the coarse stage
+        """
+        if storage not in STORAGE_DTYPES:
+            raise ValueError(f"Unknown vector storage '{storage}' (expected one of {list(STORAGE_DTYPES)})")
+        self.dimension = dimension
+        self.storage = storage
+        self.rescore = rescore
+        self.rescore_factor = max(1, rescore_factor)
+        self._dtype = STORAGE_DTYPES[storage]
+        capacity = max(initial_capacity, 1)
+        self._vectors = np.empty((capacity, dimension), dtype=self._dtype)
+        self._scales = np.empty(capacity, dtype=np.float32) if storage == "int8" else None
+        self._full = None
+        if storage != "float32" and rescore:
+            self._full = FullPrecisionStore(dimension, full_precision_path)
+        self.coarse_dimension = coarse_dimension if coarse_dimension and coarse_dimension < dimension else None
+        self.coarse_factor = max(1, coarse_factor)
+        self._coarse = None
+        if self.coarse_dimension:
+            self._coarse = np.empty((capacity, self.coarse_dimension), dtype=np.float32)
+        self._size = 0
+        self.ids: List[str] = []
+        self.texts: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        # Deleted (or overwritten) rows are tombstoned and skipped by every search
+        self._deleted = np.zeros(capacity, dtype=bool)
+        self._deleted_count = 0
+        self._id_rows: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self.indexed_fields = indexed_fields
+        self._postings: Dict[str, Dict[Any, List[int]]] = {
+            field: defaultdict(list) for field in indexed_fields
+        }
+
+    def __len__(self) -> int:
+        """Number of live (not deleted) vectors"""
+        return self._size - self._deleted_count
+
+    def is_empty(self) -> bool:
+        """True if no row was ever stored (tombstoned rows still occupy the matrix)"""
+        return self._size == 0
+
+    @property
+    def has_full_precision(self) -> bool:
+        """True if float32 copies are kept for re-scoring quantized vectors"""
+        return self._full is not None
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of the populated rows of the vector matrix (in the storage dtype)"""
+        return self._vectors[:self._size]
+
+    def get_vectors(self, rows) -> np.ndarray:
+        """Normalized float32 vectors for ``rows`` (exact copies when re-scoring is on)"""
+        rows = np.asarray(rows, dtype=np.int64)
+        if self._full is not None:
+            return self._full.take(rows)
+        vectors = self._vectors[rows].astype(np.float32)
+        if self._scales is not None:
+            vectors *= self._scales[rows][:, None]
+        return vectors
+
+    def vectors_for_ids(self, ids: List[str]) -> np.ndarray:
+        """Normalized float32 vectors of the live ``ids`` (unknown IDs are skipped)"""
+        rows = [self._id_rows[chunk_id] for chunk_id in ids if chunk_id in self._id_rows]
+        if not rows:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return self.get_vectors(rows)
+
+    def _row(self, row: int) -> np.ndarray:
+        """Stored vector for ``row`` as float32 (dequantized)"""
+        vector = self._vectors[row].astype(np.float32)
+        if self._scales is not None:
+            vector *= self._scales[row]
+        return vector
+
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize rows so a dot product equals cosine similarity"""
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _reserve(self, extra: int) -> None:
+        """Grow the backing matrix so ``extra`` more rows fit"""
+        needed = self._size + extra
+        capacity = self._vectors.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        grown = np.empty((capacity, self.dimension), dtype=self._dtype)
+        grown[:self._size] = self._vectors[:self._size]
+        self._vectors = grown
+        deleted = np.zeros(capacity, dtype=bool)
+        deleted[:self._size] = self._deleted[:self._size]
+        self._deleted = deleted
+        if self._scales is not None:
+            scales = np.empty(capacity, dtype=np.float32)
+            scales[:self._size] = self._scales[:self._size]
+            self._scales = scales
+        if self._coarse is not None:
+            coarse = np.empty((capacity, self.coarse_dimension), dtype=np.float32)
+            coarse[:self._size] = self._coarse[:self._size]
+            self._coarse = coarse
+
+    def _truncate(self, vectors: np.ndarray) -> np.ndarray:
+        """Renormalized prefix of each row (text-embedding-3 vectors stay meaningful when truncated)"""
+        return self._normalize(vectors[:, :self.coarse_dimension])
+
+    def _store(self, start: int, matrix: np.ndarray) -> None:
+        """Write normalized float32 rows into the matrix at ``start`` in the storage dtype"""
+        end = start + matrix.shape[0]
+        if self._scales is not None:
+            scales = np.abs(matrix).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            self._vectors[start:end] = np.round(matrix / scales[:, None]).astype(np.int8)
+            self._scales[start:end] = scales
+        else:
+            self._vectors[start:end] = matrix
+        if self._full is not None:
+            self._full.append(matrix)
+        if self._coarse is not None:
+            self._coarse[start:end] = self._truncate(matrix)
+
+    def add(
+        self,
+        ids: List[str],
+        vectors: List[List[float]],
+        texts: List[str],
+        metadatas: List[dict]
+    ) -> List[int]:
+        """
+        Append vectors and their payloads to the index
+
+        An ID that is already present is overwritten (its old row is tombstoned),
+        matching Pinecone's upsert semantics.
+
+        Args:
+            ids: Chunk IDs
+            vectors: Embedding vectors (one per chunk)
+            texts: Chunk texts
+            metadatas: Metadata dictionaries
+
+        Returns:
+            Row numbers assigned to the new vectors
+        """
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        if not (len(ids) == len(texts) == len(metadatas) == matrix.shape[0]):
+            raise ValueError("ids, vectors, texts and metadatas must have the same length")
+
+        with self._lock:
+            self._reserve(matrix.shape[0])
+            start = self._size
+            self._store(start, self._normalize(matrix))
+            self.ids.extend(ids)
+            self.texts.extend(texts)
+            self.metadatas.extend(dict(m) for m in metadatas)
+            self._tombstone([i for i in ids if i in self._id_rows])
+            for offset, chunk_id in enumerate(ids):
+                self._id_rows[chunk_id] = start + offset
+            for offset, metadata in enumerate(metadatas):
+                for field in self.indexed_fields:
+                    value = metadata.get(field)
+                    if value is not None:
+                        self._postings[field][value].append(start + offset)
+            self._size += matrix.shape[0]
+            return list(range(start, self._size))
+
+    def load_arrays(
+        self,
+        vectors: np.ndarray,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[dict]
+    ) -> None:
+        """
+        Adopt an already-normalized float32 matrix as the index contents without copying
+
+        ``vectors`` may be a read-only ``np.memmap`` (e.g. a snapshot file): the
+        matrix is scanned in place, and the first later ``add`` copies it into
+        a growable in-memory matrix. Only plain float32 storage without
+        re-scoring or two-stage search can adopt a matrix this way.
+
+        Args:
+            vectors: ``n x dimension`` float32 matrix with unit-length rows
+            ids: Chunk IDs (one per row, unique)
+            texts: Chunk texts
+            metadatas: Metadata dictionaries
+        """
+        if self._scales is not None or self._full is not None or self._coarse is not None:
+            raise ValueError("load_arrays needs float32 storage without re-scoring or two-stage search")
+        if vectors.dtype != np.float32 or vectors.ndim != 2 or vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected an n x {self.dimension} float32 matrix")
+        count = vectors.shape[0]
+        if not (len(ids) == len(texts) == len(metadatas) == count):
+            raise ValueError("ids, vectors, texts and metadatas must have the same length")
+        if count == 0:
+            return
+
+        with self._lock:
+            if self._size:
+                raise ValueError("load_arrays needs an empty index")
+            self._vectors = vectors
+            self._deleted = np.zeros(count, dtype=bool)
+            self._deleted_count = 0
+            self.ids = list(ids)
+            self.texts = list(texts)
+            self.metadatas = [dict(m) for m in metadatas]
+            self._id_rows = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+            for row, metadata in enumerate(self.metadatas):
+                for field in self.indexed_fields:
+                    value = metadata.get(field)
+                    if value is not None:
+                        self._postings[field][value].append(row)
+            self._size = count
+
+    def _tombstone(self, ids: List[str]) -> int:
+        """Mark the rows of ``ids`` deleted (caller holds the lock)"""
+        removed = 0
+        for chunk_id in ids:
+            row = self._id_rows.pop(chunk_id, None)
+            if row is not None and not self._deleted[row]:
+                self._deleted[row] = True
+                removed += 1
+        self._deleted_count += removed
+        return removed
+
+    def delete(self, ids: List[str]) -> int:
+        """
+        Delete vectors by ID (rows are tombstoned, not compacted)
+
+        Args:
+            ids: Chunk IDs to delete (unknown IDs are ignored)
+
+        Returns:
+            Number of vectors deleted
+        """
+        with self._lock:
+            return self._tombstone(ids)
+
+    def live_rows(self) -> np.ndarray:
+        """Row numbers of every live (not deleted) vector"""
+        return np.flatnonzero(~self._deleted[:self._size])
+
+    def contains(self, chunk_id: str) -> bool:
+        """True if ``chunk_id`` is a live vector"""
+        return chunk_id in self._id_rows
+
+    def _live(self, mask: Optional[np.ndarray], size: int) -> Optional[np.ndarray]:
+        """Combine a row bitmap with the tombstones (None = every row is selected)"""
+        if not self._deleted_count:
+            return mask
+        live = ~self._deleted[:size]
+        return live if mask is None else mask[:size] & live
+
+    def filter_mask(self, filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Evaluate a metadata filter into a boolean row bitmap
+
+        Equality and membership tests on indexed fields are answered from the
+        posting lists; anything else falls back to a scan of the metadata.
+
+        Args:
+            filter: Pinecone-style filter expression (None = no filtering)
+
+        Returns:
+            Boolean array of length ``len(self)`` or None when unfiltered
+        """
+        if not filter:
+            return None
+        size = self._size
+        mask = np.ones(size, dtype=bool)
+        for field, condition in filter.items():
+            if field == "$and":
+                for clause in condition:
+                    mask &= self._clause_mask(clause, size)
+            elif field == "$or":
+                either = np.zeros(size, dtype=bool)
+                for clause in condition:
+                    either |= self._clause_mask(clause, size)
+                mask &= either
+            else:
+                for op, operand in field_conditions(condition).items():
+                    mask &= self._condition_mask(field, op, operand, size)
+        return mask
+
+    def _clause_mask(self, clause: Dict[str, Any], size: int) -> np.ndarray:
+        """Bitmap for a nested clause (an empty clause selects every row)"""
+        mask = self.filter_mask(clause)
+        return np.ones(size, dtype=bool) if mask is None else mask[:size]
+
+    def _condition_mask(self, field: str, op: str, operand: Any, size: int) -> np.ndarray:
+        """Bitmap for one ``field op operand`` condition"""
+        if field in self._postings and op in ("$eq", "$ne", "$in", "$nin"):
+            values = operand if op in ("$in", "$nin") else [operand]
+            selected = np.zeros(size, dtype=bool)
+            postings = self._postings[field]
+            for value in values:
+                rows = postings.get(value)
+                if rows:
+                    rows = np.asarray(rows, dtype=np.int64)
+                    selected[rows[rows < size]] = True
+            return ~selected if op in ("$ne", "$nin") else selected
+
+        condition = {field: {op: operand}}
+        return np.fromiter(
+            (matches(metadata, condition) for metadata in self.metadatas[:size]),
+            dtype=bool,
+            count=size
+        )
+
+    def _scan_scores(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Similarity of normalized float32 ``queries`` (n x dim) to the stored rows
+
+        Quantized matrices are widened to float32 one block at a time, so a scan
+        never materializes a full float32 copy of the index.
+
+        Returns:
+            Array of shape ``(n, len(rows))`` (all rows when ``rows`` is None)
+        """
+        matrix = self._vectors[:self._size] if rows is None else self._vectors[rows]
+        if self.storage == "float32":
+            return queries @ matrix.T
+
+        scores = np.empty((queries.shape[0], matrix.shape[0]), dtype=np.float32)
+        for start in range(0, matrix.shape[0], SCAN_BLOCK_ROWS):
+            block = matrix[start:start + SCAN_BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + block.shape[0]] = queries @ block.T
+        if self._scales is not None:
+            scores *= self._scales[:self._size] if rows is None else self._scales[rows]
+        return scores
+
+    def _top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """Positions of the ``k`` highest scores, best first"""
+        if k >= scores.shape[0]:
+            return np.argsort(-scores)
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+
+    def _coarse_scores(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """First-stage similarity on the truncated prefix, shape ``(n, len(rows))``"""
+        matrix = self._coarse[:self._size] if rows is None else self._coarse[rows]
+        return self._truncate(queries) @ matrix.T
+
+    def _rescore(self, query: np.ndarray, candidates: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        """Top-``k`` among ``candidates`` rows scored with full-dimension float32 vectors"""
+        candidates = np.asarray(candidates, dtype=np.int64)
+        exact = self.get_vectors(candidates) @ query
+        return [(int(candidates[i]), float(exact[i])) for i in self._top_k(exact, k)]
+
+    def _rank(
+        self,
+        query: np.ndarray,
+        scores: np.ndarray,
+        rows: np.ndarray,
+        k: int
+    ) -> List[Tuple[int, float]]:
+        """Top-``k`` of scanned ``rows``, re-scoring a shortlist when enabled"""
+        if self._full is not None:
+            shortlist = self._top_k(scores, k * self.rescore_factor)
+            return self._rescore(query, rows[shortlist], k)
+        return [(int(rows[i]), float(scores[i])) for i in self._top_k(scores, k)]
+
+    def search(
+        self,
+        query_vector: List[float],
+        k: int,
+        mask: Optional[np.ndarray] = None
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the ``k`` rows most similar to ``query_vector``
+
+        Args:
+            query_vector: Query embedding
+            k: Number of neighbours to return
+            mask: Optional boolean row bitmap (see ``filter_mask``); only
+                selected rows are scored
+
+        Returns:
+            List of ``(row, cosine_similarity)`` ordered best first
+        """
+        return self.search_many([query_vector], k, mask=mask)[0]
+
+    def search_many(
+        self,
+        query_vectors: List[List[float]],
+        k: int,
+        mask: Optional[np.ndarray] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Top-``k`` search for several queries with one matrix-matrix product
+
+        Args:
+            query_vectors: Query embeddings
+            k: Number of neighbours per query
+            mask: Optional boolean row bitmap shared by every query
+
+        Returns:
+            One ``(row, cosine_similarity)`` list per query, best first
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32).reshape(-1, self.dimension)
+        size = self._size
+        if size == 0 or k <= 0:
+            return [[] for _ in range(queries.shape[0])]
+
+        mask = self._live(mask, size)
+        rows = np.flatnonzero(mask[:size]) if mask is not None else np.arange(size)
+        if rows.size == 0:
+            return [[] for _ in range(queries.shape[0])]
+
+        queries = self._normalize(queries)
+        if self._coarse is not None:
+            scores = self._coarse_scores(queries, rows if mask is not None else None)
+            shortlist = k * self.coarse_factor
+            return [
+                self._rescore(queries[i], rows[self._top_k(scores[i], shortlist)], k)
+                for i in range(queries.shape[0])
+            ]
+        scores = self._scan_scores(queries, rows if mask is not None else None)
+        return [self._rank(queries[i], scores[i], rows, k) for i in range(queries.shape[0])]
+
+    def get(self, row: int) -> Dict[str, Any]:
+        """Return the stored payload for ``row``"""
+        return {
+            "id": self.ids[row],
+            "text": self.texts[row],
+            "metadata": self.metadatas[row],
+        }
+
+    def deleted_count(self) -> int:
+        """Tombstoned rows still occupying memory"""
+        return self._deleted_count
+
+    def memory_bytes(self) -> int:
+        """Resident bytes used by the vectors (matrix, int8 scales, in-memory float32 copies)"""
+        total = self._size * self.dimension * self._vectors.itemsize
+        if self._scales is not None:
+            total += self._size * self._scales.itemsize
+        if self._full is not None:
+            total += self._full.resident_bytes()
+        if self._coarse is not None:
+            total += self._size * self.coarse_dimension * self._coarse.itemsize
+        return int(total)
+
+    def quantization_report(self, k: int = 10, sample: int = 100, seed: int = 0) -> Dict[str, Any]:
+        """
+        Memory saved by the storage mode and the recall it costs
+
+        Stored vectors are sampled as queries; ground truth is exact search over
+        the float32 vectors (only available when re-scoring keeps them).
+
+        Args:
+            k: Number of neighbours compared per query
+            sample: Number of stored vectors used as queries
+            seed: Sampling seed
+
+        Returns:
+            Dictionary with memory figures and recall@k of the quantized scan
+            alone and after re-scoring
+        """
+        float32_bytes = int(self._size * self.dimension * 4)
+        resident = self.memory_bytes()
+        report: Dict[str, Any] = {
+            "storage": self.storage,
+            "vectors": self._size,
+            "float32_bytes": float32_bytes,
+            "resident_bytes": resident,
+            "saved_bytes": float32_bytes - resident,
+            "rescore": self._full is not None,
+            "rescore_factor": self.rescore_factor,
+            "full_precision_path": self._full.path if self._full is not None else None,
+        }
+        if self._full is None or self._size == 0:
+            return report
+
+        with self._lock:
+            size = self._size
+            rng = np.random.default_rng(seed)
+            rows = rng.choice(size, size=min(sample, size), replace=False)
+            queries = self._full.take(rows)
+            exact = queries @ self._full.take(np.arange(size)).T
+            scanned = self._scan_scores(queries)
+            everything = np.arange(size)
+
+            hits_scan = hits_rescored = expected = 0
+            for i, query in enumerate(queries):
+                truth = set(self._top_k(exact[i], k).tolist())
+                scan_top = set(self._top_k(scanned[i], k).tolist())
+                rescored = {row for row, _ in self._rank(query, scanned[i], everything, k)}
+                hits_scan += len(truth & scan_top)
+                hits_rescored += len(truth & rescored)
+                expected += len(truth)
+
+        report["k"] = k
+        report["queries"] = len(rows)
+        report["recall_scan"] = hits_scan / expected
+        report["recall_rescored"] = hits_rescored / expected
+        return report
+
+    def two_stage_report(self, k: int = 10, sample: int = 100, seed: int = 0) -> Dict[str, Any]:
+        """
+        Recall and scan speed of truncated-prefix search against a full-dimension scan
+
+        Args:
+            k: Number of neighbours compared per query
+            sample: Number of stored vectors used as queries
+            seed: Sampling seed
+
+        Returns:
+            Dictionary with recall@k of the coarse stage alone and after
+            re-ranking, plus mean scan time per query for both stages
+        """
+        report: Dict[str, Any] = {
+            "dimension": self.dimension,
+            "coarse_dimension": self.coarse_dimension,
+            "coarse_factor": self.coarse_factor,
+            "vectors": self._size,
+        }
+        if self._coarse is None or self._size == 0:
+            return report
+
+        with self._lock:
+            size = self._size
+            rng = np.random.default_rng(seed)
+            rows = rng.choice(size, size=min(sample, size), replace=False)
+            queries = self.get_vectors(rows)
+
+            start = time.perf_counter()
+            full = self._scan_scores(queries)
+            full_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            coarse = self._coarse_scores(queries)
+            coarse_ms = (time.perf_counter() - start) * 1000
+
+            hits_coarse = hits_reranked = expected = 0
+            for i, query in enumerate(queries):
+                truth = set(self._top_k(full[i], k).tolist())
+                shortlist = self._top_k(coarse[i], k * self.coarse_factor)
+                reranked = {row for row, _ in self._rescore(query, shortlist, k)}
+                hits_coarse += len(truth & set(shortlist[:k].tolist()))
+                hits_reranked += len(truth & reranked)
+                expected += len(truth)
+
+        report["k"] = k
+        report["queries"] = len(rows)
+        report["recall_coarse"] = hits_coarse / expected
+        report["recall_reranked"] = hits_reranked / expected
+        report["full_scan_ms_per_query"] = full_ms / len(rows)
+        report["coarse_scan_ms_per_query"] = coarse_ms / len(rows)
+        report["scan_speedup"] = full_ms / coarse_ms if coarse_ms else None
+        return report
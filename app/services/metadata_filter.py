@@ -0,0 +1,88 @@
+"""
+Pinecone-style metadata filter expressions evaluated against local chunk metadata
+
+Supported syntax (same as Pinecone, so one filter works for every backend)::
+
+    {"source": "resume.pdf"}                       # implicit $eq
+    {"page": {"$gte": 1}}
+    {"filename": {"$in": ["a.pdf", "b.pdf"]}}
+    {"$or": [{"source": "a.pdf"}, {"page": 0}]}
+"""
+
+from typing import Any, Dict, Optional
+
+COMPARISON_OPERATORS = ("$eq", "$ne", "$gt", "$gte", "$lt", "$lte", "$in", "$nin", "$exists")
+LOGICAL_OPERATORS = ("$and", "$or")
+
+
+def validate_filter(filter: Optional[Dict[str, Any]]) -> None:
+    """Raise ValueError if ``filter`` uses an unsupported operator"""
+    if filter is None:
+        return
+    if not isinstance(filter, dict):
+        raise ValueError("Metadata filter must be a dictionary")
+    for field, condition in filter.items():
+        if field in LOGICAL_OPERATORS:
+            if not isinstance(condition, list):
+                raise ValueError(f"{field} expects a list of filters")
+            for clause in condition:
+                validate_filter(clause)
+        elif field.startswith("$"):
+            raise ValueError(f"Unsupported filter operator: {field}")
+        elif isinstance(condition, dict):
+            for op in condition:
+                if op not in COMPARISON_OPERATORS:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def field_conditions(condition: Any) -> Dict[str, Any]:
+    """Normalize a field condition to ``{operator: operand}`` (bare values mean $eq)"""
+    if isinstance(condition, dict):
+        return condition
+    return {"$eq": condition}
+
+
+def _compare(value: Any, op: str, operand: Any) -> bool:
+    if op == "$exists":
+        return (value is not None) == bool(operand)
+    if op == "$eq":
+        return value == operand
+    if op == "$ne":
+        return value != operand
+    if op == "$in":
+        return value in operand
+    if op == "$nin":
+        return value not in operand
+    if value is None:
+        return False
+    try:
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+        if op == "$lt":
+            return value < operand
+        if op == "$lte":
+            return value <= operand
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def matches(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """True if ``metadata`` satisfies ``filter`` (an empty filter matches everything)"""
+    if not filter:
+        return True
+    for field, condition in filter.items():
+        if field == "$and":
+            if not all(matches(metadata, clause) for clause in condition):
+                return False
+        elif field == "$or":
+            if not any(matches(metadata, clause) for clause in condition):
+                return False
+        else:
+            value = metadata.get(field)
+            for op, operand in field_conditions(condition).items():
+                if not _compare(value, op, operand):
+                    return False
+    return True
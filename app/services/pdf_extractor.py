@@ -2,29 +2,200 @@
 PDF Text Extraction Service
 """
 
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+
 from pypdf import PdfReader
 
+from app.core.config import settings
+from app.services.document_registry import content_hash
+
+# Bump when the extraction changes so old sidecars are re-parsed
+SIDECAR_VERSION = 1
+
 
-def extract_text_from_pdf(file_path: str) -> str:
+def extract_pages(file_path: str) -> List[str]:
     """
-    Extract all text from a PDF file
-    
+    Extract the text of every page of a PDF file (pypdf)
+
     Args:
         file_path: Path to the PDF file
-    
+
     Returns:
-        str: Combined text from all pages
+        list: One string per page (empty for pages without text)
     """
     try:
-        reader = PdfReader(file_path)
-        text_parts = []
-        
-        for page in reader.pages:
-            text = page.extract_text()
-            if text.strip():
-                text_parts.append(text)
-        
-        return "\n\n".join(text_parts)
-    
+        return [page.extract_text() or "" for page in PdfReader(file_path).pages]
     except Exception as e:
         raise Exception(f"Failed to extract text from PDF: {str(e)}")
+
+
+def join_pages(pages: List[str]) -> str:
+    """Combined text of the non-empty pages"""
+    return "\n\n".join(text for text in pages if text.strip())
+
+
+class PdfTextCache:
+    """
+    Extracted PDF text, parsed once per file content
+
+    Text is stored as a JSON sidecar named after the SHA-256 of the PDF bytes
+    (per-page text plus the joined text), so any copy of the same file
+    reuses it. An in-memory LRU keyed by path sits in front. An entry is
+    trusted while the file's mtime and size are unchanged. Otherwise the
+    file is re-hashed, and a matching sidecar is used; the PDF is parsed
+    only when no sidecar matches.
+    """
+
+    def __init__(self, sidecar_dir: Optional[str], memory_items: int = 256):
+        """
+        Initialize the cache
+
+        Args:
+            sidecar_dir: Directory for ``<sha256>.json`` sidecars (None = memory only)
+            memory_items: Files kept in the in-memory LRU
+        """
+        self.sidecar_dir = sidecar_dir
+        self.memory_items = memory_items
+        if sidecar_dir:
+            os.makedirs(sidecar_dir, exist_ok=True)
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.sidecar_hits = 0
+        self.parses = 0
+
+    def _sidecar_path(self, file_hash: str) -> Optional[str]:
+        return os.path.join(self.sidecar_dir, f"{file_hash}.json") if self.sidecar_dir else None
+
+    def _read_sidecar(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        path = self._sidecar_path(file_hash)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                sidecar = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if sidecar.get("version") != SIDECAR_VERSION or sidecar.get("content_hash") != file_hash:
+            return None
+        return sidecar
+
+    def store(self, content: bytes, pages: List[str]) -> Dict[str, Any]:
+        """
+        Save already-extracted page texts for a file's bytes (e.g. at upload time)
+
+        Args:
+            content: PDF bytes
+            pages: Text of each page
+
+        Returns:
+            The sidecar record
+        """
+        return self._write(content_hash(content), pages)
+
+    def _write(self, file_hash: str, pages: List[str]) -> Dict[str, Any]:
+        sidecar = {
+            "version": SIDECAR_VERSION,
+            "content_hash": file_hash,
+            "pages": pages,
+            "text": join_pages(pages),
+        }
+        path = self._sidecar_path(file_hash)
+        if path:
+            # Unique temp file per writer: concurrent writes of the same PDF each publish a whole sidecar
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=self.sidecar_dir, prefix=f"{file_hash}.", suffix=".tmp", delete=False
+            ) as f:
+                json.dump(sidecar, f)
+            try:
+                os.replace(f.name, path)
+            except OSError:
+                os.remove(f.name)
+                raise
+        return sidecar
+
+    def get(self, file_path: str) -> Dict[str, Any]:
+        """
+        Extracted text of a PDF file, parsing it only if no valid cached copy exists
+
+        Args:
+            file_path: Path to the PDF file
+
+        Returns:
+            dict with ``content_hash``, ``pages`` and ``text``
+        """
+        key = os.path.abspath(file_path)
+        stat = os.stat(key)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry["sidecar"]
+
+        with open(key, "rb") as f:
+            file_hash = content_hash(f.read())
+        sidecar = self._read_sidecar(file_hash)
+        if sidecar is not None:
+            self.sidecar_hits += 1
+        else:
+            self.parses += 1
+            sidecar = self._write(file_hash, extract_pages(key))
+
+        with self._lock:
+            self._memory[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sidecar": sidecar}
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+        return sidecar
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit counters and LRU size"""
+        return {
+            "memory_items": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "sidecar_hits": self.sidecar_hits,
+            "parses": self.parses,
+            "sidecar_dir": self.sidecar_dir,
+        }
+
+
+_shared_cache: Optional[PdfTextCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_pdf_text_cache() -> PdfTextCache:
+    """Return the process-wide PdfTextCache, creating it on first use"""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                _shared_cache = PdfTextCache(
+                    settings.PDF_TEXT_CACHE_DIR or None,
+                    memory_items=settings.PDF_TEXT_CACHE_MEMORY_ITEMS
+                )
+    return _shared_cache
+
+
+def extract_text_from_pdf(file_path: str, cached: bool = True) -> str:
+    """
+    Extract all text from a PDF file
+
+    Args:
+        file_path: Path to the PDF file
+        cached: Serve the text from the sidecar cache (parse once per file content)
+
+    Returns:
+        str: Combined text from all pages
+    """
+    if cached:
+        try:
+            return get_pdf_text_cache().get(file_path)["text"]
+        except OSError as e:
+            raise Exception(f"Failed to extract text from PDF: {str(e)}")
+    return join_pages(extract_pages(file_path))
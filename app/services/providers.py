@@ -0,0 +1,578 @@
+"""
+Model and index providers, with offline stand-ins for OpenAI and Pinecone
+
+The stand-ins need no network or API keys, are deterministic, and can inject
+latency and errors, so every endpoint can be benchmarked and load-tested on a
+laptop:
+
+* ``HashingEmbeddings``: feature-hashing embedder (drop-in for ``OpenAIEmbeddings``)
+* ``ScriptedChatModel``: returns valid screening / ranking / tailoring output
+* ``ScriptedToolChatClient``: OpenAI tool-calling stand-in for the ``/api/chat`` agent
+* ``InMemoryPinecone``: Pinecone client whose indexes live in this process
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.lexical_index import tokenize
+from app.services.local_index import NumpyVectorIndex
+
+EMBEDDING_PROVIDERS = ("openai", "hashing")
+CHAT_PROVIDERS = ("openai", "scripted")
+
+
+class InjectedFault(RuntimeError):
+    """Error raised on purpose by a stand-in provider"""
+
+
+class FaultInjector:
+    """Adds latency and random failures in front of a stand-in call"""
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+        name: str = "provider"
+    ):
+        """
+        Initialize the injector
+
+        Args:
+            latency_ms: Fixed delay added to every call
+            jitter_ms: Extra uniformly random delay in ``[0, jitter_ms]``
+            error_rate: Probability (0-1) that a call raises ``InjectedFault``
+            seed: Seed for reproducible jitter and failures
+            name: Provider name used in error messages
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.name = name
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    @classmethod
+    def from_settings(cls, name: str, latency_ms: float) -> "FaultInjector":
+        """Injector using the shared FAKE_* settings and a per-provider latency"""
+        return cls(
+            latency_ms=latency_ms,
+            jitter_ms=settings.FAKE_LATENCY_JITTER_MS,
+            error_rate=settings.FAKE_ERROR_RATE,
+            seed=settings.FAKE_SEED,
+            name=name
+        )
+
+    def _draw(self):
+        """Delay in seconds and whether this call fails"""
+        with self._lock:
+            self.calls += 1
+            delay = (self.latency_ms + self._random.uniform(0, self.jitter_ms)) / 1000
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.failures += 1
+        return delay, fail
+
+    def check(self) -> None:
+        """Sleep for the injected latency, then maybe raise"""
+        delay, fail = self._draw()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            raise InjectedFault(f"Injected {self.name} failure")
+
+    async def acheck(self) -> None:
+        """Async variant of ``check`` (does not block the event loop)"""
+        delay, fail = self._draw()
+        if delay:
+            await asyncio.sleep(delay)
+        if fail:
+            raise InjectedFault(f"Injected {self.name} failure")
+
+    def stats(self) -> Dict[str, Any]:
+        """Call and failure counters"""
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "latency_ms": self.latency_ms,
+            "jitter_ms": self.jitter_ms,
+            "error_rate": self.error_rate,
+        }
+
+
+@lru_cache(maxsize=65536)
+def _feature(feature: str, dimension: int):
+    """Bucket and sign of a hashed feature"""
+    digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+    return digest % dimension, 1.0 if digest >> 63 else -1.0
+
+
+class HashingEmbeddings:
+    """
+    Deterministic feature-hashing embedder (no model, no network)
+
+    Word unigrams and bigrams are hashed into signed buckets and the vector is
+    L2-normalized, so texts sharing keywords get a high cosine similarity.
+    Same method names as LangChain embeddings, so it can sit behind
+    ``CachedEmbeddings`` and the ingest pipeline unchanged.
+    """
+
+    def __init__(self, dimension: int = 1536, fault: Optional[FaultInjector] = None):
+        """
+        Initialize the embedder
+
+        Args:
+            dimension: Output dimension (match the index dimension)
+            fault: Optional latency / error injection per request
+        """
+        self.dimension = dimension
+        self.fault = fault or FaultInjector(name="embeddings")
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        terms = tokenize(text)
+        features = terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]
+        for feature in features:
+            bucket, sign = _feature(feature, self.dimension)
+            vector[bucket] += sign
+        norm = float(np.linalg.norm(vector))
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts (one injected delay per batch, like one API request)"""
+        self.fault.check()
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed one query"""
+        self.fault.check()
+        return self._embed(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Async variant of ``embed_documents``"""
+        await self.fault.acheck()
+        return [self._embed(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async variant of ``embed_query``"""
+        await self.fault.acheck()
+        return self._embed(text)
+
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or our the this to we will with you your"
+    " experience years work team ability strong skills".split()
+)
+
+_CANDIDATE = re.compile(r"Candidate #\d+\s*\nFilename: (.+?)\s*\nResume Content:\s*\n(.*?)\n---", re.S)
+
+
+def _between(text: str, start: str, end: Optional[str] = None) -> str:
+    """Text after ``start`` and before ``end`` (empty if ``start`` is missing)"""
+    head, found, tail = text.partition(start)
+    if not found:
+        return ""
+    return tail.split(end, 1)[0] if end else tail
+
+
+def _keywords(text: str) -> List[str]:
+    """Distinct content words in order of appearance"""
+    seen: Dict[str, None] = {}
+    for term in tokenize(text):
+        if len(term) > 2 and term not in _STOPWORDS and not term.isdigit():
+            seen.setdefault(term, None)
+    return list(seen)
+
+
+def _overlap_score(job_terms: List[str], text: str) -> int:
+    """0-100 share of job keywords present in ``text``"""
+    if not job_terms:
+        return 50
+    present = set(tokenize(text))
+    return round(100 * sum(term in present for term in job_terms) / len(job_terms))
+
+
+def _match_status(score: int) -> str:
+    if score >= 90:
+        return "Excellent Match"
+    if score >= 75:
+        return "High Match"
+    if score >= 60:
+        return "Moderate Match"
+    if score >= 40:
+        return "Low Match"
+    return "Poor Match"
+
+
+class ScriptedChatModel:
+    """
+    Offline chat model answering the app's prompts with well-formed output
+
+    Screening prompts get the ATS JSON object, candidate ranking prompts get
+    the JSON array of top candidates, tailoring prompts get the two-section
+    markdown. Scores are keyword overlap between the job description and the
+    resume text, so results are deterministic and roughly sensible.
+    """
+
+    def __init__(self, responses: Optional[List[str]] = None, fault: Optional[FaultInjector] = None):
+        """
+        Initialize the model
+
+        Args:
+            responses: Fixed replies returned in order (cycled) instead of
+                the prompt-driven scripts
+            fault: Optional latency / error injection per call
+        """
+        self.responses = list(responses or [])
+        self.fault = fault or FaultInjector(name="chat")
+        self._turn = 0
+
+    @staticmethod
+    def _text(messages: Any) -> Dict[str, str]:
+        """System and user text from LangChain messages, dicts, tuples or a string"""
+        if isinstance(messages, str):
+            return {"system": "", "user": messages}
+        parts = {"system": [], "user": []}
+        for message in messages:
+            if isinstance(message, dict):
+                role, content = message.get("role", "user"), message.get("content", "")
+            elif isinstance(message, tuple):
+                role, content = message
+            else:
+                role, content = getattr(message, "type", "human"), message.content
+            parts["system" if role == "system" else "user"].append(str(content))
+        return {role: "\n".join(texts) for role, texts in parts.items()}
+
+    def _reply(self, messages: Any) -> SimpleNamespace:
+        if self.responses:
+            content = self.responses[self._turn % len(self.responses)]
+            self._turn += 1
+            return SimpleNamespace(content=content)
+        prompt = self._text(messages)
+        if "JSON array" in prompt["system"]:
+            content = self._rank(prompt["user"])
+        elif "match_status" in prompt["system"]:
+            content = self._screen(prompt["user"])
+        else:
+            content = self._tailor(prompt["user"])
+        return SimpleNamespace(content=content)
+
+    @staticmethod
+    def _rank(user: str) -> str:
+        job_terms = _keywords(_between(user, "Job Description:", "Candidates to Evaluate:"))
+        best: Dict[str, int] = {}
+        for filename, text in _CANDIDATE.findall(user):
+            best[filename] = max(best.get(filename, 0), _overlap_score(job_terms, text))
+        ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)[:7]
+        return json.dumps([
+            {
+                "filename": filename,
+                "name": "Unknown Candidate",
+                "score": score,
+                "reasoning": f"Scripted ranking: {score}% of job keywords appear in the resume."
+            }
+            for filename, score in ranked
+        ])
+
+    @staticmethod
+    def _screen(user: str) -> str:
+        job_terms = _keywords(_between(user, "JOB DESCRIPTION:", "CANDIDATE RESUME:"))
+        resume = _between(user, "CANDIDATE RESUME:", "Provide your analysis")
+        score = _overlap_score(job_terms, resume)
+        present = set(tokenize(resume))
+        return json.dumps({
+            "score": score,
+            "match_status": _match_status(score),
+            "missing_skills": [term for term in job_terms if term not in present][:5],
+            "reasoning": f"Scripted screening: {score}% of job keywords appear in the resume."
+        })
+
+    @staticmethod
+    def _tailor(user: str) -> str:
+        job_terms = _keywords(_between(user, "Job Description:", "Current Resume:"))
+        resume = _between(user, "Current Resume:", "Please provide").strip() or user.strip()
+        present = set(tokenize(resume))
+        added = [term for term in job_terms if term not in present][:5]
+        return (
+            "## 🔍 KEY CHANGES & IMPROVEMENTS\n"
+            f"* **Added Keyword:** {', '.join(added) or 'none'}\n"
+            "* **Rewrote:** Scripted response, resume text unchanged\n"
+            "* **Focus Shift:** n/a\n"
+            "* **ATS Optimization:** n/a\n\n"
+            "## 📄 TAILORED RESUME CONTENT\n"
+            f"{resume}"
+        )
+
+    def invoke(self, messages: Any) -> SimpleNamespace:
+        """Reply to ``messages`` (object with ``.content`` like a LangChain AIMessage)"""
+        self.fault.check()
+        return self._reply(messages)
+
+    async def ainvoke(self, messages: Any) -> SimpleNamespace:
+        """Async variant of ``invoke``"""
+        await self.fault.acheck()
+        return self._reply(messages)
+
+
+class ScriptedToolChatClient:
+    """
+    Offline stand-in for ``AsyncOpenAI`` tool calling (``client.chat.completions.create``)
+
+    The first round of a turn calls one of the offered tools, picked from the
+    user's last message (screening, instructions or a policy search), so the
+    MCP tools run for real; once the tool results are in, the reply quotes
+    them.
+    """
+
+    def __init__(self, fault: Optional[FaultInjector] = None):
+        """
+        Initialize the client
+
+        Args:
+            fault: Optional latency / error injection per call
+        """
+        self.fault = fault or FaultInjector(name="chat")
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self._calls = 0
+
+    def _tool_call(self, user: str, tools: List[Dict[str, Any]]) -> Optional[SimpleNamespace]:
+        offered = {tool["function"]["name"] for tool in tools}
+        lowered = user.lower()
+        if "screen" in lowered or "job description" in lowered or "candidate" in lowered:
+            name, args = "screen_candidate", {"job_description": user}
+        elif "how" in lowered or "instruction" in lowered:
+            name, args = "get_screener_instructions", {}
+        else:
+            name, args = "consult_policy_db", {"query": user}
+        if name not in offered:
+            return None
+        self._calls += 1
+        return SimpleNamespace(
+            id=f"call_{self._calls}",
+            type="function",
+            function=SimpleNamespace(name=name, arguments=json.dumps(args))
+        )
+
+    def _completion(self, messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> SimpleNamespace:
+        last_user = max((i for i, m in enumerate(messages) if m["role"] == "user"), default=-1)
+        results = [m for m in messages[last_user + 1:] if m["role"] == "tool"]
+        tool_call = None
+        if not results and tools and last_user >= 0:
+            tool_call = self._tool_call(str(messages[last_user]["content"]), tools)
+        if tool_call is not None:
+            message = SimpleNamespace(content=None, tool_calls=[tool_call])
+        else:
+            quoted = "\n\n".join(str(m["content"])[:1000] for m in results)
+            message = SimpleNamespace(
+                content=f"Scripted answer based on the tool results:\n\n{quoted}" if quoted else "Scripted answer.",
+                tool_calls=None
+            )
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+    async def _create(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        **kwargs: Any
+    ) -> SimpleNamespace:
+        await self.fault.acheck()
+        return self._completion(messages, tools)
+
+
+class InMemoryPineconeIndex:
+    """
+    Pinecone data-plane stand-in: upsert / query / fetch / delete / stats
+
+    Each namespace is a ``NumpyVectorIndex`` (exact cosine), so Pinecone-style
+    metadata filters behave the same as on the local backends.
+    """
+
+    def __init__(self, dimension: int, fault: Optional[FaultInjector] = None):
+        self.dimension = dimension
+        self.fault = fault or FaultInjector(name="index")
+        self._namespaces: Dict[str, NumpyVectorIndex] = {}
+        self._lock = threading.Lock()
+
+    def _namespace(self, namespace: str) -> NumpyVectorIndex:
+        with self._lock:
+            index = self._namespaces.get(namespace)
+            if index is None:
+                index = self._namespaces[namespace] = NumpyVectorIndex(self.dimension, indexed_fields=())
+            return index
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = "", **kwargs) -> Dict[str, int]:
+        """Insert or overwrite ``{"id", "values", "metadata"}`` records"""
+        self.fault.check()
+        if not vectors:
+            return {"upserted_count": 0}
+        self._namespace(namespace).add(
+            ids=[record["id"] for record in vectors],
+            vectors=[record["values"] for record in vectors],
+            texts=[""] * len(vectors),
+            metadatas=[record.get("metadata") or {} for record in vectors]
+        )
+        return {"upserted_count": len(vectors)}
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        namespace: str = "",
+        **kwargs
+    ) -> SimpleNamespace:
+        """Top-k matches by cosine similarity"""
+        self.fault.check()
+        index = self._namespace(namespace)
+        hits = index.search(vector, top_k, mask=index.filter_mask(filter))
+        values = index.get_vectors([row for row, _ in hits]) if include_values and hits else None
+        matches = []
+        for i, (row, score) in enumerate(hits):
+            record = index.get(row)
+            matches.append(SimpleNamespace(
+                id=record["id"],
+                score=score,
+                metadata=dict(record["metadata"]) if include_metadata else None,
+                values=values[i].tolist() if values is not None else []
+            ))
+        return SimpleNamespace(matches=matches, namespace=namespace)
+
+    def fetch(self, ids: List[str], namespace: str = "", **kwargs) -> SimpleNamespace:
+        """Stored records for whichever of ``ids`` exist"""
+        self.fault.check()
+        index = self._namespace(namespace)
+        found = [chunk_id for chunk_id in ids if index.contains(chunk_id)]
+        vectors = index.vectors_for_ids(found)
+        return SimpleNamespace(vectors={
+            chunk_id: SimpleNamespace(id=chunk_id, values=vector.tolist())
+            for chunk_id, vector in zip(found, vectors)
+        }, namespace=namespace)
+
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        delete_all: bool = False,
+        namespace: str = "",
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Delete records by ID, or every record of the namespace"""
+        self.fault.check()
+        if delete_all:
+            with self._lock:
+                self._namespaces.pop(namespace, None)
+        elif ids:
+            self._namespace(namespace).delete(ids)
+        return {}
+
+    def describe_index_stats(self, **kwargs) -> Dict[str, Any]:
+        """Vector counts in the same shape as Pinecone's response"""
+        self.fault.check()
+        with self._lock:
+            namespaces = {name: {"vector_count": len(index)} for name, index in self._namespaces.items()}
+        return {
+            "dimension": self.dimension,
+            "total_vector_count": sum(info["vector_count"] for info in namespaces.values()),
+            "namespaces": namespaces,
+            "index_fullness": 0.0,
+        }
+
+
+class InMemoryPinecone:
+    """
+    Pinecone control-plane stand-in
+
+    ``index_name`` already exists, every index is always ready, and indexes
+    are created on first use, so ``VectorService`` runs its Pinecone code path
+    unchanged with no account.
+    """
+
+    def __init__(self, index_name: str, dimension: int = 1536, fault: Optional[FaultInjector] = None):
+        self.index_name = index_name
+        self.dimension = dimension
+        self.fault = fault or FaultInjector(name="index")
+        self._indexes: Dict[str, InMemoryPineconeIndex] = {}
+        self._lock = threading.Lock()
+
+    def list_indexes(self) -> List[SimpleNamespace]:
+        names = {self.index_name, *(host[len("memory://"):] for host in self._indexes)}
+        return [SimpleNamespace(name=name) for name in sorted(names)]
+
+    def create_index(self, name: str, dimension: int, **kwargs) -> None:
+        self.Index(host=f"memory://{name}")
+
+    def describe_index(self, name: str) -> SimpleNamespace:
+        return SimpleNamespace(name=name, host=f"memory://{name}", status={"ready": True})
+
+    def Index(self, host: str, **kwargs) -> InMemoryPineconeIndex:
+        """Index handle for ``host`` (``memory://<name>``); the same object on every call"""
+        with self._lock:
+            index = self._indexes.get(host)
+            if index is None:
+                index = self._indexes[host] = InMemoryPineconeIndex(self.dimension, self.fault)
+            return index
+
+
+def get_chat_model(temperature: float = 0.3):
+    """
+    Chat model for the configured CHAT_PROVIDER
+
+    Returns:
+        ``ScriptedChatModel`` for "scripted", ``ChatOpenAI`` for "openai", or
+        None when no OpenAI key is configured or langchain-openai is missing
+        (callers fall back to demo mode)
+    """
+    provider = settings.CHAT_PROVIDER.lower()
+    if provider not in CHAT_PROVIDERS:
+        raise ValueError(f"Unknown CHAT_PROVIDER '{settings.CHAT_PROVIDER}' (expected one of {list(CHAT_PROVIDERS)})")
+    if provider == "scripted":
+        return ScriptedChatModel(fault=FaultInjector.from_settings("chat", settings.FAKE_CHAT_LATENCY_MS))
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key or api_key == "your_openai_api_key_here":
+        return None
+    try:
+        from langchain_openai import ChatOpenAI
+    except ImportError:
+        # Same as a missing key: AI features run in demo mode
+        return None
+    return ChatOpenAI(model="gpt-3.5-turbo", temperature=temperature, api_key=api_key)
+
+
+def get_tool_chat_client():
+    """
+    Async tool-calling chat client for the configured CHAT_PROVIDER (``/api/chat`` agent)
+
+    Returns:
+        ``ScriptedToolChatClient`` for "scripted", ``AsyncOpenAI`` for "openai",
+        or None when no OpenAI key is configured
+    """
+    provider = settings.CHAT_PROVIDER.lower()
+    if provider not in CHAT_PROVIDERS:
+        raise ValueError(f"Unknown CHAT_PROVIDER '{settings.CHAT_PROVIDER}' (expected one of {list(CHAT_PROVIDERS)})")
+    if provider == "scripted":
+        return ScriptedToolChatClient(fault=FaultInjector.from_settings("chat", settings.FAKE_CHAT_LATENCY_MS))
+
+    if not settings.OPENAI_API_KEY:
+        return None
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
@@ -3,20 +3,26 @@ RAG (Retrieval Augmented Generation) engine
 """
 
 from typing import Dict, Any, List, Optional
-from app.services.vector_store import VectorService
+from app.core.config import settings
+from app.services.vector_store import VectorService, get_vector_service
 
 
 class RAGEngine:
     """Engine for performing RAG operations"""
     
-    def __init__(self, vector_store: VectorService):
+    def __init__(self, vector_store: Optional[VectorService] = None):
         """
         Initialize RAG engine
         
         Args:
-            vector_store: Vector store service instance
+            vector_store: Vector store service instance (defaults to the shared service)
         """
-        self.vector_store = vector_store
+        self._vector_store = vector_store
+    
+    @property
+    def vector_store(self) -> VectorService:
+        """Vector store used for retrieval (resolved lazily)"""
+        return self._vector_store or get_vector_service()
     
     async def query(
         self,
@@ -37,9 +43,10 @@ class RAGEngine:
         """
         try:
             # Retrieve relevant documents
-            relevant_docs = self.vector_store.search(
+            relevant_docs = await self.vector_store.asearch(
                 query=query,
-                k=top_k
+                k=top_k,
+                mmr=settings.CONTEXT_MMR_ENABLED
             )
             
             # Build context from retrieved documents
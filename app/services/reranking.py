@@ -0,0 +1,148 @@
+"""
+Result fusion and re-ranking helpers (no model calls)
+"""
+
+from typing import Any, List, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[str]],
+    k: int = 60,
+    weights: Optional[List[float]] = None
+) -> List[Tuple[str, float]]:
+    """
+    Fuse several ranked ID lists with reciprocal rank fusion
+
+    Each list contributes ``weight / (k + rank)`` (rank starting at 1) to every
+    ID it contains, so items ranked well by any retriever rise to the top and
+    items found by several retrievers rise further. Raw scores are never
+    compared, which is what makes BM25 and cosine rankings combinable.
+
+    Args:
+        rankings: ID lists, best first
+        k: Damping constant (60 is the value from the original paper)
+        weights: Optional weight per ranking (defaults to 1.0 each)
+
+    Returns:
+        List of ``(id, fused_score)`` ordered best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def maximal_marginal_relevance(
+    query_vector: Sequence[float],
+    candidate_vectors: Sequence[Sequence[float]],
+    k: int,
+    lambda_mult: float = 0.5
+) -> List[int]:
+    """
+    Pick ``k`` candidates that are relevant to the query but not to each other
+
+    Each step takes the candidate maximizing
+    ``lambda * sim(query, c) - (1 - lambda) * max sim(c, already selected)``.
+    All pairwise similarities come from one matrix product, and the running
+    "closest selected" similarity is updated with one vector ``maximum`` per
+    step, so selection is O(k * n) NumPy work with no Python inner loop.
+
+    Args:
+        query_vector: Query embedding
+        candidate_vectors: Candidate embeddings (over-fetched, best first)
+        k: Number of candidates to keep
+        lambda_mult: 1.0 = pure relevance, 0.0 = pure diversity
+
+    Returns:
+        Positions into ``candidate_vectors`` in selection order
+    """
+    candidates = np.asarray(candidate_vectors, dtype=np.float32)
+    if candidates.size == 0 or k <= 0:
+        return []
+    query = np.asarray(query_vector, dtype=np.float32)
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+    redundancy = np.full(candidates.shape[0], -np.inf, dtype=np.float32)
+    available = np.ones(candidates.shape[0], dtype=bool)
+    selected: List[int] = []
+    for _ in range(min(k, candidates.shape[0])):
+        if selected:
+            gains = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        else:
+            gains = relevance.copy()
+        gains[~available] = -np.inf
+        best = int(np.argmax(gains))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+    return selected
+
+
+GROUP_AGGREGATES = ("max", "sum")
+
+
+def group_results(
+    results: List[Dict[str, Any]],
+    field: str = "source",
+    n: int = 10,
+    aggregate: str = "max",
+    top_n: int = 3,
+    snippets: int = 2
+) -> List[Dict[str, Any]]:
+    """
+    Collapse chunk hits into one entry per distinct metadata value (e.g. per resume)
+
+    A group's score is its best chunk score (``"max"``) or the sum of its
+    ``top_n`` best chunk scores (``"sum"``, which rewards documents matching in
+    several places). Each group keeps its best chunks as snippets; ``text`` is
+    those snippets joined, ``metadata`` is the best chunk's and ``distance`` is
+    ``1 - best chunk score`` (in the chunk scale whatever the aggregate), so a
+    group can be used anywhere a single search result is expected. A group
+    with any ``degraded`` hit is flagged ``degraded`` too.
+
+    Args:
+        results: Chunk results ordered best first
+        field: Metadata key to group on
+        n: Number of groups to return
+        aggregate: "max" or "sum"
+        top_n: Chunks summed per group when ``aggregate="sum"``
+        snippets: Best chunks kept per group
+
+    Returns:
+        Groups ordered by aggregated score, best first
+    """
+    if aggregate not in GROUP_AGGREGATES:
+        raise ValueError(f"Unknown aggregate '{aggregate}' (expected one of {list(GROUP_AGGREGATES)})")
+    groups: Dict[Any, List[Dict[str, Any]]] = {}
+    for result in results:
+        key = result["metadata"].get(field, result["id"])
+        groups.setdefault(key, []).append(result)
+
+    ranked = []
+    for key, hits in groups.items():
+        hits.sort(key=lambda hit: hit["score"], reverse=True)
+        if aggregate == "max":
+            score = hits[0]["score"]
+        else:
+            score = sum(hit["score"] for hit in hits[:top_n])
+        group = {
+            field: key,
+            "score": score,
+            "distance": 1 - hits[0]["score"],
+            "hits": len(hits),
+            "text": "\n...\n".join(hit["text"] for hit in hits[:snippets]),
+            "metadata": hits[0]["metadata"],
+            "snippets": hits[:snippets],
+        }
+        if any(hit.get("degraded") for hit in hits):
+            group["degraded"] = True
+        ranked.append(group)
+    ranked.sort(key=lambda group: group["score"], reverse=True)
+    return ranked[:n]
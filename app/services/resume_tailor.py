@@ -2,9 +2,10 @@
 AI Resume Tailoring Service
 """
 
-import os
 from typing import Optional
 
+from app.services.providers import get_chat_model
+
 
 def tailor_resume_with_ai(job_description: str, current_resume_text: str) -> str:
     """
@@ -17,10 +18,10 @@ def tailor_resume_with_ai(job_description: str, current_resume_text: str) -> str
     Returns:
         str: AI-tailored resume text
     """
-    # Check if OpenAI API key is available
-    api_key = os.getenv("OPENAI_API_KEY")
+    # Chat model for the configured provider (None = no OpenAI key)
+    llm = get_chat_model(temperature=0.7)
     
-    if not api_key or api_key == "your_openai_api_key_here":
+    if llm is None:
         # Return demo response following the same structured format
         return f"""## 🔍 KEY CHANGES & IMPROVEMENTS
 * **Demo Mode:** Add your OpenAI API key to enable real AI-powered tailoring
@@ -35,17 +36,9 @@ NOTE: This is DEMO MODE. To enable AI-powered resume tailoring with keyword opti
 and intelligent rewriting, please add your OpenAI API key to the .env file."""
     
     try:
-        # Import ChatOpenAI and message types
-        from langchain_openai import ChatOpenAI
+        # Import message types
         from langchain_core.messages import HumanMessage, SystemMessage
         
-        # Initialize ChatOpenAI
-        llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
-            temperature=0.7,
-            api_key=api_key
-        )
-        
         # Create the structured prompt
         system_prompt = """You are an expert resume writer and ATS optimization specialist. 
 Your task is to analyze a resume and job description, then provide a detailed breakdown of changes 
@@ -0,0 +1,98 @@
+"""
+Search result cache with generation-based invalidation
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple, Hashable
+
+
+class SearchResultCache:
+    """
+    LRU + TTL cache of search results
+
+    Every write to the vector store bumps ``generation``; entries remember the
+    generation that was current when their search *started*, so results computed
+    against an older library are never served. The TTL bounds staleness from
+    writers in other processes that this counter cannot see.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 300.0):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: Maximum number of cached result lists
+            ttl_seconds: Lifetime of an entry (0 disables expiry)
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(query: str, k: int, filters: Optional[Dict[str, Any]] = None, **options: Any) -> Hashable:
+        """Build a cache key from the query, k, filters and any extra search options"""
+        extra = json.dumps(
+            {"filters": filters, **options}, sort_keys=True, default=str
+        )
+        return (query, k, extra)
+
+    def get(self, key: Hashable) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results for ``key`` or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                generation, expires_at, results = entry
+                if generation == self.generation and (not expires_at or expires_at > time.monotonic()):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return [dict(result) for result in results]
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, results: List[Dict[str, Any]], generation: int) -> None:
+        """
+        Store results computed by a search that started at ``generation``
+
+        Results from a search that raced with a write are dropped, and so are
+        ``degraded`` results served from a partial fallback.
+        """
+        if any(result.get("degraded") for result in results):
+            return
+        with self._lock:
+            if generation != self.generation or self.max_size <= 0:
+                return
+            expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else 0.0
+            self._entries[key] = (generation, expires_at, [dict(result) for result in results])
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        """Bump the generation so every existing entry becomes stale"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,512 @@
+"""
+Sharded exact index: vectors hash-partitioned into shared memory, searched by a process pool
+"""
+
+import os
+import time
+import uuid
+import zlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import List, Dict, Any, Tuple, Optional
+
+import numpy as np
+
+from app.services.local_index import NumpyVectorIndex
+
+# Shared-memory arrays start on cache-line boundaries
+ALIGNMENT = 64
+
+
+def shard_of(chunk_id: str, shards: int) -> int:
+    """Stable shard number of a chunk ID (same in every process and run)"""
+    return zlib.crc32(chunk_id.encode("utf-8")) % shards
+
+
+def _aligned(nbytes: int) -> int:
+    return (nbytes + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _layout(capacity: int, dimension: int) -> Tuple[int, int, int]:
+    """Byte offsets of the row-number and live arrays, and the segment size"""
+    rows_offset = _aligned(capacity * dimension * 4)
+    live_offset = rows_offset + _aligned(capacity * 8)
+    return rows_offset, live_offset, live_offset + _aligned(capacity)
+
+
+def _views(buffer, capacity: int, dimension: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """``(vectors, global_rows, live)`` arrays over a shard segment"""
+    rows_offset, live_offset, _ = _layout(capacity, dimension)
+    vectors = np.ndarray((capacity, dimension), dtype=np.float32, buffer=buffer)
+    rows = np.ndarray(capacity, dtype=np.int64, buffer=buffer, offset=rows_offset)
+    live = np.ndarray(capacity, dtype=np.bool_, buffer=buffer, offset=live_offset)
+    return vectors, rows, live
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if k >= scores.shape[0]:
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def scan_shard(
+    vectors: np.ndarray,
+    rows: np.ndarray,
+    live: np.ndarray,
+    size: int,
+    queries: np.ndarray,
+    k: int,
+    selected: Optional[np.ndarray] = None
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Exact top-``k`` of one shard for normalized ``queries``
+
+    Args:
+        vectors, rows, live: Shard arrays (see ``_views``)
+        size: Populated rows of the shard
+        queries: ``n x dimension`` normalized float32 queries
+        k: Neighbours per query
+        selected: Optional boolean bitmap over the shard's rows (metadata filter)
+
+    Returns:
+        One ``(global_rows, scores)`` pair per query, best first
+    """
+    mask = live[:size] if selected is None else live[:size] & selected[:size]
+    local = np.flatnonzero(mask)
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32))
+    if local.size == 0 or k <= 0:
+        return [empty for _ in range(queries.shape[0])]
+    matrix = vectors[:size] if local.size == size else vectors[local]
+    scores = queries @ matrix.T
+    results = []
+    for query_scores in scores:
+        top = _top_k(query_scores, k)
+        results.append((rows[local[top]], query_scores[top]))
+    return results
+
+
+# Worker side: segments stay attached between tasks, keyed by (index, shard)
+_attached: Dict[Tuple[str, int], Tuple[str, shared_memory.SharedMemory, tuple]] = {}
+
+
+def _open_segment(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to a segment owned by the parent without a worker-side tracker claiming it
+
+    Spawned pool workers normally share the parent's resource tracker, where
+    attaching re-registers an already registered name (a no-op) and must not
+    be undone. A worker that had to start a tracker of its own would unlink
+    the segment when it exits and report it as leaked, so there the
+    registration is dropped right away.
+    """
+    try:
+        # Python 3.13+: attach without registering at all
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    segment = shared_memory.SharedMemory(name=name)
+    if resource_tracker._resource_tracker._pid is not None:
+        resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+def _attach(index_key: str, shard: int, name: str, capacity: int, dimension: int) -> tuple:
+    cached = _attached.get((index_key, shard))
+    if cached is not None and cached[0] == name:
+        return cached[2]
+    if cached is not None:
+        # The shard grew into a new segment: let go of the old mapping
+        cached[1].close()
+    segment = _open_segment(name)
+    views = _views(segment.buf, capacity, dimension)
+    _attached[(index_key, shard)] = (name, segment, views)
+    return views
+
+
+def _search_worker(
+    index_key: str,
+    shard: int,
+    name: str,
+    capacity: int,
+    dimension: int,
+    size: int,
+    queries: np.ndarray,
+    k: int,
+    packed: Optional[np.ndarray]
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Process-pool task: attach to a shard segment and scan it"""
+    vectors, rows, live = _attach(index_key, shard, name, capacity, dimension)
+    selected = None if packed is None else np.unpackbits(packed, count=size).astype(bool)
+    return scan_shard(vectors, rows, live, size, queries, k, selected)
+
+
+class _Shard:
+    """One shared-memory segment holding a shard's vectors, global row numbers and live flags"""
+
+    def __init__(self, index_key: str, number: int, dimension: int, capacity: int):
+        self.index_key = index_key
+        self.number = number
+        self.dimension = dimension
+        self.size = 0
+        self.generation = 0
+        self.retired: List[shared_memory.SharedMemory] = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        name = f"rag-{self.index_key}-{self.number}-{self.generation}"
+        self.segment = shared_memory.SharedMemory(name=name, create=True, size=_layout(capacity, self.dimension)[2])
+        self.capacity = capacity
+        self.vectors, self.rows, self.live = _views(self.segment.buf, capacity, self.dimension)
+
+    def reserve(self, extra: int) -> None:
+        """Grow into a larger segment; the old one is retired until no query can still be reading it"""
+        needed = self.size + extra
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        segment, vectors, rows, live = self.segment, self.vectors, self.rows, self.live
+        self.generation += 1
+        self._allocate(capacity)
+        self.vectors[:self.size] = vectors[:self.size]
+        self.rows[:self.size] = rows[:self.size]
+        self.live[:self.size] = live[:self.size]
+        # Views must be dropped before the segment can be closed
+        del vectors, rows, live
+        self.retired.append(segment)
+
+    def append(self, matrix: np.ndarray, global_rows: List[int]) -> np.ndarray:
+        """Store normalized rows; returns their shard-local row numbers"""
+        self.reserve(matrix.shape[0])
+        start, end = self.size, self.size + matrix.shape[0]
+        self.vectors[start:end] = matrix
+        self.rows[start:end] = global_rows
+        self.live[start:end] = True
+        self.size = end
+        return np.arange(start, end)
+
+    def task(self) -> tuple:
+        """Arguments identifying the current segment to a worker"""
+        return self.index_key, self.number, self.segment.name, self.capacity, self.dimension, self.size
+
+    def release_retired(self) -> None:
+        for segment in self.retired:
+            segment.close()
+            segment.unlink()
+        self.retired = []
+
+    def close(self) -> None:
+        self.release_retired()
+        self.vectors = self.rows = self.live = None
+        self.segment.close()
+        self.segment.unlink()
+
+
+class ShardedVectorIndex(NumpyVectorIndex):
+    """
+    Exact cosine index whose vectors are split across shared-memory shards
+
+    Payloads, posting lists and tombstones stay in this process exactly as in
+    ``NumpyVectorIndex``; only the vectors move. Each chunk lands in shard
+    ``crc32(id) % shards``, and each shard is one shared-memory segment
+    (vectors, global row numbers, live flags) that the worker processes map
+    without copying. A query is scattered to every shard, each worker
+    returns its exact top-k, and the per-shard lists are merged, so results
+    are identical to a single-matrix scan. Small indexes (below
+    ``parallel_min_rows``) are scanned in-process, where IPC would cost more
+    than the scan.
+    """
+
+    def __init__(
+        self,
+        dimension: int,
+        shards: int = 0,
+        workers: int = 0,
+        initial_capacity: int = 1024,
+        parallel_min_rows: int = 20000,
+        **kwargs: Any
+    ):
+        """
+        Initialize an empty sharded index and start its worker pool
+
+        Args:
+            dimension: Dimension of the stored vectors
+            shards: Number of shards (0 = one per CPU)
+            workers: Worker processes (0 = one per shard)
+            initial_capacity: Rows to preallocate (split across shards, grows by doubling)
+            parallel_min_rows: Below this many rows queries are scanned in-process
+            **kwargs: Passed to ``NumpyVectorIndex`` (only float32 storage is supported)
+        """
+        if kwargs.get("storage", "float32") != "float32" or kwargs.get("coarse_dimension"):
+            raise ValueError("The sharded index stores float32 vectors and scans them in one stage")
+        kwargs.pop("full_precision_path", None)
+        super().__init__(dimension, initial_capacity=initial_capacity, **kwargs)
+        # Vectors live in the shards; the base class matrix is never used
+        self._vectors = np.empty((0, dimension), dtype=np.float32)
+        self.shard_count = max(1, shards or os.cpu_count() or 1)
+        self.workers = max(1, workers or self.shard_count)
+        self.parallel_min_rows = parallel_min_rows
+        self._key = uuid.uuid4().hex[:8]
+        per_shard = max(initial_capacity // self.shard_count, 16)
+        self.shards = [_Shard(self._key, number, dimension, per_shard) for number in range(self.shard_count)]
+        capacity = self._deleted.shape[0]
+        self._row_shard = np.empty(capacity, dtype=np.int32)
+        self._row_local = np.empty(capacity, dtype=np.int64)
+        self._pending_shards: Optional[List[int]] = None
+        self._inflight = 0
+        self.parallel_queries = 0
+        self.local_queries = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        if self.workers > 1 or self.shard_count > 1:
+            # spawn, not fork: the parent runs threads (event loop, index refreshers)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            for future in [self._pool.submit(os.getpid) for _ in range(self.workers)]:
+                future.result()
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Populated rows gathered from every shard (a copy, in global row order)"""
+        return self.get_vectors(np.arange(self._size))
+
+    def _reserve(self, extra: int) -> None:
+        needed = self._size + extra
+        capacity = self._deleted.shape[0]
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        deleted = np.zeros(capacity, dtype=bool)
+        deleted[:self._size] = self._deleted[:self._size]
+        self._deleted = deleted
+        for name in ("_row_shard", "_row_local"):
+            old = getattr(self, name)
+            grown = np.empty(capacity, dtype=old.dtype)
+            grown[:self._size] = old[:self._size]
+            setattr(self, name, grown)
+
+    def add(
+        self,
+        ids: List[str],
+        vectors: List[List[float]],
+        texts: List[str],
+        metadatas: List[dict]
+    ) -> List[int]:
+        """Append vectors (routed to their ID's shard) and their payloads"""
+        with self._lock:
+            self._pending_shards = [shard_of(chunk_id, self.shard_count) for chunk_id in ids]
+            try:
+                rows = super().add(ids, vectors, texts, metadatas)
+            finally:
+                self._pending_shards = None
+            self._release_retired()
+            return rows
+
+    def _store(self, start: int, matrix: np.ndarray) -> None:
+        """Write normalized rows into their shards (called by ``add`` with the lock held)"""
+        assignment = np.asarray(self._pending_shards, dtype=np.int32)
+        global_rows = np.arange(start, start + matrix.shape[0])
+        for shard in self.shards:
+            positions = np.flatnonzero(assignment == shard.number)
+            if positions.size:
+                local = shard.append(matrix[positions], global_rows[positions])
+                self._row_shard[global_rows[positions]] = shard.number
+                self._row_local[global_rows[positions]] = local
+
+    def load_arrays(self, vectors: np.ndarray, ids: List[str], texts: List[str], metadatas: List[dict]) -> None:
+        """Copy a normalized matrix into the shards (shards cannot adopt an external buffer)"""
+        self.add(ids, vectors, texts, metadatas)
+
+    def _tombstone(self, ids: List[str]) -> int:
+        rows = [self._id_rows[chunk_id] for chunk_id in ids if chunk_id in self._id_rows]
+        removed = super()._tombstone(ids)
+        for row in rows:
+            self.shards[self._row_shard[row]].live[self._row_local[row]] = False
+        return removed
+
+    def get_vectors(self, rows) -> np.ndarray:
+        rows = np.asarray(rows, dtype=np.int64)
+        out = np.empty((rows.shape[0], self.dimension), dtype=np.float32)
+        owners = self._row_shard[rows]
+        for shard in self.shards:
+            positions = np.flatnonzero(owners == shard.number)
+            if positions.size:
+                out[positions] = shard.vectors[self._row_local[rows[positions]]]
+        return out
+
+    def _row(self, row: int) -> np.ndarray:
+        return self.get_vectors([row])[0]
+
+    def search_many(
+        self,
+        query_vectors: List[List[float]],
+        k: int,
+        mask: Optional[np.ndarray] = None,
+        parallel: Optional[bool] = None
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Scatter-gather top-``k`` search
+
+        Args:
+            query_vectors: Query embeddings
+            k: Number of neighbours per query
+            mask: Optional boolean row bitmap shared by every query
+            parallel: Force (True) or skip (False) the worker pool; None
+                decides by index size
+
+        Returns:
+            One ``(row, cosine_similarity)`` list per query, best first
+        """
+        queries = np.asarray(query_vectors, dtype=np.float32).reshape(-1, self.dimension)
+        if self._size == 0 or k <= 0:
+            return [[] for _ in range(queries.shape[0])]
+        queries = self._normalize(queries)
+        if parallel is None:
+            parallel = len(self) >= self.parallel_min_rows
+        if not parallel or self._pool is None:
+            # Snapshot the shard arrays under the lock and scan outside it, so writers
+            # are not held up; segments they retire meanwhile stay mapped until we finish
+            with self._lock:
+                views = [
+                    (
+                        shard.vectors, shard.rows, shard.live, shard.size,
+                        None if mask is None else mask[shard.rows[:shard.size]]
+                    )
+                    for shard in self.shards
+                ]
+                self._inflight += 1
+                self.local_queries += 1
+            try:
+                partials = [
+                    scan_shard(vectors, rows, live, size, queries, k, selected)
+                    for vectors, rows, live, size, selected in views
+                ]
+            finally:
+                # Views must be dropped before a retired segment can be closed
+                views = None
+                with self._lock:
+                    self._inflight -= 1
+                    self._release_retired()
+            return self._merge(partials, queries.shape[0], k)
+
+        with self._lock:
+            tasks = [
+                (
+                    *shard.task(),
+                    None if mask is None else np.packbits(mask[shard.rows[:shard.size]])
+                )
+                for shard in self.shards
+            ]
+            self._inflight += 1
+            self.parallel_queries += 1
+        try:
+            futures = [
+                self._pool.submit(_search_worker, *task[:6], queries, k, task[6])
+                for task in tasks
+            ]
+            partials = [future.result() for future in futures]
+        finally:
+            with self._lock:
+                self._inflight -= 1
+                self._release_retired()
+        return self._merge(partials, queries.shape[0], k)
+
+    def _merge(self, partials: List[List[Tuple[np.ndarray, np.ndarray]]], count: int, k: int) -> List[List[Tuple[int, float]]]:
+        """Combine per-shard top-k lists (rows deleted since the scan are dropped)"""
+        results = []
+        for i in range(count):
+            rows = np.concatenate([partial[i][0] for partial in partials])
+            scores = np.concatenate([partial[i][1] for partial in partials])
+            keep = ~self._deleted[rows]
+            rows, scores = rows[keep], scores[keep]
+            results.append([(int(rows[j]), float(scores[j])) for j in _top_k(scores, k)] if rows.size else [])
+        return results
+
+    def _release_retired(self) -> None:
+        """Unlink segments replaced by growth once no scatter can still be reading them (lock held)"""
+        if self._inflight == 0:
+            for shard in self.shards:
+                shard.release_retired()
+
+    def memory_bytes(self) -> int:
+        """Bytes of populated shard rows (shared with the workers, not copied)"""
+        return int(sum(shard.size for shard in self.shards) * self.dimension * 4)
+
+    def shard_stats(self) -> Dict[str, Any]:
+        """Shard sizes and how queries were executed"""
+        return {
+            "shards": self.shard_count,
+            "workers": self.workers if self._pool is not None else 0,
+            "rows_per_shard": [shard.size for shard in self.shards],
+            "parallel_min_rows": self.parallel_min_rows,
+            "parallel_queries": self.parallel_queries,
+            "local_queries": self.local_queries,
+        }
+
+    def shard_report(self, k: int = 10, sample: int = 100, seed: int = 0) -> Dict[str, Any]:
+        """
+        Verify scatter-gather results against an exact single-matrix scan and time both
+
+        Stored vectors are sampled as queries. Ground truth scores every live
+        vector in this process with one matrix product.
+
+        Args:
+            k: Number of neighbours compared per query
+            sample: Number of stored vectors used as queries
+            seed: Sampling seed
+
+        Returns:
+            Dictionary with recall@k (1.0 when the merge is exact; ties at the
+            k-th score count as hits), the largest score difference, and
+            per-query scan times for both paths
+        """
+        report: Dict[str, Any] = {**self.shard_stats(), "vectors": len(self)}
+        live = self.live_rows()
+        if live.size == 0:
+            return report
+        rng = np.random.default_rng(seed)
+        queries = self.get_vectors(rng.choice(live, size=min(sample, live.size), replace=False))
+
+        start = time.perf_counter()
+        matrix = self.get_vectors(live)
+        exact = queries @ matrix.T
+        truth = [live[_top_k(scores, k)] for scores in exact]
+        single_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        sharded = self.search_many(queries, k, parallel=self._pool is not None)
+        sharded_ms = (time.perf_counter() - start) * 1000
+
+        hits = expected = 0
+        score_error = 0.0
+        for i, result in enumerate(sharded):
+            expected += len(truth[i])
+            if not result:
+                continue
+            exact_scores = np.sort(exact[i])[::-1][:len(result)]
+            expected_rows = set(truth[i].tolist())
+            # Rows tied with the k-th exact score are equally correct answers
+            hits += sum(1 for row, score in result if row in expected_rows or score >= exact_scores[-1] - 1e-6)
+            score_error = max(score_error, float(np.abs(exact_scores - [s for _, s in result]).max()))
+
+        report["k"] = k
+        report["queries"] = len(queries)
+        report["recall"] = hits / expected
+        report["max_score_error"] = score_error
+        report["single_process_ms_per_query"] = single_ms / len(queries)
+        report["sharded_ms_per_query"] = sharded_ms / len(queries)
+        report["speedup"] = single_ms / sharded_ms if sharded_ms else None
+        return report
+
+    def close(self) -> None:
+        """Stop the workers and unlink every shared-memory segment"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        for shard in self.shards:
+            shard.close()
+        self.shards = []
@@ -0,0 +1,160 @@
+"""
+Binary snapshots of the vector index: vectors.npy + columnar chunks.json + manifest.json
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+SNAPSHOT_FORMAT_VERSION = 1
+VECTORS_FILE = "vectors.npy"
+CHUNKS_FILE = "chunks.json"
+MANIFEST_FILE = "manifest.json"
+
+
+class SnapshotWriter:
+    """
+    Stream chunks into a snapshot directory
+
+    Vectors go straight into a preallocated ``.npy`` file through a memory
+    map, so exporting never holds a second copy of the matrix in memory. Text
+    and metadata are written as one column per field.
+    """
+
+    def __init__(self, directory: str, dimension: int, capacity: int):
+        """
+        Create the snapshot files
+
+        Args:
+            directory: Snapshot directory (created if missing, files are overwritten)
+            dimension: Vector dimension
+            capacity: Upper bound on the number of chunks that will be appended
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.dimension = dimension
+        self.count = 0
+        self._path = os.path.join(directory, VECTORS_FILE)
+        self._vectors = np.lib.format.open_memmap(
+            self._path, mode="w+", dtype=np.float32, shape=(max(capacity, 1), dimension)
+        )
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+
+    def append(self, ids: List[str], vectors, texts: List[str], metadatas: List[dict]) -> None:
+        """Add a batch of chunks (vectors as an ``n x dimension`` array or list of lists)"""
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        end = self.count + matrix.shape[0]
+        if end > self._vectors.shape[0]:
+            raise ValueError(f"Snapshot capacity {self._vectors.shape[0]} exceeded")
+        self._vectors[self.count:end] = matrix
+        self._ids.extend(ids)
+        self._texts.extend(texts)
+        self._metadatas.extend(dict(metadata) for metadata in metadatas)
+        self.count = end
+
+    def close(
+        self,
+        embedding_model: str,
+        documents: Optional[List[Dict[str, Any]]] = None,
+        **extra: Any
+    ) -> Dict[str, Any]:
+        """
+        Finish the snapshot and write the manifest
+
+        Args:
+            embedding_model: Model that produced the vectors (checked on restore)
+            documents: Document registry rows to restore alongside the chunks
+            **extra: Additional manifest fields (e.g. source backend)
+
+        Returns:
+            The manifest
+        """
+        self._vectors.flush()
+        capacity = self._vectors.shape[0]
+        del self._vectors
+        if self.count != capacity:
+            # Fewer chunks than reserved (e.g. IDs missing from the index): trim the file
+            trimmed = np.load(self._path, mmap_mode="r")[:self.count].copy()
+            np.save(self._path, trimmed)
+
+        with open(os.path.join(self.directory, CHUNKS_FILE), "w", encoding="utf-8") as f:
+            json.dump(
+                {"ids": self._ids, "texts": self._texts, "metadatas": self._metadatas, "documents": documents or []},
+                f,
+                default=str
+            )
+        manifest = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "embedding_model": embedding_model,
+            "dimension": self.dimension,
+            "count": self.count,
+            "normalized": True,
+            "created_at": datetime.utcnow().isoformat(),
+            "files": {"vectors": VECTORS_FILE, "chunks": CHUNKS_FILE},
+            **extra,
+        }
+        with open(os.path.join(self.directory, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+
+def read_manifest(directory: str) -> Dict[str, Any]:
+    """Load and sanity-check a snapshot manifest"""
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No snapshot manifest at {path}")
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version {manifest.get('format_version')}")
+    return manifest
+
+
+def read_snapshot(directory: str, mmap: bool = True) -> Dict[str, Any]:
+    """
+    Open a snapshot
+
+    Args:
+        directory: Snapshot directory
+        mmap: Memory-map the vectors read-only instead of reading them into memory
+
+    Returns:
+        dict with ``manifest``, ``vectors`` (``count x dimension`` float32),
+        ``ids``, ``texts``, ``metadatas`` and ``documents``
+    """
+    manifest = read_manifest(directory)
+    vectors = np.load(os.path.join(directory, manifest["files"]["vectors"]), mmap_mode="r" if mmap else None)
+    with open(os.path.join(directory, manifest["files"]["chunks"]), encoding="utf-8") as f:
+        columns = json.load(f)
+    count = manifest["count"]
+    if vectors.shape != (count, manifest["dimension"]) or len(columns["ids"]) != count:
+        raise ValueError(f"Snapshot at {directory} is inconsistent with its manifest")
+    return {"manifest": manifest, "vectors": vectors, **columns}
+
+
+def mean_pool_documents(
+    ids: List[str],
+    vectors: np.ndarray,
+    metadatas: List[Dict[str, Any]]
+) -> Dict[str, np.ndarray]:
+    """Unit-length mean vector per ``document_id`` (chunks without one are skipped)"""
+    rows: Dict[str, List[int]] = {}
+    for row, metadata in enumerate(metadatas):
+        document_id = metadata.get("document_id")
+        if document_id:
+            rows.setdefault(document_id, []).append(row)
+    pooled = {}
+    for document_id, document_rows in rows.items():
+        mean = np.asarray(vectors[document_rows], dtype=np.float32).mean(axis=0)
+        pooled[document_id] = mean / max(float(np.linalg.norm(mean)), 1e-12)
+    return pooled
+
+
+def chunk_index(chunk_id: str) -> int:
+    """Position of a ``<document_id>-<index>`` chunk within its document"""
+    return int(chunk_id.rsplit("-", 1)[1])
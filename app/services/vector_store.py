@@ -1,48 +1,141 @@
 """
-Vector store service using Pinecone with client-side OpenAI embeddings
+Vector store service using Pinecone (or an in-process NumPy index) with client-side OpenAI embeddings
 """
 
+import asyncio
 import os
+import threading
 import time
-from typing import List, Dict, Any
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 from dotenv import load_dotenv
 
+from app.core.config import settings
+from app.services.local_index import NumpyVectorIndex
+from app.services.sharded_index import ShardedVectorIndex
+from app.services.hnsw_index import HNSWIndex
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.search_cache import SearchResultCache
+from app.services.index_stats import IndexStatsTracker
+from app.services.ingest_pipeline import EmbeddingUpsertPipeline
+from app.services.metadata_filter import validate_filter
+from app.services.lexical_index import BM25Index
+from app.services.reranking import reciprocal_rank_fusion, maximal_marginal_relevance, group_results
+from app.services.document_registry import get_document_registry
+from app.services.index_mirror import IndexMirror
+from app.services.snapshot import SnapshotWriter, read_snapshot, mean_pool_documents, chunk_index
+from app.services.providers import (
+    EMBEDDING_PROVIDERS, FaultInjector, HashingEmbeddings, InMemoryPinecone
+)
+
 # Load environment variables before anything else
 load_dotenv()
 
-# Import Pinecone and LangChain Pinecone
+# Import Pinecone (only required for the Pinecone backend)
 try:
     from pinecone import Pinecone, ServerlessSpec
-    from langchain_pinecone import PineconeVectorStore
     PINECONE_AVAILABLE = True
-except ImportError as e:
+except ImportError:
     PINECONE_AVAILABLE = False
-    raise ImportError(f"Pinecone is required. Install with: pip install pinecone-client langchain-pinecone") from e
 
-# Import OpenAI Embeddings for client-side embedding generation
+# httpx ships with the OpenAI SDK; used to share one pooled HTTP client per process
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+# Import OpenAI Embeddings for client-side embedding generation (not needed with EMBEDDING_PROVIDER=hashing)
 try:
     from langchain_openai import OpenAIEmbeddings
     OPENAI_EMBEDDINGS_AVAILABLE = True
-except ImportError as e:
+except ImportError:
     OPENAI_EMBEDDINGS_AVAILABLE = False
-    raise ImportError(f"OpenAI embeddings required. Install with: pip install langchain-openai") from e
+
+
+# Defaults; a service built for an embedding migration overrides both
+EMBEDDING_MODEL = settings.EMBEDDING_MODEL
+EMBEDDING_DIMENSION = settings.EMBEDDING_DIMENSION
+LOCAL_BACKENDS = ("numpy", "hnsw", "sharded")
+# Pinecone accepts at most 1000 IDs per delete request
+PINECONE_DELETE_BATCH = 1000
+PINECONE_FETCH_BATCH = 100
+SEARCH_MODES = ("dense", "lexical", "hybrid")
+# Rows copied per step when exporting or bulk-loading a local index
+SNAPSHOT_BATCH_ROWS = 4096
 
 
 class VectorService:
-    """Service for managing vector store operations with Pinecone"""
+    """Service for managing vector store operations with Pinecone or a local NumPy index"""
     
-    def __init__(self):
-        """Initialize Pinecone vector store"""
+    def __init__(
+        self,
+        embedding_model: Optional[str] = None,
+        dimension: Optional[int] = None,
+        index_name: Optional[str] = None,
+        restore_snapshot: bool = True
+    ):
+        """
+        Initialize the configured vector store backend
+        
+        Args:
+            embedding_model: OpenAI embedding model (default EMBEDDING_MODEL)
+            dimension: Embedding dimension (default EMBEDDING_DIMENSION)
+            index_name: Pinecone index (default PINECONE_INDEX_NAME)
+            restore_snapshot: Local backends: load SNAPSHOT_RESTORE_PATH at startup
+        """
+        self.init_timings: Dict[str, float] = {}
+        self.model = embedding_model or EMBEDDING_MODEL
+        self.dimension = dimension or EMBEDDING_DIMENSION
+        # Set while an embedding-model migration forwards writes and shadow reads
+        self.migration = None
+        self._http_client = None
+        self._http_async_client = None
+        started = time.perf_counter()
+        self.index_stats = IndexStatsTracker(refresh_interval=settings.INDEX_STATS_REFRESH_SECONDS)
+        self.lexical_index = BM25Index(k1=settings.BM25_K1, b=settings.BM25_B) if settings.LEXICAL_INDEX_ENABLED else None
+        # Local backends keep document vectors here; Pinecone uses DOCUMENT_VECTOR_NAMESPACE
+        self.document_index = None
+        # Hot local copy of Pinecone vectors (Pinecone backend with MIRROR_ENABLED)
+        self.mirror: Optional[IndexMirror] = None
+        self._mirror_hits: Dict[str, int] = {}
+        # Guards the mirror counters and promote decisions (search_batch workers, sync MCP searches)
+        self._mirror_lock = threading.Lock()
+        self._mirror_executor: Optional[ThreadPoolExecutor] = None
+        self.search_cache = SearchResultCache(
+            max_size=settings.SEARCH_CACHE_MAX_SIZE if settings.SEARCH_CACHE_ENABLED else 0,
+            ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS
+        )
+        
+        backend = settings.VECTOR_BACKEND.lower()
+        if backend in LOCAL_BACKENDS:
+            self._init_local(backend)
+            self.backend = backend
+            if restore_snapshot and settings.SNAPSHOT_RESTORE_PATH:
+                # Warm start: adopt a snapshot instead of re-embedding every document
+                with self._init_step("snapshot_restore"):
+                    self.import_snapshot(settings.SNAPSHOT_RESTORE_PATH)
+            self.init_timings["total"] = (time.perf_counter() - started) * 1000
+            print(f"✓ VectorService initialized with in-process {backend} index")
+            return
+        if backend not in ("pinecone", "memory"):
+            raise ValueError(
+                f"Unknown VECTOR_BACKEND '{settings.VECTOR_BACKEND}' "
+                f"(expected 'pinecone', 'memory', 'numpy', 'hnsw' or 'sharded')"
+            )
+        
         # Check for Pinecone configuration
         pinecone_api_key = os.getenv("PINECONE_API_KEY")
-        pinecone_index_name = os.getenv("PINECONE_INDEX_NAME", "resume-index")
+        pinecone_index_name = index_name or os.getenv("PINECONE_INDEX_NAME", "resume-index")
         
         print(f"🔍 DEBUG: PINECONE_API_KEY={'SET' if pinecone_api_key else 'NOT SET'}")
         print(f"🔍 DEBUG: PINECONE_INDEX_NAME={pinecone_index_name}")
         
-        # Validate Pinecone credentials
-        if not pinecone_api_key or pinecone_api_key == "your_pinecone_api_key_here":
+        # Validate Pinecone credentials (the in-memory stand-in needs none)
+        if backend == "pinecone" and (not pinecone_api_key or pinecone_api_key == "your_pinecone_api_key_here"):
             raise ValueError(
                 "PINECONE_API_KEY is required. Please set it in your .env file.\n"
                 "Get your API key from: https://app.pinecone.io/"
@@ -50,135 +143,1715 @@ class VectorService:
         
         # Initialize Pinecone
         try:
-            self._init_pinecone(pinecone_api_key, pinecone_index_name)
+            self._init_pinecone(pinecone_api_key, pinecone_index_name, in_memory=backend == "memory")
+            # The stand-in runs the exact Pinecone code path
             self.backend = "pinecone"
+            if self.lexical_index is not None:
+                # Pinecone persists across restarts, so rebuild BM25 from the registry's chunk text
+                threading.Thread(target=self._rebuild_lexical_index, name="bm25-rebuild", daemon=True).start()
+            self.init_timings["total"] = (time.perf_counter() - started) * 1000
             print(f"✓ VectorService initialized with Pinecone (index: {pinecone_index_name})")
         except Exception as e:
             print(f"❌ Pinecone initialization failed: {e}")
             raise RuntimeError(f"Failed to initialize Pinecone: {e}") from e
     
-    def _init_pinecone(self, api_key: str, index_name: str):
-        """Initialize Pinecone vector store with CLIENT-SIDE OpenAI embeddings"""
-        # Initialize Pinecone client
-        self.pc = Pinecone(api_key=api_key)
-        self.index_name = index_name
+    @contextmanager
+    def _init_step(self, name: str):
+        """Record how long an initialization step took (reported by ``get_stats``)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.init_timings[name] = (time.perf_counter() - started) * 1000
+    
+    def _init_embeddings(self):
+        """Initialize the configured embedder (OpenAI, or offline feature hashing)"""
+        provider = settings.EMBEDDING_PROVIDER.lower()
+        if provider not in EMBEDDING_PROVIDERS:
+            raise ValueError(
+                f"Unknown EMBEDDING_PROVIDER '{settings.EMBEDDING_PROVIDER}' (expected one of {list(EMBEDDING_PROVIDERS)})"
+            )
+        if provider == "hashing":
+            with self._init_step("embeddings"):
+                embeddings = HashingEmbeddings(
+                    dimension=self.dimension,
+                    fault=FaultInjector.from_settings("embeddings", settings.FAKE_EMBEDDING_LATENCY_MS)
+                )
+            # Distinct cache namespace: hashed vectors must never be served for OpenAI lookups
+            self.embedding_model = f"hashing-{self.dimension}"
+            print(f"  Using offline hashing embeddings ({self.dimension}d)")
+        else:
+            embeddings = self._init_openai_embeddings()
+            # Dimension is part of the namespace: shortened text-embedding-3 vectors must not be
+            # served to a service (or migration target) using another dimension of the same model
+            self.embedding_model = f"{self.model}-{self.dimension}"
         
-        # Initialize OpenAI embeddings for CLIENT-SIDE generation
+        # Re-ingested chunks and repeated queries are served from the cache
+        if settings.EMBEDDING_CACHE_ENABLED:
+            self.embeddings = CachedEmbeddings(
+                embeddings,
+                model_name=self.embedding_model,
+                cache_dir=settings.EMBEDDING_CACHE_DIR or None,
+                memory_items=settings.EMBEDDING_CACHE_MEMORY_ITEMS,
+                disk_max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES
+            )
+            print(f"  Embedding cache enabled (disk: {settings.EMBEDDING_CACHE_DIR or 'off'})")
+        else:
+            self.embeddings = embeddings
+    
+    def _init_openai_embeddings(self):
+        """OpenAI embeddings for CLIENT-SIDE generation"""
+        if not OPENAI_EMBEDDINGS_AVAILABLE:
+            raise ImportError("OpenAI embeddings required. Install with: pip install langchain-openai")
         openai_api_key = os.getenv("OPENAI_API_KEY")
         if not openai_api_key or openai_api_key == "your_openai_api_key_here":
-            raise Exception("OPENAI_API_KEY required for Pinecone client-side embeddings")
+            raise Exception("OPENAI_API_KEY required for client-side embeddings")
         
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small",  # 1536 dimensions
-            api_key=openai_api_key
-        )
-        print(f"  Using OpenAI embeddings (text-embedding-3-small, 1536d)")
-        
-        # Check if index exists
-        existing_indexes = [index.name for index in self.pc.list_indexes()]
-        
-        if index_name not in existing_indexes:
-            print(f"⚠️  Index '{index_name}' not found. Creating...")
-            # Create index with correct dimension for OpenAI embeddings
-            self.pc.create_index(
-                name=index_name,
-                dimension=1536,  # text-embedding-3-small dimension
-                metric="cosine",
-                spec=ServerlessSpec(
-                    cloud="aws",
-                    region="us-east-1"
+        # One pooled keep-alive client per process instead of a new TLS handshake per service
+        http_clients = {}
+        if HTTPX_AVAILABLE:
+            limits = httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_CONNECTIONS
+            )
+            timeout = httpx.Timeout(60.0, connect=10.0)
+            self._http_client = httpx.Client(limits=limits, timeout=timeout)
+            self._http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+            http_clients = {
+                "http_client": self._http_client,
+                "http_async_client": self._http_async_client
+            }
+        
+        if self.model.startswith("text-embedding-3"):
+            # text-embedding-3 models return shortened vectors on request
+            http_clients["dimensions"] = self.dimension
+        with self._init_step("embeddings"):
+            embeddings = OpenAIEmbeddings(
+                model=self.model,
+                api_key=openai_api_key,
+                **http_clients
+            )
+        print(f"  Using OpenAI embeddings ({self.model}, {self.dimension}d)")
+        return embeddings
+    
+    def _init_local(self, backend: str):
+        """Initialize an in-process index (vectors live in this process only)"""
+        self._init_embeddings()
+        storage = {
+            "storage": settings.VECTOR_STORAGE,
+            "rescore": settings.VECTOR_RESCORE,
+            "rescore_factor": settings.VECTOR_RESCORE_FACTOR,
+            "full_precision_path": settings.VECTOR_FULL_PRECISION_PATH or None,
+            "coarse_dimension": settings.VECTOR_COARSE_DIMENSION or None,
+            "coarse_factor": settings.VECTOR_COARSE_FACTOR,
+        }
+        with self._init_step("local_index"):
+            if backend == "hnsw":
+                self.index = HNSWIndex(
+                    dimension=self.dimension,
+                    M=settings.HNSW_M,
+                    ef_construction=settings.HNSW_EF_CONSTRUCTION,
+                    ef_search=settings.HNSW_EF_SEARCH,
+                    **storage
                 )
+            elif backend == "sharded":
+                if settings.VECTOR_STORAGE != "float32" or settings.VECTOR_COARSE_DIMENSION:
+                    print("   Sharded backend scans float32 in one stage; VECTOR_STORAGE/VECTOR_COARSE_DIMENSION ignored")
+                self.index = ShardedVectorIndex(
+                    dimension=self.dimension,
+                    shards=settings.SHARD_COUNT,
+                    workers=settings.SHARD_WORKERS,
+                    parallel_min_rows=settings.SHARD_PARALLEL_MIN_ROWS
+                )
+                print(f"   Sharded index: {self.index.shard_count} shards, {self.index.workers} worker processes")
+            else:
+                self.index = NumpyVectorIndex(dimension=self.dimension, **storage)
+            if settings.DOCUMENT_VECTORS_ENABLED:
+                # One mean-pooled vector per document: tiny, so always exact float32
+                self.document_index = NumpyVectorIndex(dimension=self.dimension, initial_capacity=64)
+        print(f"   Vector storage: {settings.VECTOR_STORAGE} (rescore: {settings.VECTOR_RESCORE})")
+        if self.index.coarse_dimension:
+            print(f"   Two-stage search: {self.index.coarse_dimension}-d scan, {self.dimension}-d re-rank")
+    
+    def _init_pinecone(self, api_key: Optional[str], index_name: str, in_memory: bool = False):
+        """Initialize Pinecone (or its in-memory stand-in) with CLIENT-SIDE embeddings"""
+        if not in_memory and not PINECONE_AVAILABLE:
+            raise ImportError("Pinecone is required. Install with: pip install \"pinecone[asyncio]\"")
+        
+        # Initialize Pinecone client (pooled connections shared by every request)
+        with self._init_step("pinecone_client"):
+            if in_memory:
+                self.pc = InMemoryPinecone(
+                    index_name=index_name,
+                    dimension=self.dimension,
+                    fault=FaultInjector.from_settings("index", settings.FAKE_INDEX_LATENCY_MS)
+                )
+                print("  Using in-memory Pinecone stand-in (nothing is persisted)")
+            else:
+                self.pc = Pinecone(api_key=api_key, pool_threads=settings.PINECONE_POOL_THREADS)
+        self.index_name = index_name
+        
+        self._init_embeddings()
+        
+        # Raw index handles; vectors are embedded CLIENT-SIDE before every upsert/query
+        self._pinecone_index = None
+        self._async_pinecone_index = None
+        self._index_ready = threading.Event()
+        self._index_error: Optional[Exception] = None
+        self.pinecone_host = os.getenv("PINECONE_INDEX_HOST") or None
+        if self.pinecone_host:
+            # A known host needs no control-plane lookup, so queries can start right away
+            with self._init_step("pinecone_index"):
+                self._pinecone_index = self.pc.Index(
+                    host=self.pinecone_host, pool_threads=settings.PINECONE_POOL_THREADS
+                )
+        
+        if settings.MIRROR_ENABLED:
+            self.mirror = IndexMirror(
+                self.dimension, max_vectors=settings.MIRROR_MAX_VECTORS, registry=get_document_registry()
             )
-            print(f"✓ Created Pinecone index: {index_name}")
-            # Wait for index to be ready
-            time.sleep(5)
+            self._mirror_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mirror")
         
-        # Initialize LangChain PineconeVectorStore with CLIENT-SIDE embeddings
-        self.vectorstore = PineconeVectorStore(
-            index_name=index_name,
-            embedding=self.embeddings,  # CRITICAL: Client-side embeddings
-            pinecone_api_key=api_key
-        )
+        # Existence/readiness checks are control-plane round trips: run them once, off the startup path
+        threading.Thread(target=self._check_index, name="pinecone-index-check", daemon=True).start()
+    
+    def _check_index(self) -> None:
+        """Create the index if missing and wait until it is ready (background thread)"""
+        try:
+            with self._init_step("index_check"):
+                existing_indexes = [index.name for index in self.pc.list_indexes()]
+                if self.index_name not in existing_indexes:
+                    print(f"⚠️  Index '{self.index_name}' not found. Creating...")
+                    # Create index with correct dimension for OpenAI embeddings
+                    self.pc.create_index(
+                        name=self.index_name,
+                        dimension=self.dimension,
+                        metric="cosine",
+                        spec=ServerlessSpec(
+                            cloud="aws",
+                            region="us-east-1"
+                        )
+                    )
+                    print(f"✓ Created Pinecone index: {self.index_name}")
+                description = self._wait_until_ready()
+                if self._pinecone_index is None:
+                    self.pinecone_host = description.host
+                    self._pinecone_index = self.pc.Index(
+                        host=self.pinecone_host, pool_threads=settings.PINECONE_POOL_THREADS
+                    )
+            print(f"✓ Pinecone index '{self.index_name}' ready ({self.init_timings['index_check']:.0f}ms)")
+            # Counts are served from memory from now on; the backend is polled in the background
+            self.index_stats.refresh_fn = self._refresh_index_stats
+            self.index_stats.start()
+        except Exception as e:
+            self._index_error = e
+            print(f"❌ Pinecone index check failed: {e}")
+        finally:
+            self._index_ready.set()
+        if self.mirror is not None and self._index_error is None:
+            # Queries go remote while the mirror fills; writes meanwhile are written through
+            self._warm_mirror()
+    
+    def _warm_mirror(self) -> None:
+        """
+        Copy every registered chunk from Pinecone into the mirror (index-check thread)
+        
+        Skipped when the library is larger than the mirror. If afterwards the
+        mirror holds as many vectors as Pinecone, it is marked complete and
+        every query is answered locally until a stats refresh finds the counts
+        apart (see ``_check_mirror``).
+        """
+        try:
+            if get_document_registry().stats()["chunks"] > settings.MIRROR_MAX_VECTORS:
+                print("   Mirror warm-up skipped: library larger than MIRROR_MAX_VECTORS")
+                return
+            with self._init_step("mirror_warm"):
+                for chunks in get_document_registry().iter_chunks(batch_size=PINECONE_FETCH_BATCH):
+                    self._mirror_fetch(chunks)
+                stats = self._fetch_index_stats()
+            remote = self._default_namespace_count(stats)
+            self.mirror.complete = remote == len(self.mirror)
+            self._check_mirror(stats)
+            print(
+                f"✓ Mirror warmed with {len(self.mirror)} of {remote} vectors "
+                f"({'complete' if self.mirror.complete else 'partial'})"
+            )
+        except Exception as e:
+            print(f"⚠️  Mirror warm-up failed: {e}")
+    
+    def _check_mirror(self, stats: Dict[str, Any]) -> None:
+        """
+        Re-validate the mirror against fresh Pinecone counts
+        
+        Writes made by other processes (other workers, the migration script)
+        never reach this process's mirror. When the remote count no longer
+        matches, the mirror stops answering unscoped queries; it is marked
+        complete again only by a new warm-up. ``source`` filters are served
+        locally only while the registry holds as many chunks as Pinecone
+        (otherwise unregistered legacy vectors could be missed).
+        """
+        remote = self._default_namespace_count(stats)
+        self.mirror.sources_registered = get_document_registry().stats()["chunks"] == remote
+        if self.mirror.complete and remote != len(self.mirror):
+            self.mirror.complete = False
+            print(f"⚠️  Mirror out of date ({len(self.mirror)} of {remote} vectors); querying Pinecone")
+    
+    @staticmethod
+    def _default_namespace_count(stats: Dict[str, Any]) -> int:
+        """Chunk vectors in the default namespace (reported as "" or "__default__")"""
+        namespaces = stats["namespaces"]
+        remote = namespaces.get("", namespaces.get("__default__"))
+        if remote is None:
+            remote = stats["total_vectors"] - namespaces.get(settings.DOCUMENT_VECTOR_NAMESPACE, 0)
+        return remote
+    
+    def _mirror_fetch(self, chunks: List[Dict[str, Any]]) -> None:
+        """Fetch the vectors of registry chunks from Pinecone into the mirror"""
+        response = self.pinecone_index.fetch(ids=[chunk["id"] for chunk in chunks])
+        found = [chunk for chunk in chunks if chunk["id"] in response.vectors]
+        if found:
+            self.mirror.add(
+                [chunk["id"] for chunk in found],
+                [response.vectors[chunk["id"]].values for chunk in found],
+                [chunk["text"] for chunk in found],
+                [chunk["metadata"] for chunk in found]
+            )
+    
+    def _promote_document(self, document_id: str) -> None:
+        """Bring a frequently hit document into the mirror (mirror thread)"""
+        try:
+            chunks = get_document_registry().chunks(document_id)
+            if not chunks or len(chunks) > settings.MIRROR_MAX_VECTORS:
+                return
+            for start in range(0, len(chunks), PINECONE_FETCH_BATCH):
+                self._mirror_fetch(chunks[start:start + PINECONE_FETCH_BATCH])
+        except Exception as e:
+            print(f"⚠️  Mirror promotion of {document_id} failed: {e}")
+    
+    def _note_remote_hits(self, results: List[Dict[str, Any]]) -> None:
+        """Count remote hits per unmirrored document and promote the frequent ones"""
+        if self.mirror is None:
+            return
+        promote = []
+        with self._mirror_lock:
+            self.mirror.remote_queries += 1
+            for document_id in {result["metadata"].get("document_id") for result in results}:
+                if not document_id or self.mirror.holds_document(document_id):
+                    continue
+                hits = self._mirror_hits.get(document_id, 0) + 1
+                if hits >= settings.MIRROR_PROMOTE_HITS:
+                    self._mirror_hits.pop(document_id, None)
+                    promote.append(document_id)
+                else:
+                    self._mirror_hits[document_id] = hits
+        for document_id in promote:
+            self._mirror_executor.submit(self._promote_document, document_id)
+    
+    def _mirror_fallback(
+        self,
+        query_vector: List[float],
+        k: int,
+        filter: Optional[Dict[str, Any]],
+        include_values: bool,
+        error: BaseException
+    ) -> List[Dict[str, Any]]:
+        """
+        Answer from the (partial) mirror when Pinecone fails or is too slow
         
-        # Get index stats for verification
-        index = self.pc.Index(index_name)
-        stats = index.describe_index_stats()
-        print(f"  Index stats: {stats.get('total_vector_count', 0)} vectors")
+        Results are flagged ``degraded`` (and never cached); without a mirror
+        the original error is raised.
+        """
+        if self.mirror is None or len(self.mirror) == 0:
+            raise error
+        with self._mirror_lock:
+            self.mirror.fallbacks += 1
+        print(f"⚠️  Pinecone query failed ({type(error).__name__}: {error}); serving from local mirror")
+        results = self.mirror.search(query_vector, k, filter, include_values)
+        for result in results:
+            result["degraded"] = not self.mirror.complete
+        return results
+    
+    def _rebuild_lexical_index(self) -> None:
+        """Index every registered chunk in BM25 (background thread)"""
+        try:
+            with self._init_step("lexical_rebuild"):
+                for batch in get_document_registry().iter_chunks():
+                    self.lexical_index.add(
+                        [chunk["id"] for chunk in batch],
+                        [chunk["text"] for chunk in batch],
+                        [chunk["metadata"] for chunk in batch]
+                    )
+            print(f"✓ BM25 index rebuilt from registry ({len(self.lexical_index)} chunks)")
+        except Exception as e:
+            print(f"⚠️  BM25 rebuild from registry failed: {e}")
+    
+    def _wait_until_ready(self):
+        """Poll ``describe_index`` until the index reports ready (replaces a fixed sleep)"""
+        deadline = time.monotonic() + settings.PINECONE_READY_TIMEOUT_SECONDS
+        delay = 0.25
+        while True:
+            description = self.pc.describe_index(self.index_name)
+            if description.status["ready"]:
+                return description
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Index '{self.index_name}' not ready after {settings.PINECONE_READY_TIMEOUT_SECONDS}s")
+            time.sleep(delay)
+            delay = min(delay * 2, 2.0)
     
+    def _refresh_index_stats(self) -> Dict[str, Any]:
+        """Background stats refresh: fresh counts, also used to re-validate the mirror"""
+        stats = self._fetch_index_stats()
+        if self.mirror is not None:
+            self._check_mirror(stats)
+        return stats
     
-    def add_documents(self, texts: List[str], metadatas: List[dict]) -> None:
+    def _fetch_index_stats(self) -> Dict[str, Any]:
+        """Authoritative counts from ``describe_index_stats`` (one round trip)"""
+        stats = self.pinecone_index.describe_index_stats()
+        namespaces = stats.get("namespaces") or {}
+        return {
+            "total_vectors": stats.get("total_vector_count", 0),
+            "namespaces": {
+                name: (info.get("vector_count", 0) if hasattr(info, "get") else getattr(info, "vector_count", 0))
+                for name, info in namespaces.items()
+            },
+            "index_fullness": stats.get("index_fullness")
+        }
+    
+    @property
+    def pinecone_index(self):
+        """Sync Pinecone index handle (waits for the background index check if the host is not known yet)"""
+        if self._pinecone_index is None:
+            self._index_ready.wait(settings.PINECONE_READY_TIMEOUT_SECONDS)
+            if self._index_error is not None:
+                raise RuntimeError(f"Pinecone index unavailable: {self._index_error}") from self._index_error
+            if self._pinecone_index is None:
+                raise RuntimeError(f"Pinecone index '{self.index_name}' is not ready yet")
+        return self._pinecone_index
+    
+    
+    def add_documents(
+        self,
+        texts: List[str],
+        metadatas: List[dict],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
         """
-        Add documents to the Pinecone vector store
+        Add documents to the vector store
         
         Args:
             texts: List of text chunks to save
             metadatas: List of metadata dictionaries for each chunk
+            ids: Chunk IDs (random UUIDs when omitted; existing IDs are overwritten)
+        
+        Returns:
+            The chunk IDs written (record them to delete the chunks later)
+        """
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        try:
+            # Embeddings are generated CLIENT-SIDE by OpenAI in token-aware batches;
+            # batch N+1 is embedded while batch N is being upserted
+            result = self._ingest_pipeline().run(ids, texts, metadatas)
+            print(
+                f"✓ Added {len(texts)} documents to {self.backend} "
+                f"({result['batches']} batches in {result['seconds']:.2f}s)"
+            )
+        finally:
+            # New (or partially written) chunks make every cached result stale
+            self.search_cache.invalidate()
+        if self.migration is not None:
+            self.migration.forward("add_documents", texts, metadatas, ids)
+        return ids
+    
+    async def aadd_documents(
+        self,
+        texts: List[str],
+        metadatas: List[dict],
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
         """
-        # Use LangChain's add_texts method with CLIENT-SIDE OpenAI embeddings
-        # The embeddings are generated by OpenAI (client-side), NOT Pinecone inference
-        self.vectorstore.add_texts(
-            texts=texts,
-            metadatas=metadatas
+        Async variant of ``add_documents`` (embeds and upserts on async HTTP clients)
+        
+        Args:
+            texts: List of text chunks to save
+            metadatas: List of metadata dictionaries for each chunk
+            ids: Chunk IDs (random UUIDs when omitted; existing IDs are overwritten)
+        
+        Returns:
+            The chunk IDs written
+        """
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        try:
+            result = await self._ingest_pipeline().arun(ids, texts, metadatas)
+            print(
+                f"✓ Added {len(texts)} documents to {self.backend} "
+                f"({result['batches']} batches in {result['seconds']:.2f}s)"
+            )
+        finally:
+            self.search_cache.invalidate()
+        if self.migration is not None:
+            await self.migration.aforward("aadd_documents", texts, metadatas, ids)
+        return ids
+    
+    def existing_ids(self, ids: List[str]) -> set:
+        """
+        Which of ``ids`` are currently stored in the index
+        
+        Args:
+            ids: Chunk IDs to check
+        
+        Returns:
+            Set of the IDs that exist
+        """
+        if self.backend in LOCAL_BACKENDS:
+            return {chunk_id for chunk_id in ids if self.index.contains(chunk_id)}
+        found = set()
+        for start in range(0, len(ids), PINECONE_FETCH_BATCH):
+            response = self.pinecone_index.fetch(ids=ids[start:start + PINECONE_FETCH_BATCH])
+            found.update(response.vectors.keys())
+        return found
+    
+    async def aexisting_ids(self, ids: List[str]) -> set:
+        """Async variant of ``existing_ids``"""
+        if not ids or self.backend in LOCAL_BACKENDS:
+            return self.existing_ids(ids)
+        index = await self._apinecone()
+        if index is None:
+            return await asyncio.to_thread(self.existing_ids, ids)
+        found = set()
+        for start in range(0, len(ids), PINECONE_FETCH_BATCH):
+            response = await index.fetch(ids=ids[start:start + PINECONE_FETCH_BATCH])
+            found.update(response.vectors.keys())
+        return found
+    
+    def delete(self, ids: List[str]) -> int:
+        """
+        Delete chunks by ID (cost proportional to ``len(ids)``, no index scan)
+        
+        Args:
+            ids: Chunk IDs to delete
+        
+        Returns:
+            Number of chunks deleted
+        """
+        if not ids:
+            return 0
+        if self.migration is not None:
+            self.migration.forward("delete", ids)
+        if self.lexical_index is not None:
+            self.lexical_index.delete(ids)
+        try:
+            if self.backend in LOCAL_BACKENDS:
+                deleted = self.index.delete(ids)
+            else:
+                for start in range(0, len(ids), PINECONE_DELETE_BATCH):
+                    self.pinecone_index.delete(ids=ids[start:start + PINECONE_DELETE_BATCH])
+                deleted = len(ids)
+                if self.mirror is not None:
+                    self.mirror.delete(ids)
+                self.index_stats.record_delete(deleted)
+            print(f"🗑️  Deleted {deleted} chunks from {self.backend}")
+            return deleted
+        finally:
+            self.search_cache.invalidate()
+    
+    async def adelete(self, ids: List[str]) -> int:
+        """
+        Async variant of ``delete``
+        
+        Args:
+            ids: Chunk IDs to delete
+        
+        Returns:
+            Number of chunks deleted
+        """
+        if not ids or self.backend in LOCAL_BACKENDS:
+            return self.delete(ids)
+        if self.migration is not None:
+            await self.migration.aforward("adelete", ids)
+        if self.lexical_index is not None:
+            self.lexical_index.delete(ids)
+        try:
+            index = await self._apinecone()
+            for start in range(0, len(ids), PINECONE_DELETE_BATCH):
+                batch = ids[start:start + PINECONE_DELETE_BATCH]
+                if index is not None:
+                    await index.delete(ids=batch)
+                else:
+                    await asyncio.to_thread(self.pinecone_index.delete, ids=batch)
+            self.index_stats.record_delete(len(ids))
+            if self.mirror is not None:
+                self.mirror.delete(ids)
+            print(f"🗑️  Deleted {len(ids)} chunks from {self.backend}")
+            return len(ids)
+        finally:
+            self.search_cache.invalidate()
+    
+    async def aupsert_document_vector(
+        self,
+        document_id: str,
+        chunk_ids: List[str],
+        texts: List[str],
+        metadata: Dict[str, Any]
+    ) -> bool:
+        """
+        Store one mean-pooled vector for a document (first level of two-level search)
+        
+        Local backends pool the chunk vectors already in the index. On Pinecone
+        the chunk vectors are served by the embedding cache the ingest just
+        filled, so no extra embedding request is made while the cache is on.
+        
+        Args:
+            document_id: Document ID (used as the vector ID)
+            chunk_ids: IDs of the document's chunks
+            texts: Chunk texts (used only when vectors must come from the embeddings)
+            metadata: Document metadata (e.g. source file name)
+        
+        Returns:
+            True if a document vector was written
+        """
+        if not settings.DOCUMENT_VECTORS_ENABLED or not chunk_ids:
+            return False
+        if self.migration is not None:
+            await self.migration.aforward("aupsert_document_vector", document_id, chunk_ids, texts, metadata)
+        if self.backend in LOCAL_BACKENDS:
+            vectors = self.index.vectors_for_ids(chunk_ids)
+        else:
+            vectors = np.asarray(await self.embeddings.aembed_documents(texts), dtype=np.float32)
+        if vectors.shape[0] == 0:
+            return False
+        pooled = self._mean_pool(vectors)
+        metadata = {**metadata, "document_id": document_id}
+        
+        if self.backend in LOCAL_BACKENDS:
+            self.document_index.add(ids=[document_id], vectors=[pooled], texts=[""], metadatas=[metadata])
+            return True
+        record = {"id": document_id, "values": pooled.tolist(), "metadata": metadata}
+        index = await self._apinecone()
+        if index is not None:
+            await index.upsert(vectors=[record], namespace=settings.DOCUMENT_VECTOR_NAMESPACE)
+        else:
+            await asyncio.to_thread(
+                self.pinecone_index.upsert, vectors=[record], namespace=settings.DOCUMENT_VECTOR_NAMESPACE
+            )
+        return True
+    
+    async def adelete_document_vectors(self, document_ids: List[str]) -> int:
+        """Remove document-level vectors (returns how many were requested/removed)"""
+        if not settings.DOCUMENT_VECTORS_ENABLED or not document_ids:
+            return 0
+        if self.migration is not None:
+            await self.migration.aforward("adelete_document_vectors", document_ids)
+        if self.backend in LOCAL_BACKENDS:
+            return self.document_index.delete(document_ids)
+        index = await self._apinecone()
+        if index is not None:
+            await index.delete(ids=document_ids, namespace=settings.DOCUMENT_VECTOR_NAMESPACE)
+        else:
+            await asyncio.to_thread(
+                self.pinecone_index.delete, ids=document_ids, namespace=settings.DOCUMENT_VECTOR_NAMESPACE
+            )
+        return len(document_ids)
+    
+    @staticmethod
+    def _mean_pool(vectors: np.ndarray) -> np.ndarray:
+        """Unit-length mean of unit-normalized chunk vectors"""
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        pooled = vectors.mean(axis=0)
+        return pooled / max(float(np.linalg.norm(pooled)), 1e-12)
+    
+    def _ingest_pipeline(self) -> EmbeddingUpsertPipeline:
+        """Build the embed/upsert pipeline for the active backend"""
+        return EmbeddingUpsertPipeline(
+            embed_fn=self.embeddings.embed_documents,
+            upsert_fn=self._upsert_vectors,
+            max_batch_tokens=settings.INGEST_BATCH_MAX_TOKENS,
+            max_batch_size=settings.INGEST_BATCH_MAX_CHUNKS,
+            max_concurrency=settings.INGEST_MAX_CONCURRENCY,
+            max_retries=settings.INGEST_MAX_RETRIES,
+            aembed_fn=self.embeddings.aembed_documents,
+            aupsert_fn=self._aupsert_vectors
         )
-        print(f"✓ Added {len(texts)} documents to Pinecone (client-side OpenAI embeddings)")
     
-    def search(self, query: str, k: int = 3) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _pinecone_records(
+        ids: List[str],
+        vectors: List[List[float]],
+        texts: List[str],
+        metadatas: List[dict]
+    ) -> List[Dict[str, Any]]:
+        """Same record layout as LangChain's PineconeVectorStore (text under "text")"""
+        return [
+            {"id": chunk_id, "values": vector, "metadata": {**metadata, "text": text}}
+            for chunk_id, vector, text, metadata in zip(ids, vectors, texts, metadatas)
+        ]
+    
+    async def _apinecone(self):
+        """
+        Async Pinecone index client, created lazily on the running event loop
+        
+        Returns None when the installed SDK has no asyncio support.
+        """
+        if self._async_pinecone_index is None and hasattr(self.pc, "IndexAsyncio"):
+            if self.pinecone_host is None:
+                await asyncio.to_thread(lambda: self.pinecone_index)
+            self._async_pinecone_index = self.pc.IndexAsyncio(host=self.pinecone_host)
+        return self._async_pinecone_index
+    
+    async def aclose(self) -> None:
+        """Close pooled HTTP sessions (call on application shutdown)"""
+        self.index_stats.stop()
+        if self.backend == "sharded":
+            self.index.close()
+        if self._mirror_executor is not None:
+            self._mirror_executor.shutdown(wait=False)
+        if self.backend == "pinecone" and self._async_pinecone_index is not None:
+            await self._async_pinecone_index.close()
+            self._async_pinecone_index = None
+        if self._http_async_client is not None:
+            await self._http_async_client.aclose()
+            self._http_async_client = None
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
+    
+    def _upsert_vectors(
+        self,
+        ids: List[str],
+        vectors: List[List[float]],
+        texts: List[str],
+        metadatas: List[dict]
+    ) -> None:
+        """Write already-embedded chunks to the active backend"""
+        if self.backend in LOCAL_BACKENDS:
+            self.index.add(ids=ids, vectors=vectors, texts=texts, metadatas=metadatas)
+        else:
+            self.pinecone_index.upsert(vectors=self._pinecone_records(ids, vectors, texts, metadatas))
+            self.index_stats.record_add(len(ids))
+            if self.mirror is not None:
+                self.mirror.add(ids, vectors, texts, metadatas)
+        if self.lexical_index is not None:
+            self.lexical_index.add(ids, texts, metadatas)
+    
+    async def _aupsert_vectors(
+        self,
+        ids: List[str],
+        vectors: List[List[float]],
+        texts: List[str],
+        metadatas: List[dict]
+    ) -> None:
+        """Async variant of ``_upsert_vectors``"""
+        if self.backend in LOCAL_BACKENDS:
+            self._upsert_vectors(ids, vectors, texts, metadatas)
+            return
+        
+        records = self._pinecone_records(ids, vectors, texts, metadatas)
+        index = await self._apinecone()
+        if index is not None:
+            await index.upsert(vectors=records)
+        else:
+            await asyncio.to_thread(self.pinecone_index.upsert, vectors=records)
+        self.index_stats.record_add(len(ids))
+        if self.mirror is not None:
+            self.mirror.add(ids, vectors, texts, metadatas)
+        if self.lexical_index is not None:
+            self.lexical_index.add(ids, texts, metadatas)
+    
+    def search(
+        self,
+        query: str,
+        k: int = 3,
+        filter: Optional[Dict[str, Any]] = None,
+        mode: Optional[str] = None,
+        mmr: bool = False,
+        fetch_k: Optional[int] = None,
+        lambda_mult: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve similar chunks from the vector store based on query
+        
+        Args:
+            query: The search query string
+            k: Number of similar chunks to retrieve (default: 3)
+            filter: Optional Pinecone-style metadata filter, e.g.
+                ``{"source": "resume.pdf"}`` or ``{"page": {"$lte": 1}}``;
+                applied inside the index, not after retrieval
+            mode: "dense" (embeddings), "lexical" (BM25 keywords, no embedding
+                call) or "hybrid" (both, fused by reciprocal rank fusion);
+                defaults to SEARCH_DEFAULT_MODE
+            mmr: Diversify dense results with maximal marginal relevance, so
+                near-duplicate overlapping chunks do not crowd out the rest
+                (ignored for lexical and hybrid searches)
+            fetch_k: Candidates fetched for MMR (default k * MMR_FETCH_FACTOR)
+            lambda_mult: MMR relevance/diversity trade-off (default MMR_LAMBDA)
+        
+        Returns:
+            List of dictionaries containing similar documents with metadata
+        """
+        validate_filter(filter)
+        mode = self._resolve_mode(mode)
+        mmr_options = self._mmr_options(mode, k, mmr, fetch_k, lambda_mult)
+        if mode == "lexical":
+            return self._lexical_search(query, k, filter)
+        
+        key = self._cache_key(query, k, filter, mode, mmr_options)
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        generation = self.search_cache.generation
+        started = time.perf_counter()
+        if mmr_options:
+            query_vector = self.embeddings.embed_query(query)
+            candidates = self._query_vector(
+                query_vector, mmr_options["fetch_k"], filter, include_values=True
+            )
+            results = self._select_mmr(query_vector, candidates, k, mmr_options["lambda_mult"])
+        elif mode == "hybrid":
+            dense = self._search_uncached(query, k * settings.HYBRID_CANDIDATE_FACTOR, filter)
+            results = self._fuse_hybrid(query, k, filter, dense)
+        else:
+            results = self._search_uncached(query, k, filter)
+        self.search_cache.put(key, results, generation)
+        if self.migration is not None:
+            self.migration.shadow(
+                query, k, filter, mode, mmr, fetch_k, lambda_mult,
+                results, (time.perf_counter() - started) * 1000
+            )
+        return results
+    
+    async def asearch(
+        self,
+        query: str,
+        k: int = 3,
+        filter: Optional[Dict[str, Any]] = None,
+        mode: Optional[str] = None,
+        mmr: bool = False,
+        fetch_k: Optional[int] = None,
+        lambda_mult: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
         """
-        Retrieve similar chunks from Pinecone based on query
+        Async variant of ``search`` that never blocks the event loop on network I/O
         
         Args:
             query: The search query string
             k: Number of similar chunks to retrieve (default: 3)
+            filter: Optional Pinecone-style metadata filter
+            mode: "dense", "lexical" or "hybrid" (see ``search``)
+            mmr: Diversify dense results with maximal marginal relevance
+            fetch_k: Candidates fetched for MMR (default k * MMR_FETCH_FACTOR)
+            lambda_mult: MMR relevance/diversity trade-off (default MMR_LAMBDA)
         
         Returns:
             List of dictionaries containing similar documents with metadata
         """
-        # Use LangChain's similarity_search_with_score
+        validate_filter(filter)
+        mode = self._resolve_mode(mode)
+        mmr_options = self._mmr_options(mode, k, mmr, fetch_k, lambda_mult)
+        if mode == "lexical":
+            return self._lexical_search(query, k, filter)
+        
+        key = self._cache_key(query, k, filter, mode, mmr_options)
+        cached = self.search_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        generation = self.search_cache.generation
+        started = time.perf_counter()
         # Embeddings are generated CLIENT-SIDE by OpenAI, NOT by Pinecone inference
-        results = self.vectorstore.similarity_search_with_score(query, k=k)
-        
-        # Format results
-        formatted_results: List[Dict[str, Any]] = []
-        for doc, score in results:
-            formatted_results.append({
-                "id": doc.metadata.get("id", str(uuid.uuid4())),
-                "text": doc.page_content,
-                "metadata": doc.metadata,
-                "distance": 1 - score,  # Convert similarity score to distance
-                "score": score
+        query_vector = await self.embeddings.aembed_query(query)
+        if mmr_options:
+            candidates = await self._aquery_vector(
+                query_vector, mmr_options["fetch_k"], filter, include_values=True
+            )
+            results = self._select_mmr(query_vector, candidates, k, mmr_options["lambda_mult"])
+        elif mode == "hybrid":
+            dense = await self._aquery_vector(query_vector, k * settings.HYBRID_CANDIDATE_FACTOR, filter)
+            results = self._fuse_hybrid(query, k, filter, dense)
+        else:
+            results = await self._aquery_vector(query_vector, k, filter)
+        self.search_cache.put(key, results, generation)
+        if self.migration is not None:
+            self.migration.shadow(
+                query, k, filter, mode, mmr, fetch_k, lambda_mult,
+                results, (time.perf_counter() - started) * 1000
+            )
+        return results
+    
+    def _resolve_mode(self, mode: Optional[str]) -> str:
+        """Validate a search mode (None = configured default)"""
+        mode = (mode or settings.SEARCH_DEFAULT_MODE).lower()
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{mode}' (expected one of {list(SEARCH_MODES)})")
+        if mode != "dense" and self.lexical_index is None:
+            raise ValueError("Lexical and hybrid search need LEXICAL_INDEX_ENABLED=True")
+        return mode
+    
+    def _cache_key(
+        self,
+        query: str,
+        k: int,
+        filter: Optional[Dict[str, Any]],
+        mode: str,
+        mmr_options: Optional[Dict[str, Any]] = None
+    ):
+        """Result cache key (plain dense keys match the ones used by ``search_batch``)"""
+        if mmr_options:
+            return self.search_cache.make_key(query, k, filter, mode=mode, mmr=mmr_options)
+        if mode == "dense":
+            return self.search_cache.make_key(query, k, filter)
+        return self.search_cache.make_key(query, k, filter, mode=mode)
+    
+    @staticmethod
+    def _mmr_options(
+        mode: str,
+        k: int,
+        mmr: bool,
+        fetch_k: Optional[int],
+        lambda_mult: Optional[float]
+    ) -> Optional[Dict[str, Any]]:
+        """Resolved MMR settings for a search (None when MMR is off)"""
+        if not mmr or mode != "dense":
+            # Lexical and fused rankings have no per-hit vectors to compare
+            return None
+        lambda_mult = settings.MMR_LAMBDA if lambda_mult is None else lambda_mult
+        if not 0.0 <= lambda_mult <= 1.0:
+            raise ValueError("lambda_mult must be between 0 and 1")
+        return {
+            "fetch_k": max(fetch_k or k * settings.MMR_FETCH_FACTOR, k),
+            "lambda_mult": lambda_mult,
+        }
+    
+    @staticmethod
+    def _select_mmr(
+        query_vector: List[float],
+        candidates: List[Dict[str, Any]],
+        k: int,
+        lambda_mult: float
+    ) -> List[Dict[str, Any]]:
+        """Pick ``k`` diverse results from candidates fetched with ``include_values``"""
+        vectors = [candidate.pop("values") for candidate in candidates]
+        if len(candidates) <= k:
+            return candidates
+        selected = maximal_marginal_relevance(query_vector, vectors, k, lambda_mult)
+        return [candidates[i] for i in selected]
+    
+    def _lexical_search(self, query: str, k: int, filter: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        BM25-only search answered from the in-process inverted index
+        
+        ``score`` is BM25 relative to the best hit (1.0); the raw value is in ``bm25_score``.
+        """
+        hits = self.lexical_index.search(query, k, filter)
+        top = hits[0][1] if hits else 1.0
+        results = []
+        for chunk_id, bm25 in hits:
+            result = self.lexical_index.get(chunk_id)
+            if result is None:
+                continue
+            score = bm25 / top
+            results.append({**result, "distance": 1 - score, "score": score, "bm25_score": bm25})
+        return results
+    
+    def _fuse_hybrid(
+        self,
+        query: str,
+        k: int,
+        filter: Optional[Dict[str, Any]],
+        dense: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Fuse dense hits with BM25 hits by reciprocal rank fusion
+        
+        ``score`` is the fused score scaled so 1.0 means ranked first by both
+        retrievers; ``dense_score``, ``bm25_score`` and ``rrf_score`` keep the inputs.
+        Dense hits from a partial mirror fallback mark every fused result
+        ``degraded`` so the fused list is not cached either.
+        """
+        lexical = self.lexical_index.search(query, max(len(dense), k), filter)
+        fused = reciprocal_rank_fusion(
+            [[result["id"] for result in dense], [chunk_id for chunk_id, _ in lexical]],
+            k=settings.RRF_K
+        )
+        dense_by_id = {result["id"]: result for result in dense}
+        bm25_by_id = dict(lexical)
+        best = 2.0 / (settings.RRF_K + 1)
+        
+        results = []
+        for chunk_id, rrf in fused:
+            payload = dense_by_id.get(chunk_id) or self.lexical_index.get(chunk_id)
+            if payload is None:
+                continue
+            score = rrf / best
+            dense_hit = dense_by_id.get(chunk_id)
+            results.append({
+                "id": chunk_id,
+                "text": payload["text"],
+                "metadata": payload["metadata"],
+                "distance": 1 - score,
+                "score": score,
+                "dense_score": dense_hit["score"] if dense_hit else None,
+                "bm25_score": bm25_by_id.get(chunk_id),
+                "rrf_score": rrf
+            })
+            if len(results) >= k:
+                break
+        if any(result.get("degraded") for result in dense):
+            for result in results:
+                result["degraded"] = True
+        return results
+    
+    def search_grouped(
+        self,
+        query: str,
+        n: int = 10,
+        group_by: str = "source",
+        filter: Optional[Dict[str, Any]] = None,
+        mode: Optional[str] = None,
+        aggregate: Optional[str] = None,
+        fetch_k: Optional[int] = None,
+        two_level: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Top-``n`` distinct documents (e.g. resumes) instead of top-``n`` chunks
+        
+        Over-fetches chunks so one strong document cannot fill every slot, then
+        aggregates chunk scores per ``group_by`` metadata value. With two-level
+        search the top ``n * DOCUMENT_CANDIDATE_FACTOR`` documents are first
+        picked from the small document-vector index, and only their chunks are
+        searched.
+        
+        Args:
+            query: The search query string
+            n: Number of distinct groups to return
+            group_by: Metadata key identifying a document (default "source")
+            filter: Optional Pinecone-style metadata filter
+            mode: "dense", "lexical" or "hybrid" (see ``search``)
+            aggregate: "max" (best chunk) or "sum" (sum of the GROUP_TOP_N best
+                chunks); defaults to GROUP_AGGREGATE
+            fetch_k: Chunks fetched before grouping (default n * GROUP_FETCH_FACTOR)
+            two_level: Use document vectors for the first stage (defaults to
+                DOCUMENT_VECTORS_ENABLED when no filter is given)
+        
+        Returns:
+            Groups with ``score``, ``hits``, best ``snippets`` and joined ``text``
+        """
+        if self._use_two_level(two_level, filter):
+            documents = self._query_documents(self.embeddings.embed_query(query), n * settings.DOCUMENT_CANDIDATE_FACTOR)
+            filter = self._within_documents(documents, filter)
+        results = self.search(query, k=fetch_k or n * settings.GROUP_FETCH_FACTOR, filter=filter, mode=mode)
+        return self._group(results, n, group_by, aggregate)
+    
+    async def asearch_grouped(
+        self,
+        query: str,
+        n: int = 10,
+        group_by: str = "source",
+        filter: Optional[Dict[str, Any]] = None,
+        mode: Optional[str] = None,
+        aggregate: Optional[str] = None,
+        fetch_k: Optional[int] = None,
+        two_level: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
+        """Async variant of ``search_grouped``"""
+        if self._use_two_level(two_level, filter):
+            query_vector = await self.embeddings.aembed_query(query)
+            documents = await self._aquery_documents(query_vector, n * settings.DOCUMENT_CANDIDATE_FACTOR)
+            filter = self._within_documents(documents, filter)
+        results = await self.asearch(query, k=fetch_k or n * settings.GROUP_FETCH_FACTOR, filter=filter, mode=mode)
+        return self._group(results, n, group_by, aggregate)
+    
+    @staticmethod
+    def _use_two_level(two_level: Optional[bool], filter: Optional[Dict[str, Any]]) -> bool:
+        """Resolve the two-level option (off by default when a filter is given)"""
+        if two_level is None:
+            # Document vectors carry no chunk metadata, so a filter could drop matching documents
+            return settings.DOCUMENT_VECTORS_ENABLED and not filter
+        if two_level and not settings.DOCUMENT_VECTORS_ENABLED:
+            raise ValueError("Two-level search needs DOCUMENT_VECTORS_ENABLED=True")
+        return two_level
+    
+    @staticmethod
+    def _within_documents(
+        documents: List[Dict[str, Any]],
+        filter: Optional[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Restrict a chunk filter to ``documents`` (unchanged when none were found)"""
+        if not documents:
+            # Empty document index (e.g. not backfilled yet): fall back to a flat search
+            return filter
+        within = {"document_id": {"$in": [document["id"] for document in documents]}}
+        return {"$and": [filter, within]} if filter else within
+    
+    def _query_documents(self, query_vector: List[float], k: int) -> List[Dict[str, Any]]:
+        """Top-k documents from the document-vector index as ``{"id", "metadata", "score"}``"""
+        if self.backend in LOCAL_BACKENDS:
+            hits = []
+            for row, score in self.document_index.search(query_vector, k):
+                record = self.document_index.get(row)
+                hits.append({"id": record["id"], "metadata": record["metadata"], "score": score})
+            return hits
+        response = self.pinecone_index.query(
+            vector=query_vector, top_k=k, namespace=settings.DOCUMENT_VECTOR_NAMESPACE, include_metadata=True
+        )
+        return [
+            {"id": match.id, "metadata": dict(match.metadata or {}), "score": match.score}
+            for match in response.matches
+        ]
+    
+    async def _aquery_documents(self, query_vector: List[float], k: int) -> List[Dict[str, Any]]:
+        """Async variant of ``_query_documents``"""
+        if self.backend in LOCAL_BACKENDS:
+            return self._query_documents(query_vector, k)
+        index = await self._apinecone()
+        if index is None:
+            return await asyncio.to_thread(self._query_documents, query_vector, k)
+        response = await index.query(
+            vector=query_vector, top_k=k, namespace=settings.DOCUMENT_VECTOR_NAMESPACE, include_metadata=True
+        )
+        return [
+            {"id": match.id, "metadata": dict(match.metadata or {}), "score": match.score}
+            for match in response.matches
+        ]
+    
+    @staticmethod
+    def _group(
+        results: List[Dict[str, Any]],
+        n: int,
+        group_by: str,
+        aggregate: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Group chunk results with the configured aggregation settings"""
+        return group_results(
+            results,
+            field=group_by,
+            n=n,
+            aggregate=aggregate or settings.GROUP_AGGREGATE,
+            top_n=settings.GROUP_TOP_N,
+            snippets=settings.GROUP_SNIPPETS
+        )
+    
+    def search_batch(
+        self,
+        queries: List[str],
+        k: int = 10,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search several queries at once
+        
+        Uncached queries are embedded in a single embeddings request, then the
+        index lookups fan out concurrently (one matrix product for the NumPy
+        backend).
+        
+        Args:
+            queries: Query strings (e.g. job descriptions)
+            k: Number of chunks to retrieve per query
+            filter: Optional metadata filter shared by every query
+        
+        Returns:
+            One entry per query with its results and timing (milliseconds)
+        """
+        validate_filter(filter)
+        entries, pending = self._batch_from_cache(queries, k, filter)
+        if not pending:
+            return entries
+        
+        generation = self.search_cache.generation
+        started = time.perf_counter()
+        vectors = self.embeddings.embed_documents([queries[i] for i in pending])
+        embed_ms = (time.perf_counter() - started) * 1000
+        
+        if self.backend in ("numpy", "sharded"):
+            started = time.perf_counter()
+            hits = self.index.search_many(vectors, k, mask=self.index.filter_mask(filter))
+            # One matrix product serves every query; report the amortized cost
+            query_ms = (time.perf_counter() - started) * 1000 / len(pending)
+            timed = [
+                ([self._format_local_hit(row, score) for row, score in rows], query_ms)
+                for rows in hits
+            ]
+        else:
+            workers = min(len(pending), settings.SEARCH_BATCH_CONCURRENCY)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search") as pool:
+                timed = list(pool.map(lambda vector: self._timed_query(vector, k, filter), vectors))
+        
+        self._fill_batch(entries, pending, timed, embed_ms, k, filter, generation)
+        return entries
+    
+    async def asearch_batch(
+        self,
+        queries: List[str],
+        k: int = 10,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Async variant of ``search_batch``
+        
+        Args:
+            queries: Query strings (e.g. job descriptions)
+            k: Number of chunks to retrieve per query
+            filter: Optional metadata filter shared by every query
+        
+        Returns:
+            One entry per query with its results and timing (milliseconds)
+        """
+        validate_filter(filter)
+        entries, pending = self._batch_from_cache(queries, k, filter)
+        if not pending:
+            return entries
+        
+        generation = self.search_cache.generation
+        started = time.perf_counter()
+        vectors = await self.embeddings.aembed_documents([queries[i] for i in pending])
+        embed_ms = (time.perf_counter() - started) * 1000
+        
+        if self.backend in LOCAL_BACKENDS:
+            # In-process scan: no I/O to overlap
+            timed = [self._timed_query(vector, k, filter) for vector in vectors]
+        else:
+            slots = asyncio.Semaphore(settings.SEARCH_BATCH_CONCURRENCY)
+            
+            async def timed_query(vector: List[float]):
+                async with slots:
+                    started = time.perf_counter()
+                    results = await self._aquery_vector(vector, k, filter)
+                    return results, (time.perf_counter() - started) * 1000
+            
+            timed = await asyncio.gather(*(timed_query(vector) for vector in vectors))
+        
+        self._fill_batch(entries, pending, timed, embed_ms, k, filter, generation)
+        return entries
+    
+    def _batch_from_cache(self, queries: List[str], k: int, filter: Optional[Dict[str, Any]]):
+        """Start a batch: serve cached queries, return indexes of the rest"""
+        entries: List[Dict[str, Any]] = []
+        pending: List[int] = []
+        for i, query in enumerate(queries):
+            cached = self.search_cache.get(self.search_cache.make_key(query, k, filter))
+            entries.append({
+                "query": query,
+                "results": cached,
+                "cached": cached is not None,
+                "timing_ms": {"embed": 0.0, "query": 0.0}
             })
+            if cached is None:
+                pending.append(i)
+        return entries, pending
+    
+    def _fill_batch(self, entries, pending, timed, embed_ms: float, k: int, filter, generation: int) -> None:
+        """Store freshly computed batch results in their entries and the cache"""
+        for i, (results, query_ms) in zip(pending, timed):
+            entries[i]["results"] = results
+            entries[i]["timing_ms"] = {"embed": embed_ms, "query": query_ms}
+            key = self.search_cache.make_key(entries[i]["query"], k, filter)
+            self.search_cache.put(key, results, generation)
+            if self.migration is not None:
+                self.migration.shadow(entries[i]["query"], k, filter, "dense", False, None, None, results, query_ms)
+    
+    def _timed_query(self, query_vector: List[float], k: int, filter: Optional[Dict[str, Any]] = None):
+        """``_query_vector`` plus its wall time in milliseconds"""
+        started = time.perf_counter()
+        results = self._query_vector(query_vector, k, filter)
+        return results, (time.perf_counter() - started) * 1000
+    
+    def _search_uncached(
+        self,
+        query: str,
+        k: int,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Run a search against the backend, bypassing the result cache"""
+        # Embeddings are generated CLIENT-SIDE by OpenAI, NOT by Pinecone inference
+        query_vector = self.embeddings.embed_query(query)
+        return self._query_vector(query_vector, k, filter)
+    
+    def _query_vector(
+        self,
+        query_vector: List[float],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        include_values: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Top-k chunks for an already-embedded query, filtered inside the index
+        
+        With ``include_values`` every result also carries its stored vector
+        under "values" (used for MMR re-ranking).
+        """
+        if self.backend in LOCAL_BACKENDS:
+            # Filter becomes a row bitmap; only selected rows are scored
+            mask = self.index.filter_mask(filter)
+            hits = self.index.search(query_vector, k, mask=mask)
+            results = [self._format_local_hit(row, score) for row, score in hits]
+            if include_values and hits:
+                vectors = self.index.get_vectors([row for row, _ in hits])
+                for result, vector in zip(results, vectors):
+                    result["values"] = vector
+            return results
+        
+        if self.mirror is not None and self.mirror.covers(filter):
+            with self._mirror_lock:
+                self.mirror.local_queries += 1
+            return self.mirror.search(query_vector, k, filter, include_values)
+        try:
+            response = self.pinecone_index.query(
+                vector=query_vector, top_k=k, filter=filter or None,
+                include_metadata=True, include_values=include_values
+            )
+        except Exception as e:
+            return self._mirror_fallback(query_vector, k, filter, include_values, e)
+        results = [self._format_pinecone_match(match, include_values) for match in response.matches]
+        self._note_remote_hits(results)
+        return results
+    
+    async def _aquery_vector(
+        self,
+        query_vector: List[float],
+        k: int,
+        filter: Optional[Dict[str, Any]] = None,
+        include_values: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Async variant of ``_query_vector``"""
+        if self.backend in LOCAL_BACKENDS:
+            # In-process scan: no I/O to wait on
+            return self._query_vector(query_vector, k, filter, include_values)
+        
+        if self.mirror is not None and self.mirror.covers(filter):
+            with self._mirror_lock:
+                self.mirror.local_queries += 1
+            return self.mirror.search(query_vector, k, filter, include_values)
+        
+        async def remote():
+            index = await self._apinecone()
+            if index is not None:
+                return await index.query(
+                    vector=query_vector, top_k=k, filter=filter or None,
+                    include_metadata=True, include_values=include_values
+                )
+            return await asyncio.to_thread(
+                self.pinecone_index.query,
+                vector=query_vector, top_k=k, filter=filter or None,
+                include_metadata=True, include_values=include_values
+            )
+        
+        if self.mirror is None:
+            response = await remote()
+        else:
+            # A slow Pinecone call is cut off and answered from the mirror instead
+            try:
+                response = await asyncio.wait_for(remote(), timeout=settings.MIRROR_REMOTE_TIMEOUT_SECONDS or None)
+            except Exception as e:
+                return self._mirror_fallback(query_vector, k, filter, include_values, e)
+        results = [self._format_pinecone_match(match, include_values) for match in response.matches]
+        self._note_remote_hits(results)
+        return results
+    
+    @staticmethod
+    def _format_pinecone_match(match: Any, include_values: bool = False) -> Dict[str, Any]:
+        """Format a Pinecone query match (text is stored in metadata under "text")"""
+        metadata = dict(match.metadata or {})
+        text = metadata.pop("text", "")
+        score = match.score
+        result = {
+            "id": match.id,
+            "text": text,
+            "metadata": metadata,
+            "distance": 1 - score,  # Convert similarity score to distance
+            "score": score
+        }
+        if include_values:
+            result["values"] = match.values
+        return result
+    
+    def _format_local_hit(self, row: int, score: float) -> Dict[str, Any]:
+        """Format a local index hit like a Pinecone search result"""
+        record = self.index.get(row)
+        return {
+            "id": record["id"],
+            "text": record["text"],
+            "metadata": record["metadata"],
+            "distance": 1 - score,
+            "score": score
+        }
+    
+    def _embedding_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters of the embedding cache (None when disabled)"""
+        if isinstance(self.embeddings, CachedEmbeddings):
+            return self.embeddings.stats()
+        return None
+    
+    def evaluate_index(self, k: int = 10, sample: int = 100, ef_search: int = None) -> Dict[str, Any]:
+        """
+        Report recall and latency of the HNSW graph against exact search
+        
+        Args:
+            k: Number of neighbours compared per query
+            sample: Number of stored vectors to use as queries
+            ef_search: Beam width to evaluate (defaults to the configured value)
+        
+        Returns:
+            Dictionary with recall@k and latency figures
+        """
+        if self.backend != "hnsw":
+            raise ValueError("Index evaluation is only available for the hnsw backend")
+        return self.index.evaluate_recall(k=k, sample=sample, ef_search=ef_search)
+    
+    def quantization_report(self, k: int = 10, sample: int = 100) -> Dict[str, Any]:
+        """
+        Report memory saved by quantized vector storage and its recall cost
+        
+        Args:
+            k: Number of neighbours compared per query
+            sample: Number of stored vectors to use as queries
+        
+        Returns:
+            Dictionary with memory figures and recall@k with/without re-scoring
+        """
+        if self.backend not in LOCAL_BACKENDS:
+            raise ValueError("Quantization is only available for the local backends")
+        return self.index.quantization_report(k=k, sample=sample)
+    
+    def two_stage_report(self, k: int = 10, sample: int = 100) -> Dict[str, Any]:
+        """
+        Report recall and scan speed of truncated-prefix (two-stage) search
+        
+        Args:
+            k: Number of neighbours compared per query
+            sample: Number of stored vectors to use as queries
+        
+        Returns:
+            Dictionary with recall@k before/after re-ranking and scan timings
+        """
+        if self.backend not in LOCAL_BACKENDS:
+            raise ValueError("Two-stage search is only available for the local backends")
+        return self.index.two_stage_report(k=k, sample=sample)
+    
+    def shard_report(self, k: int = 10, sample: int = 100) -> Dict[str, Any]:
+        """
+        Verify sharded scatter-gather search against an exact single-matrix scan
+        
+        Args:
+            k: Number of neighbours compared per query
+            sample: Number of stored vectors to use as queries
+        
+        Returns:
+            Dictionary with recall@k (1.0 = merge is exact), score error and
+            per-query timings of the single-process and sharded scans
+        """
+        if self.backend != "sharded":
+            raise ValueError("Shard verification is only available for the sharded backend")
+        return self.index.shard_report(k=k, sample=sample)
+    
+    def export_snapshot(self, directory: str) -> Dict[str, Any]:
+        """
+        Write every chunk to a snapshot directory
+        
+        Files: ``vectors.npy`` (normalized float32, memory-mappable),
+        ``chunks.json`` (ids / texts / metadatas columns plus the registry's
+        document rows) and ``manifest.json`` (embedding model, dimension, count).
+        Local backends dump their live rows; on Pinecone the vectors of every
+        chunk in the document registry are fetched in batches.
+        
+        Args:
+            directory: Target directory (existing snapshot files are overwritten)
+        
+        Returns:
+            The snapshot manifest plus the export time
+        """
+        started = time.perf_counter()
+        registry = get_document_registry()
+        if self.backend in LOCAL_BACKENDS:
+            rows = self.index.live_rows()
+            writer = SnapshotWriter(directory, self.dimension, len(rows))
+            for start in range(0, len(rows), SNAPSHOT_BATCH_ROWS):
+                batch = rows[start:start + SNAPSHOT_BATCH_ROWS]
+                records = [self.index.get(int(row)) for row in batch]
+                writer.append(
+                    [record["id"] for record in records],
+                    self.index.get_vectors(batch),
+                    [record["text"] for record in records],
+                    [record["metadata"] for record in records]
+                )
+        else:
+            writer = SnapshotWriter(directory, self.dimension, registry.stats()["chunks"])
+            for chunks in registry.iter_chunks(batch_size=PINECONE_FETCH_BATCH):
+                response = self.pinecone_index.fetch(ids=[chunk["id"] for chunk in chunks])
+                found = [chunk for chunk in chunks if chunk["id"] in response.vectors]
+                if found:
+                    vectors = np.asarray(
+                        [response.vectors[chunk["id"]].values for chunk in found], dtype=np.float32
+                    )
+                    writer.append(
+                        [chunk["id"] for chunk in found],
+                        vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12),
+                        [chunk["text"] for chunk in found],
+                        [chunk["metadata"] for chunk in found]
+                    )
+        manifest = writer.close(
+            self.embedding_model,
+            documents=registry.list_documents(),
+            source_backend=self.backend
+        )
+        seconds = time.perf_counter() - started
+        print(f"📦 Exported snapshot of {manifest['count']} chunks to {directory} ({seconds:.2f}s)")
+        return {**manifest, "seconds": seconds}
+    
+    def import_snapshot(self, directory: str) -> Dict[str, Any]:
+        """
+        Load a snapshot written by ``export_snapshot`` (no embedding calls)
+        
+        An empty numpy index with float32 storage adopts the memory-mapped
+        vector file as is (zero-copy); other local indexes add the rows in bulk,
+        and Pinecone gets concurrent batched upserts. The BM25 index, document
+        registry and document vectors are restored from the same files.
+        
+        Args:
+            directory: Snapshot directory
+        
+        Returns:
+            Counts, whether the zero-copy path was used, and the import time
+        """
+        started = time.perf_counter()
+        snapshot = read_snapshot(directory, mmap=True)
+        manifest = snapshot["manifest"]
+        # Older manifests name the OpenAI model without its dimension
+        same_model = manifest["embedding_model"] == self.embedding_model or (
+            self.embedding_model == f"{self.model}-{self.dimension}" and manifest["embedding_model"] == self.model
+        )
+        if not same_model or manifest["dimension"] != self.dimension:
+            raise ValueError(
+                f"Snapshot was made with {manifest['embedding_model']} ({manifest['dimension']}d), "
+                f"this service uses {self.embedding_model} ({self.dimension}d)"
+            )
+        ids, texts, metadatas = snapshot["ids"], snapshot["texts"], snapshot["metadatas"]
+        vectors = snapshot["vectors"]
+        count = len(ids)
+        
+        zero_copy = (
+            self.backend == "numpy"
+            and self.index.is_empty()
+            and self.index.storage == "float32"
+            and not self.index.has_full_precision
+            and self.index.coarse_dimension is None
+        )
+        try:
+            if zero_copy:
+                self.index.load_arrays(vectors, ids, texts, metadatas)
+                if self.lexical_index is not None:
+                    self.lexical_index.add(ids, texts, metadatas)
+            elif self.backend in LOCAL_BACKENDS:
+                for start in range(0, count, SNAPSHOT_BATCH_ROWS):
+                    end = start + SNAPSHOT_BATCH_ROWS
+                    self._upsert_vectors(ids[start:end], vectors[start:end], texts[start:end], metadatas[start:end])
+            else:
+                batches = range(0, count, settings.SNAPSHOT_UPSERT_BATCH)
+                
+                def upsert(start: int) -> None:
+                    end = start + settings.SNAPSHOT_UPSERT_BATCH
+                    self._upsert_vectors(
+                        ids[start:end], vectors[start:end].tolist(), texts[start:end], metadatas[start:end]
+                    )
+                
+                with ThreadPoolExecutor(max_workers=settings.PINECONE_POOL_THREADS, thread_name_prefix="restore") as pool:
+                    list(pool.map(upsert, batches))
+            
+            documents = self._restore_documents(snapshot)
+        finally:
+            self.search_cache.invalidate()
+        seconds = time.perf_counter() - started
+        print(f"📦 Imported snapshot of {count} chunks from {directory} ({seconds:.2f}s, zero-copy: {zero_copy})")
+        return {"chunks": count, "documents": documents, "zero_copy": zero_copy, "seconds": seconds}
+    
+    def _restore_documents(self, snapshot: Dict[str, Any]) -> int:
+        """Re-register the snapshot's documents and rebuild their document vectors"""
+        ids, texts, metadatas = snapshot["ids"], snapshot["texts"], snapshot["metadatas"]
+        rows: Dict[str, List[int]] = {}
+        for row, metadata in enumerate(metadatas):
+            if metadata.get("document_id"):
+                rows.setdefault(metadata["document_id"], []).append(row)
+        
+        registry = get_document_registry()
+        documents = {document["document_id"]: document for document in snapshot["documents"]}
+        for document_id, document_rows in rows.items():
+            document = documents.get(document_id)
+            if document is None:
+                continue
+            document_rows.sort(key=lambda row: chunk_index(ids[row]))
+            registry.register(
+                document_id=document_id,
+                filename=document["filename"],
+                content_hash=document["content_hash"],
+                chunk_ids=[ids[row] for row in document_rows],
+                texts=[texts[row] for row in document_rows],
+                metadatas=[metadatas[row] for row in document_rows],
+                ingested_at=document["ingested_at"]
+            )
         
-        return formatted_results
+        if settings.DOCUMENT_VECTORS_ENABLED:
+            pooled = mean_pool_documents(ids, snapshot["vectors"], metadatas)
+            document_ids = list(pooled)
+            vectors = [pooled[document_id] for document_id in document_ids]
+            doc_metadatas = []
+            for document_id in document_ids:
+                first = metadatas[rows[document_id][0]]
+                doc_metadatas.append({
+                    "source": documents[document_id]["filename"] if document_id in documents else first.get("source", ""),
+                    "chunk_count": len(rows[document_id]),
+                    "document_id": document_id
+                })
+            if self.backend in LOCAL_BACKENDS:
+                if document_ids:
+                    self.document_index.add(document_ids, vectors, [""] * len(document_ids), doc_metadatas)
+            else:
+                for start in range(0, len(document_ids), settings.SNAPSHOT_UPSERT_BATCH):
+                    end = start + settings.SNAPSHOT_UPSERT_BATCH
+                    self.pinecone_index.upsert(
+                        vectors=[
+                            {"id": document_id, "values": vector.tolist(), "metadata": metadata}
+                            for document_id, vector, metadata in zip(
+                                document_ids[start:end], vectors[start:end], doc_metadatas[start:end]
+                            )
+                        ],
+                        namespace=settings.DOCUMENT_VECTOR_NAMESPACE
+                    )
+        return len(rows)
     
     def delete_namespace(self, namespace: str) -> bool:
         """
         Delete all records in a namespace (Pinecone only)
-        Note: When using client-side embeddings, namespaces are handled by LangChain
-        and deletion is not directly supported. Use Pinecone dashboard instead.
+        
+        To remove a single document use ``delete`` with the chunk IDs recorded
+        in the document registry.
         
         Args:
             namespace: The namespace to delete
         
         Returns:
-            False (not supported with client-side embeddings)
+            True if the namespace was cleared, False for the local backends
         """
-        print("⚠️  Namespace deletion not directly supported with client-side embeddings")
-        print("   Use Pinecone dashboard to delete specific vectors by metadata filters")
-        return False
+        if self.backend in LOCAL_BACKENDS:
+            print("⚠️  Namespaces are not supported by the local backends")
+            return False
+        try:
+            self.pinecone_index.delete(delete_all=True, namespace=namespace)
+            if namespace == "" and self.lexical_index is not None:
+                self.lexical_index.clear()
+            if namespace == "" and self.mirror is not None:
+                # The index is now empty, so an empty mirror covers it
+                self.mirror.clear()
+                self.mirror.complete = True
+        finally:
+            self.search_cache.invalidate()
+        self.index_stats.refresh()
+        print(f"🗑️  Deleted namespace '{namespace}'")
+        return True
     
-    def get_stats(self) -> Dict[str, Any]:
+    def get_stats(self, refresh: bool = False) -> Dict[str, Any]:
         """
-        Get statistics about the Pinecone vector store
+        Get statistics about the vector store
+        
+        Pinecone counts come from memory (adjusted by writes, replaced by a
+        background refresh), so this makes no network call unless ``refresh``
+        is set. ``counts_estimated`` flags counts that include write deltas
+        since the last refresh.
+        
+        Args:
+            refresh: Fetch fresh counts from Pinecone before answering
         
         Returns:
-            Dictionary with stats about the vector store
+            Dictionary with stats about the vector store (``stats_age_seconds``
+            tells how old the last backend refresh is)
         """
-        index = self.pc.Index(self.index_name)
-        stats = index.describe_index_stats()
+        if self.backend in LOCAL_BACKENDS:
+            stats = {
+                "backend": self.backend,
+                "total_vectors": len(self.index),
+                "deleted_vectors": self.index.deleted_count(),
+                "dimension": self.dimension,
+                "memory_bytes": self.index.memory_bytes(),
+                "vector_storage": {
+                    "dtype": self.index.storage,
+                    "rescore": self.index.has_full_precision,
+                    "rescore_factor": self.index.rescore_factor,
+                    "coarse_dimension": self.index.coarse_dimension,
+                    "coarse_factor": self.index.coarse_factor
+                },
+                "embedding_model": self.embedding_model,
+                "embedding_cache": self._embedding_cache_stats()
+            }
+            if self.backend == "sharded":
+                stats["shards"] = self.index.shard_stats()
+            if self.backend == "hnsw":
+                stats["hnsw"] = {
+                    "M": self.index.M,
+                    "ef_construction": self.index.ef_construction,
+                    "ef_search": self.index.ef_search
+                }
+            stats["search_cache"] = self.search_cache.stats()
+            stats["lexical_index"] = self.lexical_index.stats() if self.lexical_index is not None else None
+            stats["document_vectors"] = len(self.document_index) if self.document_index is not None else None
+            stats["init_timings_ms"] = dict(self.init_timings)
+            return stats
+        
+        if refresh:
+            self.index_stats.refresh()
         return {
             "backend": "pinecone",
             "index_name": self.index_name,
-            "total_vectors": stats.get('total_vector_count', 0),
-            "dimension": 1536,
-            "embedding_model": "text-embedding-3-small (OpenAI)"
+            **self.index_stats.snapshot(),
+            "dimension": self.dimension,
+            "embedding_model": self.embedding_model,
+            "embedding_cache": self._embedding_cache_stats(),
+            "search_cache": self.search_cache.stats(),
+            "lexical_index": self.lexical_index.stats() if self.lexical_index is not None else None,
+            "index_ready": self._index_ready.is_set() and self._index_error is None,
+            "mirror": self.mirror.stats() if self.mirror is not None else None,
+            "init_timings_ms": dict(self.init_timings)
         }
+
+
+_shared_service: Optional[VectorService] = None
+_shared_lock = threading.Lock()
+
+
+def swap_vector_service(service: VectorService) -> Optional[VectorService]:
+    """
+    Make ``service`` the process-wide VectorService (embedding-model cutover)
+    
+    Callers resolve the service on every request, so new requests use
+    ``service`` immediately while in-flight ones finish on the old instance.
+    
+    Returns:
+        The previous service (left open for requests still using it)
+    """
+    global _shared_service
+    with _shared_lock:
+        previous, _shared_service = _shared_service, service
+    return previous
+
+
+def get_vector_service() -> VectorService:
+    """
+    Return the process-wide VectorService, creating it on first use
+    
+    Every router and service shares this instance (and its HTTP connection
+    pools and caches) instead of building its own client at import time.
+    
+    Returns:
+        The shared VectorService
+    """
+    global _shared_service
+    if _shared_service is None:
+        with _shared_lock:
+            if _shared_service is None:
+                _shared_service = VectorService()
+    return _shared_service
+
+
+async def close_vector_service() -> None:
+    """Close the shared VectorService if it was created (call on application shutdown)"""
+    global _shared_service
+    if _shared_service is not None:
+        await _shared_service.aclose()
+        _shared_service = None
@@ -4,13 +4,19 @@ Migration script to upgrade from ChromaDB to modern Pinecone SDK
 Run this after installing the updated dependencies
 """
 
+import argparse
+import json
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+DEFAULT_CHECKPOINT = ".migration_checkpoint.json"
+
 def check_dependencies():
     """Check if required dependencies are installed"""
     print("🔍 Checking dependencies...")
@@ -99,8 +105,91 @@ def create_pinecone_index():
         print(f"❌ Error creating index: {e}")
         return False
 
-def migrate_chromadb_data():
-    """Migrate data from ChromaDB to Pinecone"""
+def load_checkpoint(path, collection_name):
+    """Return the saved migration progress for ``collection_name`` (None = start fresh)"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("collection") != collection_name:
+        print(f"⚠️  Checkpoint {path} belongs to collection '{checkpoint.get('collection')}', ignoring it")
+        return None
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    """Write progress atomically (a crash mid-write never corrupts the previous checkpoint)"""
+    if not path:
+        return
+    checkpoint["updated_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def iter_chroma_pages(collection, start_offset, page_size):
+    """Yield ``(offset, ids, documents, metadatas)`` pages; only one page is held at a time"""
+    offset = start_offset
+    while True:
+        page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+        if not page['ids']:
+            return
+        yield offset, page['ids'], page['documents'], page['metadatas']
+        offset += len(page['ids'])
+
+
+def upsert_page(index, ids, documents, metadatas, batch_size=96, retries=3):
+    """
+    Upsert one page of Chroma rows (one namespace per source file)
+
+    Returns:
+        Namespaces written to
+    """
+    records_by_source = {}
+    for doc_id, text, metadata in zip(ids, documents, metadatas):
+        metadata = metadata or {}
+        source = metadata.get('source', metadata.get('filename', 'unknown'))
+        records_by_source.setdefault(source, []).append({
+            "_id": doc_id,
+            "content": text,  # This field will be embedded by Pinecone
+            **metadata  # Include all metadata
+        })
+
+    namespaces = set()
+    for source, records in records_by_source.items():
+        namespace = f"resume_{source.replace('.pdf', '').replace(' ', '_')}"
+        # Batch upsert (max 96 records per batch for text)
+        for i in range(0, len(records), batch_size):
+            batch = records[i:i + batch_size]
+            for attempt in range(1, retries + 1):
+                try:
+                    index.upsert_records(namespace, batch)
+                    break
+                except Exception:
+                    if attempt == retries:
+                        raise
+                    time.sleep(2 ** attempt)
+        namespaces.add(namespace)
+    return namespaces
+
+
+def migrate_chromadb_data(page_size=500, workers=4, checkpoint_path=DEFAULT_CHECKPOINT, restart=False):
+    """
+    Stream data from ChromaDB to Pinecone
+
+    Pages are read with ``limit``/``offset`` and upserted by a bounded pool,
+    so memory stays constant however large the collection is. After every
+    page the checkpoint records the offset below which every row has been
+    upserted; a re-run resumes from there (upserts are idempotent, so pages
+    that finished out of order are simply written again).
+
+    Args:
+        page_size: Rows read from Chroma per page
+        workers: Pages upserted concurrently
+        checkpoint_path: Progress file (None = no checkpointing)
+        restart: Ignore an existing checkpoint
+    """
     print("\n🔄 Migrating data from ChromaDB to Pinecone...")
     
     try:
@@ -121,14 +210,20 @@ def migrate_chromadb_data():
             print("ℹ️  No ChromaDB collection found. Skipping migration.")
             return True
         
-        # Get all data from ChromaDB
-        results = collection.get(include=["documents", "metadatas"])
-        
-        if not results['ids']:
+        total = collection.count()
+        if not total:
             print("ℹ️  ChromaDB collection is empty. Nothing to migrate.")
             return True
         
-        print(f"📊 Found {len(results['ids'])} documents in ChromaDB")
+        checkpoint = None if restart else load_checkpoint(checkpoint_path, collection.name)
+        if checkpoint is None:
+            checkpoint = {"collection": collection.name, "next_offset": 0, "migrated": 0, "namespaces": []}
+        elif checkpoint["next_offset"] >= total:
+            print(f"✅ Checkpoint says all {total} documents were already migrated (use --restart to redo)")
+            return True
+        else:
+            print(f"↩️  Resuming from offset {checkpoint['next_offset']} (checkpoint {checkpoint_path})")
+        print(f"📊 Found {total} documents in ChromaDB")
         
         # Initialize Pinecone
         api_key = os.getenv("PINECONE_API_KEY")
@@ -136,38 +231,60 @@ def migrate_chromadb_data():
         pc = Pinecone(api_key=api_key)
         index = pc.Index(index_name)
         
-        # Prepare records for Pinecone
-        # Group by source file for better namespace organization
-        records_by_source = {}
+        print(f"\n📤 Uploading to Pinecone ({workers} concurrent pages of {page_size})...")
+        namespaces = set(checkpoint["namespaces"])
+        pending = {}  # future -> (offset, rows)
+        finished = {}  # offset -> rows, for pages done ahead of the watermark
+        migrated = 0
+        failed = None
+        started = last_report = time.perf_counter()
         
-        for i, (doc_id, text, metadata) in enumerate(zip(results['ids'], results['documents'], results['metadatas'])):
-            source = metadata.get('source', metadata.get('filename', 'unknown'))
-            
-            if source not in records_by_source:
-                records_by_source[source] = []
-            
-            records_by_source[source].append({
-                "_id": doc_id,
-                "content": text,  # This field will be embedded by Pinecone
-                **metadata  # Include all metadata
-            })
-        
-        # Upsert to Pinecone by source (one namespace per source)
-        print(f"\n📤 Uploading to Pinecone...")
-        for source, records in records_by_source.items():
-            namespace = f"resume_{source.replace('.pdf', '').replace(' ', '_')}"
-            print(f"   Uploading {len(records)} records to namespace '{namespace}'...")
-            
-            # Batch upsert (max 96 records per batch for text)
-            batch_size = 96
-            for i in range(0, len(records), batch_size):
-                batch = records[i:i + batch_size]
-                index.upsert_records(namespace, batch)
-            
-            print(f"   ✅ {len(records)} records uploaded")
+        def drain(return_when):
+            """Collect finished pages and advance the checkpoint watermark"""
+            nonlocal migrated, failed, last_report
+            done, _ = wait(list(pending), return_when=return_when)
+            for future in done:
+                offset, rows = pending.pop(future)
+                try:
+                    namespaces.update(future.result())
+                except Exception as e:
+                    failed = failed or e
+                    continue
+                finished[offset] = rows
+                migrated += rows
+            while checkpoint["next_offset"] in finished:
+                rows = finished.pop(checkpoint["next_offset"])
+                checkpoint["next_offset"] += rows
+                checkpoint["migrated"] += rows
+            checkpoint["namespaces"] = sorted(namespaces)
+            save_checkpoint(checkpoint_path, checkpoint)
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                rate = migrated / (now - started)
+                print(f"   {checkpoint['next_offset']}/{total} documents ({rate:.0f} records/sec)")
+                last_report = now
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for offset, ids, documents, metadatas in iter_chroma_pages(collection, checkpoint["next_offset"], page_size):
+                if failed is not None:
+                    break
+                future = pool.submit(upsert_page, index, ids, documents, metadatas)
+                pending[future] = (offset, len(ids))
+                # Bounded window: at most ``workers`` pages in memory and in flight
+                if len(pending) >= workers:
+                    drain(FIRST_COMPLETED)
+            while pending:
+                drain(ALL_COMPLETED)
         
-        print(f"\n✅ Migration complete! Migrated {len(results['ids'])} documents")
-        print(f"   Organized into {len(records_by_source)} namespaces")
+        elapsed = time.perf_counter() - started
+        rate = migrated / elapsed if elapsed else 0.0
+        if failed is not None:
+            print(f"❌ Upsert failed: {failed}")
+            print(f"   Progress saved at offset {checkpoint['next_offset']}; re-run to resume")
+            return False
+        
+        print(f"\n✅ Migration complete! Migrated {migrated} documents in {elapsed:.1f}s ({rate:.0f} records/sec)")
+        print(f"   Organized into {len(namespaces)} namespaces")
         
         return True
         
@@ -177,8 +294,17 @@ def migrate_chromadb_data():
         traceback.print_exc()
         return False
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Set up the Pinecone index and migrate ChromaDB data")
+    parser.add_argument("--page-size", type=int, default=500, help="rows read from ChromaDB per page")
+    parser.add_argument("--workers", type=int, default=4, help="pages upserted concurrently")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="progress file used to resume")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and migrate from the start")
+    return parser.parse_args()
+
 def main():
     """Main migration workflow"""
+    args = parse_args()
     print("=" * 60)
     print("PINECONE MIGRATION SCRIPT")
     print("=" * 60)
@@ -198,7 +324,12 @@ def main():
     # Step 4: Migrate data (optional)
     response = input("\n❓ Do you want to migrate existing ChromaDB data to Pinecone? (yes/no): ")
     if response.lower() == 'yes':
-        if not migrate_chromadb_data():
+        if not migrate_chromadb_data(
+            page_size=args.page_size,
+            workers=args.workers,
+            checkpoint_path=args.checkpoint,
+            restart=args.restart
+        ):
             print("\n⚠️  Migration had errors, but index is ready for new data")
     
     print("\n" + "=" * 60)